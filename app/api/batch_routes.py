@@ -0,0 +1,182 @@
+import asyncio
+import json
+from typing import Dict, Any, List, Tuple
+from urllib.parse import urlencode
+from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi.responses import Response
+from prometheus_client import Counter
+from app.api.responses import NumpyAPIRoute, dumps
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+router = APIRouter(tags=["Batch"], route_class=NumpyAPIRoute)
+
+BATCH_SUBREQUESTS = Counter(
+    "api_batch_subrequests_total", "Sub-requests received by the batch endpoint", ["result"]
+)
+
+# Sub-requests may only target the versioned API, never the batch endpoint itself
+API_PREFIX = "/api/v1/"
+BATCH_PATH = API_PREFIX + "batch"
+METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+# POST routes that only compute over their body; anything else (jobs, activations) has side effects
+READ_ONLY_POST_PREFIXES = (API_PREFIX + "analyze/",)
+# Request headers that describe the batch call itself rather than the sub-request
+HOP_HEADERS = {b"content-length", b"content-type", b"accept", b"accept-encoding", b"transfer-encoding"}
+
+def _subrequest_key(call: Any) -> Tuple[str, str, str, str]:
+    """Canonical (method, path, query, body) of a sub-request"""
+    if not isinstance(call, dict):
+        raise ValueError("Sub-request must be an object")
+    method = str(call.get("method", "POST")).upper()
+    path = call.get("path")
+    if method not in METHODS:
+        raise ValueError(f"Unsupported method: {method}")
+    if not isinstance(path, str) or not path.startswith(API_PREFIX):
+        raise ValueError(f"Path must start with {API_PREFIX}")
+    if path.rstrip("/") == BATCH_PATH:
+        raise ValueError("Batches cannot be nested")
+    params = call.get("params") or {}
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    query = urlencode(sorted(
+        (name, "true" if value is True else "false" if value is False else value)
+        for name, value in params.items()
+    ), doseq=True)
+    body = json.dumps(call["body"], sort_keys=True, separators=(",", ":")) if call.get("body") is not None else ""
+    return method, path, query, body
+
+def _is_read_only(key: Tuple[str, str, str, str]) -> bool:
+    """Whether identical copies of this sub-request may share one execution"""
+    method, path = key[0], key[1]
+    return method == "GET" or (method == "POST" and path.startswith(READ_ONLY_POST_PREFIXES))
+
+async def _dispatch(request: Request, key: Tuple[str, str, str, str]) -> Tuple[int, bytes, bool]:
+    """Run one sub-request through the app's router, skipping the middleware stack.
+    
+    Returns the status code, the raw response body and whether it is JSON.
+    """
+    method, path, query, body = key
+    app = request.app
+    headers = [(k, v) for k, v in request.scope["headers"] if k not in HOP_HEADERS]
+    headers += [(b"accept", b"application/json"), (b"content-type", b"application/json")]
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "app": app,
+        "state": request.scope.get("state", {}),
+    }
+    body_sent = False
+    
+    async def receive() -> Dict[str, Any]:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body.encode(), "more_body": False}
+        # The client of a sub-request never disconnects; it ends with the batch
+        await asyncio.Future()
+    
+    status = 500
+    content_type = b""
+    chunks: List[bytes] = []
+    
+    async def send(message: Dict[str, Any]):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+    
+    try:
+        await app.router(scope, receive, send)
+    except Exception as e:
+        # Normally turned into a response by the app's exception middleware
+        handler = next(
+            (app.exception_handlers[cls] for cls in type(e).__mro__ if cls in app.exception_handlers), None
+        )
+        if handler is None:
+            logger.error("Batch sub-request error", method=method, path=path, error=str(e))
+            return 500, dumps({"detail": str(e)}), True
+        response = await handler(Request(scope, receive), e)
+        return response.status_code, response.body, True
+    return status, b"".join(chunks), content_type.startswith(b"application/json")
+
+@router.post("/batch")
+async def batch(
+    request: Request,
+    requests: List[Any] = Body(..., embed=True)
+):
+    """Run several API calls in one round trip.
+    
+    Each sub-request is ``{"id", "method", "path", "params", "body"}`` against
+    an existing ``/api/v1`` route; they run concurrently in-process and the
+    results come back in request order. Identical GETs and ``/analyze`` POSTs
+    are executed once and share their result; other writes always run once per
+    entry. A malformed entry gets its own 400 instead of failing the whole batch.
+    
+    Sub-requests are dispatched straight to the router, so app middleware
+    (CORS, GZip) applies to the batch call as a whole, not to each sub-request.
+    """
+    if len(requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413, detail=f"Batch is limited to {settings.BATCH_MAX_REQUESTS} sub-requests"
+        )
+    
+    slots: List[Any] = []
+    unique: Dict[Tuple[Any, ...], asyncio.Future] = {}
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    
+    async def run(key: Tuple[str, str, str, str]) -> Tuple[int, bytes, bool]:
+        async with semaphore:
+            return await _dispatch(request, key)
+    
+    for index, call in enumerate(requests):
+        try:
+            key = _subrequest_key(call)
+        except (TypeError, ValueError) as e:
+            slots.append(e)
+            BATCH_SUBREQUESTS.labels(result="invalid").inc()
+            continue
+        # Two identical job submissions are two jobs; only read-only calls are shared
+        slot = key if _is_read_only(key) else key + (index,)
+        if slot in unique:
+            BATCH_SUBREQUESTS.labels(result="deduplicated").inc()
+        else:
+            unique[slot] = asyncio.ensure_future(run(key))
+            BATCH_SUBREQUESTS.labels(result="executed").inc()
+        slots.append(slot)
+    
+    await asyncio.gather(*unique.values())
+    
+    # Sub-responses are already JSON, so they are spliced in rather than re-parsed
+    parts = []
+    for call, slot in zip(requests, slots):
+        call_id = dumps(call.get("id") if isinstance(call, dict) else None)
+        if isinstance(slot, Exception):
+            status, body, is_json = 400, dumps({"detail": str(slot)}), True
+        else:
+            status, body, is_json = unique[slot].result()
+        if not is_json:
+            body = dumps(body.decode("utf-8", "replace"))
+        elif not body:
+            body = b"null"
+        parts.append(b'{"id":' + call_id + b',"status":' + str(status).encode() + b',"body":' + body + b"}")
+    
+    content = (
+        b'{"count":' + str(len(requests)).encode()
+        + b',"executed":' + str(len(unique)).encode()
+        + b',"responses":[' + b",".join(parts) + b"]}"
+    )
+    return Response(content, media_type="application/json")
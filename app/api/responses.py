@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import json
+import math
+from typing import Any, Callable
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Fallback for values the serializer does not handle natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return jsonable_encoder(obj)
+
+def _finite(obj: Any) -> Any:
+    """Copy of ``obj`` with NaN and infinities replaced by None, as orjson writes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite(obj.tolist())
+    return obj
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes; NumPy scalars and arrays are written natively when orjson is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    try:
+        return json.dumps(content, default=_default, separators=(",", ":"), allow_nan=False).encode()
+    except ValueError:
+        # Non-finite floats are not valid JSON; only then pay for a sanitizing pass
+        return json.dumps(
+            _finite(content), default=lambda obj: _finite(_default(obj)), separators=(",", ":"), allow_nan=False
+        ).encode()
+
+class NumpyJSONResponse(JSONResponse):
+    """JSONResponse that serializes NumPy values without converting them first"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class NumpyAPIRoute(APIRoute):
+    """Route that hands the endpoint's result straight to ``NumpyJSONResponse``.
+    
+    FastAPI otherwise walks every result with ``jsonable_encoder`` and the
+    response-model serializer before the response class sees it. The routers
+    using this route only declare ``Dict[str, Any]``-style response models,
+    which stay on the route for the OpenAPI schema. Endpoints that return a
+    ``Response`` themselves (streams, errors) are passed through untouched.
+    """
+    
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        status_code = kwargs.get("status_code") or 200
+        is_async = asyncio.iscoroutinefunction(endpoint)
+        
+        @functools.wraps(endpoint)
+        async def respond(*args: Any, **values: Any) -> Any:
+            if is_async:
+                result = await endpoint(*args, **values)
+            else:
+                result = await run_in_threadpool(endpoint, *args, **values)
+            if isinstance(result, Response):
+                return result
+            return NumpyJSONResponse(result, status_code=status_code)
+        
+        super().__init__(path, respond, **kwargs)
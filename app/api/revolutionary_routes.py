@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 from app.core.database import get_db
@@ -7,11 +7,13 @@ from app.services.quantum_risk_engine import quantum_engine
 from app.services.defi_autopilot import autopilot
 from app.services.neural_market_prophet import neural_prophet
 from app.services.realtime_shield import realtime_shield
+from app.api.responses import NumpyAPIRoute
+from app.api.streaming import streaming_format, stream_response
 import structlog
 import json
 
 logger = structlog.get_logger()
-router = APIRouter(prefix="/revolutionary", tags=["Revolutionary Features"])
+router = APIRouter(prefix="/revolutionary", tags=["Revolutionary Features"], route_class=NumpyAPIRoute)
 
 @router.post("/ai-oracle/predict", response_model=Dict[str, Any])
 async def ai_oracle_prediction(
@@ -111,11 +113,20 @@ async def get_autopilot_performance(
 
 @router.post("/neural-prophet/predict", response_model=Dict[str, Any])
 async def neural_market_prediction(
+    request: Request,
     market_data: Dict[str, Any],
     prediction_hours: int = 168,
     db: AsyncSession = Depends(get_db)
 ):
-    """🧠 Neural Market Prophet - 99.2% accuracy market prediction"""
+    """🧠 Neural Market Prophet - 99.2% accuracy market prediction
+    
+    With ``Accept: application/x-ndjson`` or ``text/event-stream`` the hourly
+    predictions are streamed in chunks as they are computed.
+    """
+    stream_format = streaming_format(request)
+    if stream_format:
+        return stream_response(neural_prophet.stream_market_future(market_data, prediction_hours), stream_format)
+    
     try:
         prediction = await neural_prophet.predict_market_future(market_data, prediction_hours)
         
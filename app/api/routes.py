@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any, List, Optional
 from app.services.blockchain_service import blockchain_service
 from app.services.risk_engine import risk_engine
+from app.services.risk_cache import risk_cache
+from app.services.risk_model import risk_model_registry
+from app.services.covariance_engine import covariance_engine
+from app.api.responses import NumpyAPIRoute
+from app.api.streaming import streaming_format, stream_response
 import structlog
 
 logger = structlog.get_logger()
-router = APIRouter()
+router = APIRouter(route_class=NumpyAPIRoute)
 
 @router.post("/analyze/wallet", response_model=Dict[str, Any])
 async def analyze_wallet_risk(
@@ -36,7 +41,9 @@ async def analyze_wallet_risk(
         }
         
         # Calculate risk assessment
-        risk_analysis = await risk_engine.calculate_overall_risk(protocol_data, portfolio_data)
+        risk_analysis = await risk_cache.get_or_compute(
+            protocol_data, portfolio_data, risk_engine.calculate_overall_risk
+        )
         
         return {
             "wallet_address": wallet_address,
@@ -77,7 +84,9 @@ async def analyze_protocol_risk(
         }
         
         # Calculate comprehensive risk
-        risk_analysis = await risk_engine.calculate_overall_risk(protocol_data, portfolio_data)
+        risk_analysis = await risk_cache.get_or_compute(
+            protocol_data, portfolio_data, risk_engine.calculate_overall_risk
+        )
         
         return {
             "protocol_address": protocol_address,
@@ -89,62 +98,200 @@ async def analyze_protocol_risk(
         logger.error("Error analyzing protocol risk", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze/protocols/batch", response_model=Dict[str, Any])
+async def analyze_protocols_batch(
+    protocol_features: Dict[str, Any],
+    portfolio_features: Dict[str, Any]
+):
+    """Score many protocol/portfolio pairs at once from columnar feature arrays"""
+    try:
+        batch = await risk_engine.calculate_batch_risk(protocol_features, portfolio_features)
+        
+        return {
+            "count": batch["count"],
+            # Arrays are written as-is by NumpyJSONResponse
+            "overall_risk_score": batch["overall_risk_score"],
+            "risk_level": batch["risk_level"],
+            "risk_components": batch["risk_components"],
+            "var_metrics": batch["var_metrics"],
+            "confidence_score": batch["confidence_score"],
+            "model_version": batch["model_version"],
+            "timestamp": batch["timestamp"]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("Error analyzing protocol batch", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/stress-test", response_model=Dict[str, Any])
+async def run_stress_test(
+    protocol_features: Dict[str, Any],
+    portfolio_features: Dict[str, Any],
+    shocks: Optional[Dict[str, List[Any]]] = None,
+    protocol_ids: Optional[List[Any]] = None,
+    top_k: int = 10
+):
+    """Apply a grid of shocks to a protocol universe and report the score distribution"""
+    try:
+        return await risk_engine.run_stress_test(
+            protocol_features, portfolio_features, shocks=shocks, protocol_ids=protocol_ids, top_k=top_k
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("Error running stress test", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/var", response_model=Dict[str, Any])
+async def analyze_value_at_risk(
+    portfolio_data: Dict[str, Any],
+    confidence_level: float = 0.95,
+    paths: int = 100000
+):
+    """Simulate 1d/7d/30d VaR and Expected Shortfall for a portfolio of positions"""
+    try:
+        var_metrics = await risk_engine.calculate_portfolio_var(
+            {**portfolio_data, "var_confidence": confidence_level, "var_paths": paths}
+        )
+        
+        return {
+            "portfolio_value": sum(p.get("value", 0) for p in portfolio_data["positions"]),
+            "var_metrics": var_metrics
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("Error calculating portfolio VaR", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _portfolio_wallet(balance_data: Dict[str, Any]) -> Dict[str, Any]:
+    wallet = {
+        "address": balance_data["address"],
+        "chain": balance_data["chain"],
+        "status": balance_data["status"]
+    }
+    if balance_data["status"] != "ok":
+        logger.warning(f"Error analyzing wallet {balance_data['address']} on {balance_data['chain']}",
+                       status=balance_data["status"], error=balance_data["error"])
+        wallet["error"] = balance_data["error"]
+    else:
+        wallet["balance"] = balance_data
+    return wallet
+
+async def _portfolio_risk_summary(total_value: float) -> Dict[str, Any]:
+    """Portfolio-level risk for the valued wallets"""
+    if total_value <= 0:
+        return {}
+    
+    protocol_data = {
+        "tvl": 10000000,
+        "daily_volume": 500000,
+        "volatility": 0.35,
+        "audit_status": True,
+        "code_quality_score": 0.75,
+        "days_since_deployment": 300,
+        "governance_score": 0.7,
+        "team_reputation": 0.8,
+        "decentralization_level": 0.6
+    }
+    
+    portfolio_data = {
+        "total_value": total_value,
+        "correlation_with_market": 0.8
+    }
+    
+    return await risk_cache.get_or_compute(
+        protocol_data, portfolio_data, risk_engine.calculate_overall_risk
+    )
+
+async def _stream_portfolio(wallet_addresses: List[str], chains: List[str]):
+    """Each wallet as soon as its batch is read, then the portfolio summary"""
+    total_value = 0
+    partial = False
+    async for _, balances in blockchain_service.iter_portfolio_balances(wallet_addresses, chains):
+        for balance_data in balances:
+            wallet = _portfolio_wallet(balance_data)
+            if wallet["status"] == "ok":
+                total_value += balance_data["balance_eth"] * 2000
+            else:
+                partial = True
+            yield "wallet", wallet
+    
+    yield "summary", {
+        "total_value": total_value,
+        "risk_summary": await _portfolio_risk_summary(total_value),
+        "diversification_score": 0,
+        "recommendations": [],
+        "partial": partial
+    }
+
 @router.post("/analyze/portfolio", response_model=Dict[str, Any])
 async def analyze_portfolio_risk(
+    request: Request,
     wallet_addresses: list[str],
     chains: list[str] = ["ethereum"]
 ):
-    """Analyze risk for an entire portfolio across multiple wallets and chains"""
+    """Analyze risk for an entire portfolio across multiple wallets and chains.
+    
+    Send ``Accept: application/x-ndjson`` or ``text/event-stream`` to receive
+    each wallet as it is read, followed by the summary.
+    """
+    stream_format = streaming_format(request)
+    if stream_format:
+        return stream_response(_stream_portfolio(wallet_addresses, chains), stream_format)
+    
     try:
         portfolio_analysis = {
             "total_value": 0,
             "wallets": [],
             "risk_summary": {},
             "diversification_score": 0,
-            "recommendations": []
+            "recommendations": [],
+            "partial": False
         }
         
-        # Analyze each wallet
-        for wallet in wallet_addresses:
-            for chain in chains:
-                try:
-                    balance_data = await blockchain_service.get_wallet_balance(wallet, chain)
-                    portfolio_analysis["wallets"].append({
-                        "address": wallet,
-                        "chain": chain,
-                        "balance": balance_data
-                    })
-                    portfolio_analysis["total_value"] += balance_data["balance_eth"] * 2000
-                except Exception as e:
-                    logger.warning(f"Error analyzing wallet {wallet} on {chain}", error=str(e))
+        # All wallets x chains are fetched concurrently under a concurrency cap, a per-call
+        # timeout and an overall deadline; wallets that could not be read carry their status
+        portfolio = await blockchain_service.get_portfolio_balances(wallet_addresses, chains)
+        for balance_data in portfolio["balances"]:
+            wallet = _portfolio_wallet(balance_data)
+            if wallet["status"] == "ok":
+                portfolio_analysis["total_value"] += balance_data["balance_eth"] * 2000
+            portfolio_analysis["wallets"].append(wallet)
+        portfolio_analysis["partial"] = portfolio["partial"]
         
         # Calculate portfolio-level risk
-        if portfolio_analysis["total_value"] > 0:
-            protocol_data = {
-                "tvl": 10000000,
-                "daily_volume": 500000,
-                "volatility": 0.35,
-                "audit_status": True,
-                "code_quality_score": 0.75,
-                "days_since_deployment": 300,
-                "governance_score": 0.7,
-                "team_reputation": 0.8,
-                "decentralization_level": 0.6
-            }
-            
-            portfolio_data = {
-                "total_value": portfolio_analysis["total_value"],
-                "correlation_with_market": 0.8
-            }
-            
-            risk_analysis = await risk_engine.calculate_overall_risk(protocol_data, portfolio_data)
-            portfolio_analysis["risk_summary"] = risk_analysis
+        portfolio_analysis["risk_summary"] = await _portfolio_risk_summary(portfolio_analysis["total_value"])
         
         return portfolio_analysis
     except Exception as e:
         logger.error("Error analyzing portfolio risk", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/risk-model", response_model=Dict[str, Any])
+async def get_risk_model():
+    """Get the active risk model configuration and version"""
+    model = risk_model_registry.model
+    return {
+        "version": model.version,
+        "path": risk_model_registry.path,
+        "config": model.config
+    }
+
+@router.post("/risk-model/reload", response_model=Dict[str, Any])
+async def reload_risk_model():
+    """Recompile the risk model file and hot-swap it if it changed"""
+    try:
+        reloaded = risk_model_registry.reload()
+        return {
+            "reloaded": reloaded,
+            "version": risk_model_registry.model.version
+        }
+    except Exception as e:
+        logger.error("Error reloading risk model", error=str(e))
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.get("/protocols/trending", response_model=list[Dict[str, Any]])
 async def get_trending_protocols(
     limit: int = 10
@@ -187,6 +334,21 @@ async def get_trending_protocols(
         logger.error("Error getting trending protocols", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/market/returns", response_model=Dict[str, Any])
+async def ingest_market_returns(returns: Dict[str, float]):
+    """Fold one tick of asset returns (symbol -> return) into the streaming covariance"""
+    try:
+        snapshot = covariance_engine.update(returns)
+        return {
+            "assets_tracked": len(snapshot.symbols),
+            "observations": snapshot.observations,
+            # Readiness is per asset; report it for the assets in this tick
+            "ready": covariance_engine.is_ready_for(list(returns))
+        }
+    except Exception as e:
+        logger.error("Error ingesting market returns", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/market/overview", response_model=Dict[str, Any])
 async def get_market_overview():
     """Get DeFi market overview with risk indicators"""
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Dict, Any
 from app.services.saas_engine import saas_engine, SubscriptionTier
-from app.services.multiverse_simulator import multiverse_simulator
-from app.services.time_machine import time_machine
 from app.services.social_trading import social_trading
+from app.services.job_manager import job_manager
+from app.api.responses import NumpyAPIRoute, NumpyJSONResponse
+from app.api.streaming import streaming_format, stream_response
 import structlog
 
 logger = structlog.get_logger()
-router = APIRouter(prefix="/saas", tags=["SaaS & Monetization"])
+router = APIRouter(prefix="/saas", tags=["SaaS & Monetization"], route_class=NumpyAPIRoute)
 
 @router.get("/pricing", response_model=Dict[str, Any])
 async def get_pricing_tiers():
@@ -22,40 +23,116 @@ async def get_pricing_tiers():
         'enterprise_custom': True
     }
 
-@router.post("/multiverse/simulate", response_model=Dict[str, Any])
-async def simulate_multiverse(portfolio_data: Dict[str, Any], user_id: str):
-    """🌌 WORLD FIRST: Simulate 10,000 parallel universes"""
+@router.post("/multiverse/simulate", status_code=202, response_model=Dict[str, Any])
+async def simulate_multiverse(request: Request, portfolio_data: Dict[str, Any], user_id: str):
+    """🌌 WORLD FIRST: Simulate 10,000 parallel universes
+    
+    Runs as a background job, like ``/jobs/multiverse``: returns the job id and
+    its URLs immediately. With ``Accept: application/x-ndjson`` or
+    ``text/event-stream`` the job's progress is streamed instead, followed by
+    the result.
+    """
     
     access = await saas_engine.check_feature_access(user_id, "Multiverse Simulator")
     if not access['has_access']:
         raise HTTPException(status_code=403, detail=access)
     
-    result = await multiverse_simulator.simulate_all_futures(portfolio_data)
+    record = await job_manager.submit("multiverse", {"portfolio_data": portfolio_data}, user_id)
+    stream_format = streaming_format(request)
+    if stream_format:
+        return stream_response(job_manager.events(record['job_id']), stream_format)
+    return _job_status(request, record)
+
+@router.post("/time-machine/backtest", status_code=202, response_model=Dict[str, Any])
+async def time_machine_backtest(request: Request, strategy: Dict[str, Any], user_id: str, years: int = 5):
+    """⏰ REVOLUTIONARY: Perfect historical backtesting
+    
+    Runs as a background job, like ``/jobs/backtest``.
+    """
+    
+    access = await saas_engine.check_feature_access(user_id, "Time Machine")
+    if not access['has_access']:
+        raise HTTPException(status_code=403, detail=access)
+    
+    record = await job_manager.submit("backtest", {"strategy": strategy, "years": years}, user_id)
+    return _job_status(request, record)
+
+def _job_status(request: Request, record: Dict[str, Any]) -> Dict[str, Any]:
+    job_id = record['job_id']
+    
+    def job_url(name: str) -> str:
+        # Job endpoints are scoped to the submitting user, like the submit endpoints
+        return str(request.url_for(name, job_id=job_id).include_query_params(user_id=record['user_id']))
     
     return {
-        'feature': 'MULTIVERSE_SIMULATOR',
-        'world_first': True,
-        'universes_simulated': 10000,
-        'simulation': result,
-        'competitive_advantage': 'See ALL possible futures'
+        'job_id': job_id,
+        'kind': record['kind'],
+        'status': record['status'],
+        'progress': record['progress'],
+        'error': record['error'],
+        'created_at': record['created_at'],
+        'updated_at': record['updated_at'],
+        'status_url': job_url('get_job_status'),
+        'result_url': job_url('get_job_result'),
+        'events_url': job_url('stream_job_events')
     }
 
-@router.post("/time-machine/backtest", response_model=Dict[str, Any])
-async def time_machine_backtest(strategy: Dict[str, Any], user_id: str, years: int = 5):
-    """⏰ REVOLUTIONARY: Perfect historical backtesting"""
+async def _get_job(job_id: str, user_id: str) -> Dict[str, Any]:
+    record = await job_manager.get(job_id)
+    # Another user's job is reported as missing rather than forbidden
+    if record is None or record['user_id'] != user_id:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return record
+
+@router.post("/jobs/multiverse", status_code=202, response_model=Dict[str, Any])
+async def submit_multiverse_job(request: Request, portfolio_data: Dict[str, Any], user_id: str):
+    """🌌 Run the multiverse simulation as a background job
+    
+    Returns a job id immediately; poll ``status_url``, follow ``events_url``
+    or fetch ``result_url`` once the job has succeeded.
+    """
+    
+    access = await saas_engine.check_feature_access(user_id, "Multiverse Simulator")
+    if not access['has_access']:
+        raise HTTPException(status_code=403, detail=access)
+    
+    record = await job_manager.submit("multiverse", {"portfolio_data": portfolio_data}, user_id)
+    return _job_status(request, record)
+
+@router.post("/jobs/backtest", status_code=202, response_model=Dict[str, Any])
+async def submit_backtest_job(request: Request, strategy: Dict[str, Any], user_id: str, years: int = 5):
+    """⏰ Run a time-machine backtest as a background job"""
     
     access = await saas_engine.check_feature_access(user_id, "Time Machine")
     if not access['has_access']:
         raise HTTPException(status_code=403, detail=access)
     
-    result = await time_machine.time_travel_backtest(strategy, years)
+    record = await job_manager.submit("backtest", {"strategy": strategy, "years": years}, user_id)
+    return _job_status(request, record)
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job_status(request: Request, job_id: str, user_id: str):
+    """Status and latest progress of a background job"""
+    return _job_status(request, await _get_job(job_id, user_id))
+
+@router.get("/jobs/{job_id}/result", response_model=Dict[str, Any])
+async def get_job_result(request: Request, job_id: str, user_id: str):
+    """Result of a finished job; 202 with the current status while it is still running"""
     
-    return {
-        'feature': 'TIME_MACHINE',
-        'accuracy': '100% historical',
-        'backtest_results': result,
-        'competitive_advantage': 'Zero-risk strategy testing'
-    }
+    record = await _get_job(job_id, user_id)
+    if record['status'] == 'succeeded':
+        return {'job_id': job_id, 'status': record['status'], 'result': record['result']}
+    status = _job_status(request, record)
+    if record['status'] == 'failed':
+        return status
+    return NumpyJSONResponse(status, status_code=202)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(request: Request, job_id: str, user_id: str):
+    """Progress of a job as server-sent events (or NDJSON), ending with its result"""
+    
+    await _get_job(job_id, user_id)
+    return stream_response(job_manager.events(job_id), streaming_format(request) or "sse")
 
 @router.get("/social/top-traders", response_model=Dict[str, Any])
 async def get_top_traders(limit: int = 50):
@@ -0,0 +1,66 @@
+from typing import Any, AsyncIterator, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from app.api.responses import dumps
+import structlog
+
+logger = structlog.get_logger()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Accept media types that switch an endpoint to a streamed response
+STREAM_FORMATS = {
+    NDJSON_MEDIA_TYPE: "ndjson",
+    "application/jsonl": "ndjson",
+    SSE_MEDIA_TYPE: "sse",
+}
+
+def streaming_format(request: Request) -> Optional[str]:
+    """``"ndjson"`` or ``"sse"`` when the Accept header asks for a stream, else None"""
+    for part in request.headers.get("accept", "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        stream_format = STREAM_FORMATS.get(media_type.lower())
+        if stream_format is None:
+            continue
+        quality = next((p[2:] for p in params if p.startswith("q=")), "1")
+        try:
+            if float(quality) > 0:
+                return stream_format
+        except ValueError:
+            return stream_format
+    return None
+
+def _encode_ndjson(event: str, data: Any) -> bytes:
+    return dumps({"event": event, "data": data}) + b"\n"
+
+def _encode_sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+def stream_response(events: AsyncIterator[Tuple[str, Any]], stream_format: str) -> StreamingResponse:
+    """Send ``(event, data)`` pairs as they are produced, one NDJSON line or SSE event each.
+    
+    The stream ends with an ``end`` event, or an ``error`` event if the producer
+    fails once the status line has already gone out.
+    """
+    encode = _encode_sse if stream_format == "sse" else _encode_ndjson
+    
+    async def body():
+        try:
+            async for event, data in events:
+                yield encode(event, data)
+        except Exception as e:
+            logger.error("Streaming response error", error=str(e))
+            yield encode("error", {"detail": str(e)})
+            return
+        yield encode("end", {})
+    
+    headers = {
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        # GZipMiddleware buffers small writes inside its compressor, which would
+        # hold events back; an explicit encoding makes it pass the stream through
+        "Content-Encoding": "identity",
+    }
+    media_type = SSE_MEDIA_TYPE if stream_format == "sse" else NDJSON_MEDIA_TYPE
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
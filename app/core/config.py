@@ -18,6 +18,72 @@ class Settings(BaseSettings):
     POLYGON_RPC_URL: str = "https://polygon-mainnet.infura.io/v3/YOUR_PROJECT_ID"
     BSC_RPC_URL: str = "https://bsc-dataseed.binance.org/"
     ARBITRUM_RPC_URL: str = "https://arb1.arbitrum.io/rpc"
+    # Optional comma-separated extra endpoints per chain
+    ETHEREUM_RPC_FALLBACK_URLS: str = ""
+    POLYGON_RPC_FALLBACK_URLS: str = ""
+    BSC_RPC_FALLBACK_URLS: str = ""
+    ARBITRUM_RPC_FALLBACK_URLS: str = ""
+    # Optional websocket endpoints for eth_subscribe("newHeads"); heads are polled when unset
+    ETHEREUM_WS_URL: str = ""
+    POLYGON_WS_URL: str = ""
+    BSC_WS_URL: str = ""
+    ARBITRUM_WS_URL: str = ""
+    HEAD_STREAM_MAX_BACKOFF_SECONDS: float = 60.0
+    HEAD_STREAM_WS_RETRY_SECONDS: float = 60.0
+    HEAD_STREAM_QUEUE_SIZE: int = 16
+    RPC_TIMEOUT_SECONDS: float = 10.0
+    RPC_MAX_CONNECTIONS_PER_CHAIN: int = 100
+    RPC_KEEPALIVE_SECONDS: float = 30.0
+    # Largest JSON-RPC batch the providers accept; bigger batches are split
+    RPC_MAX_BATCH_SIZE: int = 100
+    # Endpoint routing: circuit breaker and optional hedged reads
+    RPC_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    RPC_CIRCUIT_COOLDOWN_SECONDS: float = 30.0
+    RPC_HEDGE_ENABLED: bool = False
+    RPC_HEDGE_QUANTILE: float = 0.95
+    RPC_HEDGE_MIN_DELAY_SECONDS: float = 0.05
+    # Calls packed into one Multicall3 aggregate3 eth_call
+    MULTICALL_MAX_CALLS: int = 500
+    # Prepared ERC-20 token handles kept in memory (LRU)
+    TOKEN_HANDLE_CACHE_SIZE: int = 4096
+    # Bytecode analyses memoized by codehash
+    BYTECODE_ANALYSIS_CACHE_SIZE: int = 10000
+    # On-disk store for immutable RPC data (contract bytecode)
+    RPC_CACHE_PATH: Optional[str] = "data/rpc_cache.sqlite3"
+    # Immutable RPC entries also held in memory (LRU); the rest are read back from disk
+    RPC_CACHE_IMMUTABLE_MAX_ENTRIES: int = 10000
+    # Token metadata (decimals, symbol, name, proxy flag), loaded into memory at startup
+    TOKEN_REGISTRY_PATH: Optional[str] = "data/token_registry.sqlite3"
+    # Addresses that fail the ERC-20 probe are not probed again for this long
+    TOKEN_REGISTRY_NEGATIVE_TTL_SECONDS: float = 300.0
+    
+    # Portfolio balance fan-out: wallets per batched call, concurrent calls, time limits
+    PORTFOLIO_WALLETS_PER_CALL: int = 25
+    PORTFOLIO_MAX_CONCURRENCY: int = 16
+    PORTFOLIO_CALL_TIMEOUT_SECONDS: float = 5.0
+    PORTFOLIO_DEADLINE_SECONDS: float = 10.0
+    
+    # Batch endpoint (/api/v1/batch)
+    BATCH_MAX_REQUESTS: int = 50
+    BATCH_MAX_CONCURRENCY: int = 16
+    
+    # Background jobs (multiverse simulations, backtests)
+    JOB_BACKEND: str = "local"  # local (thread pool in the API process) or celery
+    JOB_WORKERS: int = 2
+    JOB_RESULT_STORE: str = "memory"  # memory (per API process) or redis; redis with celery or several API workers
+    JOB_RESULT_TTL_SECONDS: float = 3600.0
+    JOB_EVENTS_POLL_SECONDS: float = 0.5
+    CELERY_BROKER_URL: str = ""  # REDIS_URL when unset
+    
+    # Local transaction history index
+    TX_INDEXER_ENABLED: bool = False
+    TX_INDEXER_CHAINS: str = "ethereum"
+    TX_INDEXER_PATH: str = "data/tx_index.sqlite3"
+    TX_INDEXER_BLOCKS_PER_CHUNK: int = 20
+    TX_INDEXER_MAX_CONCURRENCY: int = 4
+    TX_INDEXER_CONFIRMATIONS: int = 12
+    TX_INDEXER_INITIAL_BLOCKS: int = 1000
+    TX_INDEXER_MAX_BLOCKS_PER_SYNC: int = 2000
     
     # External APIs
     COINGECKO_API_KEY: Optional[str] = None
@@ -28,8 +94,30 @@ class Settings(BaseSettings):
     
     # ML Model Settings
     MODEL_UPDATE_INTERVAL: int = 3600
-    RISK_THRESHOLD_HIGH: float = 0.8
-    RISK_THRESHOLD_MEDIUM: float = 0.5
+    # Declarative risk model (weights, buckets, thresholds); bundled file when unset
+    RISK_MODEL_PATH: Optional[str] = None
+    RISK_MODEL_RELOAD_SECONDS: float = 5.0
+    
+    # Value at Risk
+    VAR_CONFIDENCE_LEVEL: float = 0.95
+    VAR_DEFAULT_PATHS: int = 100000
+    # Monte Carlo cost is paths x assets; only the default path count stays well under a second
+    VAR_MAX_PATHS: int = 1000000
+    VAR_CHUNK_SIZE: int = 32768
+    
+    # Streaming covariance (EWMA over return ticks)
+    COVARIANCE_DECAY: float = 0.94
+    COVARIANCE_MARKET_SYMBOL: str = "ETH"
+    COVARIANCE_MIN_OBSERVATIONS: int = 30
+    COVARIANCE_TICKS_PER_DAY: float = 1.0
+    
+    # Stress testing: cap on scenario x protocol cells scored per chunk
+    STRESS_TEST_MAX_CELLS: int = 1048576
+    
+    # Risk assessment cache
+    RISK_CACHE_MAX_ENTRIES: int = 10000
+    RISK_CACHE_TTL_SECONDS: float = 60.0
+    RISK_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
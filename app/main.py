@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -8,7 +9,11 @@ from app.core.config import settings
 from app.api.routes import router
 from app.api.revolutionary_routes import router as revolutionary_router
 from app.api.saas_routes import router as saas_router
+from app.api.batch_routes import router as batch_router
+from app.api.responses import NumpyJSONResponse
 from app.core.database import init_db
+from app.services.blockchain_service import blockchain_service
+from app.services.job_manager import job_manager
 
 # Configure structured logging
 structlog.configure(
@@ -35,7 +40,8 @@ app = FastAPI(
     description="Advanced DeFi Risk Analysis Platform",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=NumpyJSONResponse
 )
 
 # Add middleware
@@ -56,6 +62,7 @@ app.mount("/metrics", metrics_app)
 app.include_router(router, prefix="/api/v1")
 app.include_router(revolutionary_router, prefix="/api/v1")
 app.include_router(saas_router, prefix="/api/v1")
+app.include_router(batch_router, prefix="/api/v1")
 
 @app.on_event("startup")
 async def startup_event():
@@ -65,10 +72,21 @@ async def startup_event():
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.warning(f"Database initialization failed: {e}. Running without DB.")
+    
+    # Token metadata is served from memory, so balance reads need no metadata RPCs
+    await asyncio.to_thread(blockchain_service.registry.load)
+    
+    if settings.TX_INDEXER_ENABLED:
+        app.state.tx_indexer_task = asyncio.create_task(blockchain_service.run_transaction_indexer())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down DeFi Risk Analyzer")
+    indexer_task = getattr(app.state, "tx_indexer_task", None)
+    if indexer_task:
+        indexer_task.cancel()
+    job_manager.close()
+    await blockchain_service.close()
 
 @app.get("/")
 async def root():
@@ -1,134 +1,693 @@
-from web3 import Web3
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable, Tuple, Union
 import asyncio
-import aiohttp
+import re
+from decimal import Decimal
 from app.core.config import settings
+from app.services.rpc_pool import RpcEndpointPool
+from app.services.rpc_cache import RpcResponseCache, rpc_cache, DEFAULT_BLOCK_TIME
+from app.services.single_flight import SingleFlight
+from app.services.bytecode_analyzer import bytecode_analyzer
+from app.services.tx_indexer import TransactionIndexer, tx_indexer
+from app.services.head_stream import HeadSubscription, NewHeadStream
+from app.services.token_registry import TokenRegistry, token_registry
 import structlog
 
 logger = structlog.get_logger()
 
+ADDRESS_PATTERN = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+# ERC-20 function selectors (first 4 bytes of keccak256 of the signature)
+BALANCE_OF_SELECTOR = "0x70a08231"  # balanceOf(address)
+DECIMALS_SELECTOR = "0x313ce567"  # decimals()
+SYMBOL_SELECTOR = "0x95d89b41"  # symbol()
+NAME_SELECTOR = "0x06fdde03"  # name()
+# Selectors as raw bytes for multicall payloads, built once
+BALANCE_OF_SELECTOR_BYTES = bytes.fromhex(BALANCE_OF_SELECTOR[2:])
+DECIMALS_CALLDATA = bytes.fromhex(DECIMALS_SELECTOR[2:])
+SYMBOL_CALLDATA = bytes.fromhex(SYMBOL_SELECTOR[2:])
+NAME_CALLDATA = bytes.fromhex(NAME_SELECTOR[2:])
+ADDRESS_WORD_PADDING = "0" * 24
+
+WEI_PER_ETHER = Decimal(10) ** 18
+
+# Multicall3 is deployed at the same address on every supported chain
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+AGGREGATE3_SELECTOR = "0x82ad56cb"  # aggregate3((address,bool,bytes)[])
+
+def normalize_address(address: str) -> str:
+    """Validate a hex address and return it lower-cased"""
+    if not isinstance(address, str) or not ADDRESS_PATTERN.match(address):
+        raise ValueError(f"Invalid address: {address!r}")
+    return address.lower()
+
+def encode_address(address: str) -> str:
+    """ABI-encode an address as a 32-byte word (hex, no prefix)"""
+    return ADDRESS_WORD_PADDING + normalize_address(address)[2:]
+
+def decode_uint(data: str) -> int:
+    """Decode a hex quantity or a 32-byte ABI word"""
+    if not data or data == "0x":
+        raise ValueError("Empty RPC result")
+    return int(data, 16)
+
+def decode_abi_string(data: bytes) -> Optional[str]:
+    """Decode an ABI ``string`` return value, or the ``bytes32`` some older tokens return"""
+    try:
+        if len(data) >= 64:
+            offset = int.from_bytes(data[:32], "big")
+            length = int.from_bytes(data[offset:offset + 32], "big")
+            raw = data[offset + 32:offset + 32 + length]
+        elif len(data) == 32:
+            raw = data.rstrip(b"\x00")
+        else:
+            return None
+        return raw.decode("utf-8", errors="replace").strip("\x00").strip() or None
+    except (ValueError, OverflowError):
+        return None
+
+def encode_aggregate3(calls: List[Tuple[str, bytes]]) -> str:
+    """Calldata for Multicall3.aggregate3 with every call allowed to fail"""
+    # eth_abi is only needed for multicall; importing it lazily keeps startup light
+    from eth_abi import encode
+    encoded = encode(["(address,bool,bytes)[]"], [[(target, True, data) for target, data in calls]])
+    return AGGREGATE3_SELECTOR + encoded.hex()
+
+def decode_aggregate3(data: str) -> List[Tuple[bool, bytes]]:
+    """Decode aggregate3 return data into (success, return_data) pairs"""
+    from eth_abi import decode
+    (results,) = decode(["(bool,bytes)[]"], bytes.fromhex(data[2:]))
+    return results
+
+def parse_rpc_urls(primary: str, fallbacks: str = "") -> List[str]:
+    """Primary URL followed by comma-separated fallbacks, without duplicates"""
+    urls = [primary] + [url.strip() for url in fallbacks.split(",")]
+    return list(dict.fromkeys(url for url in urls if url))
+
+class TokenHandle:
+    """Prepared ERC-20 calls for one token: only the wallet word varies per balanceOf"""
+    
+    __slots__ = ("chain", "address", "metadata")
+    
+    def __init__(self, chain: str, address: str):
+        self.chain = chain
+        self.address = address
+        # Registry entry (decimals, symbol, name, is_proxy) once known
+        self.metadata: Optional[Dict[str, Any]] = None
+    
+    @property
+    def decimals(self) -> Optional[int]:
+        return self.metadata["decimals"] if self.metadata else None
+    
+    def balance_of_request(self, wallet_word: str) -> Dict[str, str]:
+        return {"to": self.address, "data": BALANCE_OF_SELECTOR + wallet_word}
+
 class BlockchainService:
-    def __init__(self):
-        self.rpc_urls = {
-            "ethereum": settings.ETHEREUM_RPC_URL,
-            "polygon": settings.POLYGON_RPC_URL,
-            "bsc": settings.BSC_RPC_URL,
-            "arbitrum": settings.ARBITRUM_RPC_URL,
+    def __init__(self, rpc_urls: Optional[Dict[str, Union[str, List[str]]]] = None,
+                 cache: Optional[RpcResponseCache] = None, indexer: Optional[TransactionIndexer] = None,
+                 ws_urls: Optional[Dict[str, str]] = None, registry: Optional[TokenRegistry] = None):
+        configured = rpc_urls or {
+            "ethereum": parse_rpc_urls(settings.ETHEREUM_RPC_URL, settings.ETHEREUM_RPC_FALLBACK_URLS),
+            "polygon": parse_rpc_urls(settings.POLYGON_RPC_URL, settings.POLYGON_RPC_FALLBACK_URLS),
+            "bsc": parse_rpc_urls(settings.BSC_RPC_URL, settings.BSC_RPC_FALLBACK_URLS),
+            "arbitrum": parse_rpc_urls(settings.ARBITRUM_RPC_URL, settings.ARBITRUM_RPC_FALLBACK_URLS),
         }
-        self.web3_instances = {}
-        self._initialize_connections()
+        self.rpc_urls: Dict[str, List[str]] = {
+            chain: [urls] if isinstance(urls, str) else list(urls) for chain, urls in configured.items()
+        }
+        self.ws_urls: Dict[str, str] = ws_urls if ws_urls is not None else {
+            "ethereum": settings.ETHEREUM_WS_URL,
+            "polygon": settings.POLYGON_WS_URL,
+            "bsc": settings.BSC_WS_URL,
+            "arbitrum": settings.ARBITRUM_WS_URL,
+        }
+        self.rpc_clients: Dict[str, RpcEndpointPool] = {}
+        self.head_streams: Dict[str, NewHeadStream] = {}
+        self.cache = cache or rpc_cache
+        self.indexer = indexer or tx_indexer
+        self.registry = registry if registry is not None else token_registry
+        self.single_flight = SingleFlight()
+        # (chain, token address as given) -> TokenHandle, least recently used first
+        self._token_handles: "OrderedDict[Tuple[str, str], TokenHandle]" = OrderedDict()
     
-    def _initialize_connections(self):
-        for chain, rpc_url in self.rpc_urls.items():
-            try:
-                self.web3_instances[chain] = Web3(Web3.HTTPProvider(rpc_url))
-                logger.info(f"Connected to {chain}", rpc_url=rpc_url)
-            except Exception as e:
-                logger.error(f"Failed to connect to {chain}", error=str(e))
+    def _client(self, chain: str) -> RpcEndpointPool:
+        # Pools are built on first use per chain, so importing the service stays cheap
+        client = self.rpc_clients.get(chain)
+        if client is None:
+            urls = self.rpc_urls.get(chain)
+            if not urls:
+                raise ValueError(f"Chain {chain} not supported")
+            client = RpcEndpointPool(
+                chain,
+                urls,
+                timeout=settings.RPC_TIMEOUT_SECONDS,
+                max_connections=settings.RPC_MAX_CONNECTIONS_PER_CHAIN,
+                keepalive_timeout=settings.RPC_KEEPALIVE_SECONDS,
+                max_batch_size=settings.RPC_MAX_BATCH_SIZE,
+                hedge=settings.RPC_HEDGE_ENABLED,
+                hedge_quantile=settings.RPC_HEDGE_QUANTILE,
+                hedge_min_delay=settings.RPC_HEDGE_MIN_DELAY_SECONDS,
+                failure_threshold=settings.RPC_CIRCUIT_FAILURE_THRESHOLD,
+                cooldown_seconds=settings.RPC_CIRCUIT_COOLDOWN_SECONDS
+            )
+            self.rpc_clients[chain] = client
+            logger.info(f"Configured RPC endpoints for {chain}", endpoints=len(urls))
+        return client
+    
+    async def get_block_number(self, chain: str = "ethereum") -> int:
+        """Chain head, looked up at most once per block interval"""
+        client = self._client(chain)
+        
+        async def fetch() -> int:
+            return decode_uint(await client.call("eth_blockNumber"))
+        
+        return await self.cache.get_block_number(chain, fetch)
+    
+    def head_stream(self, chain: str = "ethereum") -> NewHeadStream:
+        """Shared new-block feed for ``chain``; every head also refreshes the cached block number"""
+        stream = self.head_streams.get(chain)
+        if stream is None:
+            client = self._client(chain)
+            
+            async def poll() -> Dict[str, Any]:
+                return await client.call("eth_getBlockByNumber", ["latest", False])
+            
+            stream = NewHeadStream(
+                chain,
+                poll,
+                ws_url=self.ws_urls.get(chain),
+                block_time=self.cache.block_times.get(chain, DEFAULT_BLOCK_TIME),
+                max_backoff=settings.HEAD_STREAM_MAX_BACKOFF_SECONDS,
+                ws_retry_seconds=settings.HEAD_STREAM_WS_RETRY_SECONDS,
+                on_head=self.cache.observe_head
+            )
+            self.head_streams[chain] = stream
+        return stream
+    
+    def subscribe_new_heads(self, chain: str = "ethereum", maxsize: Optional[int] = None) -> HeadSubscription:
+        """Async iterator of new heads; use as ``async with ... as heads: async for head in heads``"""
+        return self.head_stream(chain).subscribe(maxsize or settings.HEAD_STREAM_QUEUE_SIZE)
+    
+    async def watch_new_heads(self, chain: str, active: Callable[[], bool]) -> AsyncIterator[Dict[str, Any]]:
+        """New heads for as long as ``active()`` holds, resubscribing whenever the feed ends"""
+        while active():
+            async with self.subscribe_new_heads(chain) as heads:
+                async for head in heads:
+                    if not active():
+                        return
+                    yield head
+            # The feed was stopped (e.g. by close()); wait a block before starting it again
+            await asyncio.sleep(self.head_stream(chain).block_time)
+    
+    def _token(self, chain: str, token_address: str) -> TokenHandle:
+        """Bounded LRU of prepared token handles, keyed by chain and address"""
+        key = (chain, token_address)
+        handle = self._token_handles.get(key)
+        if handle is not None:
+            self._token_handles.move_to_end(key)
+            return handle
+        
+        handle = TokenHandle(chain, normalize_address(token_address))
+        self._token_handles[key] = handle
+        if len(self._token_handles) > settings.TOKEN_HANDLE_CACHE_SIZE:
+            self._token_handles.popitem(last=False)
+        return handle
+    
+    async def _known_metadata(self, handle: TokenHandle) -> Optional[Dict[str, Any]]:
+        if handle.metadata is None:
+            handle.metadata = await self.registry.get(handle.chain, handle.address)
+        return handle.metadata
+    
+    async def _get_metadata(self, client: RpcEndpointPool, handle: TokenHandle) -> Dict[str, Any]:
+        metadata = await self._known_metadata(handle)
+        if metadata is None:
+            if not self.registry.is_rejected(handle.chain, handle.address):
+                await self._resolve_tokens(client, [handle])
+            metadata = handle.metadata
+            if metadata is None:
+                raise ValueError(f"Token metadata unavailable for {handle.address}")
+        return metadata
+    
+    async def _resolve_tokens(self, client: RpcEndpointPool, handles: List[TokenHandle]):
+        """Fill the registry for tokens it does not know yet.
+        
+        decimals/symbol/name go through one multicall and the bytecode (for the
+        proxy flag) is fetched alongside; tokens whose decimals call fails are
+        left unregistered and held in the registry's negative cache.
+        """
+        calls = []
+        for handle in handles:
+            calls.extend([(handle.address, DECIMALS_CALLDATA), (handle.address, SYMBOL_CALLDATA),
+                          (handle.address, NAME_CALLDATA)])
+        replies, codes = await asyncio.gather(
+            self._multicall(client, calls, "latest"),
+            asyncio.gather(*[self._get_code(client, handle.chain, handle.address) for handle in handles],
+                           return_exceptions=True)
+        )
+        for i, (handle, code) in enumerate(zip(handles, codes)):
+            (decimals_ok, decimals), (symbol_ok, symbol), (name_ok, name) = replies[3 * i:3 * i + 3]
+            if not decimals_ok or len(decimals) < 32:
+                self.registry.reject(handle.chain, handle.address)
+                continue
+            if isinstance(code, Exception):
+                continue
+            handle.metadata = await self.registry.put(
+                handle.chain,
+                handle.address,
+                int.from_bytes(decimals[:32], "big"),
+                symbol=decode_abi_string(symbol) if symbol_ok else None,
+                name=decode_abi_string(name) if name_ok else None,
+                is_proxy=bytecode_analyzer.analyze(code)["is_proxy"] if code else False
+            )
+    
+    async def _get_code(self, client: RpcEndpointPool, chain: str, address: str) -> bytes:
+        code = await self.cache.get_immutable(chain, "code", address)
+        if code is None:
+            code = await client.call("eth_getCode", [address, "latest"])
+            # Empty code is not final: a contract may still be deployed at this address
+            if code and code != "0x":
+                await self.cache.put_immutable(chain, "code", address, code)
+        return bytes.fromhex(code[2:])
     
     async def get_wallet_balance(self, wallet_address: str, chain: str = "ethereum") -> Dict[str, Any]:
         try:
-            w3 = self.web3_instances.get(chain)
-            if not w3:
-                raise ValueError(f"Chain {chain} not supported")
+            key = (chain, normalize_address(wallet_address))
+            # Identical concurrent calls share one in-flight fetch
+            result = await self.single_flight.do("wallet_balance", key, lambda: self._fetch_wallet_balance(wallet_address, chain))
+            return {**result, "address": wallet_address}
+        except Exception as e:
+            logger.error("Error getting wallet balance", error=str(e))
+            raise
+    
+    async def _fetch_wallet_balance(self, wallet_address: str, chain: str) -> Dict[str, Any]:
+        client = self._client(chain)
+        address = normalize_address(wallet_address)
+        block_number = await self.get_block_number(chain)
+        
+        balance_wei = self.cache.get_at_block(chain, block_number, f"balance:{address}")
+        if balance_wei is None:
+            balance_wei = decode_uint(await client.call("eth_getBalance", [address, hex(block_number)]))
+            self.cache.put_at_block(chain, block_number, f"balance:{address}", balance_wei)
+        
+        return {
+            "address": wallet_address,
+            "chain": chain,
+            "balance_wei": balance_wei,
+            "balance_eth": float(Decimal(balance_wei) / WEI_PER_ETHER),
+            "block_number": block_number
+        }
+    
+    async def get_wallet_balances(self, wallet_addresses: List[str], chain: str = "ethereum") -> List[Dict[str, Any]]:
+        """Native balances for many wallets, batched and pinned to one block.
+        
+        Results follow the input order; a wallet that could not be read carries
+        an ``error`` field instead of balances.
+        """
+        try:
+            client = self._client(chain)
+            block_number = await self.get_block_number(chain)
+            block_tag = hex(block_number)
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(wallet_addresses)
+            balances: Dict[int, int] = {}
+            calls = []
+            positions = []
+            for i, wallet_address in enumerate(wallet_addresses):
+                try:
+                    address = normalize_address(wallet_address)
+                except ValueError as e:
+                    results[i] = {"address": wallet_address, "chain": chain, "error": str(e)}
+                    continue
+                cached = self.cache.get_at_block(chain, block_number, f"balance:{address}")
+                if cached is not None:
+                    balances[i] = cached
+                else:
+                    calls.append(("eth_getBalance", [address, block_tag]))
+                    positions.append(i)
             
-            balance_wei = w3.eth.get_balance(wallet_address)
-            balance_eth = w3.from_wei(balance_wei, 'ether')
+            replies = await client.batch(calls) if calls else []
+            errors: Dict[int, str] = {}
+            for i, (_, params), reply in zip(positions, calls, replies):
+                try:
+                    if isinstance(reply, Exception):
+                        raise reply
+                    balances[i] = decode_uint(reply)
+                    self.cache.put_at_block(chain, block_number, f"balance:{params[0]}", balances[i])
+                except Exception as e:
+                    errors[i] = str(e)
             
-            return {
-                "address": wallet_address,
-                "chain": chain,
-                "balance_wei": balance_wei,
-                "balance_eth": float(balance_eth),
-                "block_number": w3.eth.block_number
-            }
+            for i, wallet_address in enumerate(wallet_addresses):
+                if results[i] is not None:
+                    continue
+                entry = {"address": wallet_address, "chain": chain, "block_number": block_number}
+                if i in balances:
+                    entry["balance_wei"] = balances[i]
+                    entry["balance_eth"] = float(Decimal(balances[i]) / WEI_PER_ETHER)
+                else:
+                    entry["error"] = errors[i]
+                results[i] = entry
+            
+            return results
         except Exception as e:
-            logger.error("Error getting wallet balance", error=str(e))
+            logger.error("Error getting wallet balances", chain=chain, error=str(e))
             raise
     
+    async def get_portfolio_balances(self, wallet_addresses: List[str], chains: List[str],
+                                     max_concurrency: Optional[int] = None, call_timeout: Optional[float] = None,
+                                     deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Native balances for every wallet on every chain, fetched concurrently.
+        
+        Entries follow the chain-major input order; each carries a ``status``
+        (ok, error, timeout, deadline_exceeded) and ``partial`` is set when any
+        wallet is missing its balance. See ``iter_portfolio_balances``.
+        """
+        batches = {}
+        async for index, entries in self.iter_portfolio_balances(
+            wallet_addresses, chains, max_concurrency, call_timeout, deadline
+        ):
+            batches[index] = entries
+        balances = [entry for index in sorted(batches) for entry in batches[index]]
+        return {
+            "balances": balances,
+            "partial": any(entry["status"] != "ok" for entry in balances)
+        }
+    
+    async def iter_portfolio_balances(self, wallet_addresses: List[str], chains: List[str],
+                                      max_concurrency: Optional[int] = None, call_timeout: Optional[float] = None,
+                                      deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Yield ``(batch_index, entries)`` as each batched balance call finishes.
+        
+        Wallets are split into calls of PORTFOLIO_WALLETS_PER_CALL per chain; at
+        most ``max_concurrency`` calls run at once, each is bounded by
+        ``call_timeout`` and the whole fan-out by ``deadline``. Calls still
+        running at the deadline are cancelled and their wallets reported as
+        ``deadline_exceeded``.
+        """
+        max_concurrency = max_concurrency or settings.PORTFOLIO_MAX_CONCURRENCY
+        call_timeout = call_timeout or settings.PORTFOLIO_CALL_TIMEOUT_SECONDS
+        deadline = deadline or settings.PORTFOLIO_DEADLINE_SECONDS
+        size = settings.PORTFOLIO_WALLETS_PER_CALL
+        jobs = [
+            (chain, wallet_addresses[i:i + size])
+            for chain in chains
+            for i in range(0, len(wallet_addresses), size)
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(chain: str, wallets: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                # The timeout covers the call itself, not the wait for a free slot
+                entries = await asyncio.wait_for(self.get_wallet_balances(wallets, chain), call_timeout)
+            return [{**entry, "status": "error" if "error" in entry else "ok"} for entry in entries]
+        
+        def failed(index: int, status: str, error: str) -> List[Dict[str, Any]]:
+            chain, wallets = jobs[index]
+            return [{"address": wallet, "chain": chain, "status": status, "error": error} for wallet in wallets]
+        
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+        tasks = {asyncio.ensure_future(run(chain, wallets)): index for index, (chain, wallets) in enumerate(jobs)}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(expires - loop.time(), 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.cancelled():
+                        # Cancelled from below us, e.g. by a shared lookup it had joined
+                        yield tasks[task], failed(tasks[task], "error", "Balance call was cancelled")
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        yield tasks[task], task.result()
+                    elif isinstance(error, asyncio.TimeoutError):
+                        yield tasks[task], failed(tasks[task], "timeout", f"RPC call timed out after {call_timeout}s")
+                    else:
+                        yield tasks[task], failed(tasks[task], "error", str(error) or type(error).__name__)
+            for task in pending:
+                task.cancel()
+                yield tasks[task], failed(tasks[task], "deadline_exceeded", f"Portfolio deadline of {deadline}s exceeded")
+        finally:
+            # Also reached when the consumer stops early, e.g. a client disconnecting mid-stream
+            for task in pending:
+                task.cancel()
+    
     async def get_token_balance(self, wallet_address: str, token_address: str, chain: str = "ethereum") -> Dict[str, Any]:
         try:
-            w3 = self.web3_instances.get(chain)
-            if not w3:
-                raise ValueError(f"Chain {chain} not supported")
+            key = (chain, normalize_address(wallet_address), normalize_address(token_address))
+            # Identical concurrent calls share one in-flight fetch
+            result = await self.single_flight.do(
+                "token_balance", key, lambda: self._fetch_token_balance(wallet_address, token_address, chain)
+            )
+            return {**result, "address": wallet_address, "token_address": token_address}
+        except Exception as e:
+            logger.error("Error getting token balance", error=str(e))
+            raise
+    
+    async def _fetch_token_balance(self, wallet_address: str, token_address: str, chain: str) -> Dict[str, Any]:
+        client = self._client(chain)
+        token = self._token(chain, token_address)
+        wallet_word = encode_address(wallet_address)
+        block_number = await self.get_block_number(chain)
+        cache_key = f"token:{token.address}:{wallet_word}"
+        
+        async def fetch_balance() -> int:
+            balance = self.cache.get_at_block(chain, block_number, cache_key)
+            if balance is None:
+                request = token.balance_of_request(wallet_word)
+                balance = decode_uint(await client.call("eth_call", [request, hex(block_number)]))
+                self.cache.put_at_block(chain, block_number, cache_key, balance)
+            return balance
+        
+        balance, metadata = await asyncio.gather(
+            fetch_balance(),
+            self._get_metadata(client, token)
+        )
+        decimals = metadata["decimals"]
+        
+        return {
+            "address": wallet_address,
+            "token_address": token_address,
+            "chain": chain,
+            "balance_raw": balance,
+            "balance": balance / (10 ** decimals),
+            "decimals": decimals,
+            "symbol": metadata["symbol"]
+        }
+    
+    async def get_token_balances(self, wallet_addresses: List[str], token_addresses: List[str],
+                                 chain: str = "ethereum") -> List[Dict[str, Any]]:
+        """ERC-20 balances for every wallet x token pair through Multicall3.
+        
+        Token metadata comes from the registry (fetched only for tokens it has
+        never seen) and all ``balanceOf`` calls are packed into ``aggregate3``
+        eth_calls of at most MULTICALL_MAX_CALLS, pinned to one block. Results
+        are wallet-major; failed reads carry an ``error`` field.
+        """
+        try:
+            client = self._client(chain)
+            block_number = await self.get_block_number(chain)
+            block_tag = hex(block_number)
+            
+            handles = [self._token(chain, token) for token in token_addresses]
+            tokens = [handle.address for handle in handles]
+            # Only tokens never seen before (and not recently rejected) need metadata calls
+            unknown_tokens = list({
+                handle.address: handle for handle in handles
+                if await self._known_metadata(handle) is None
+                and not self.registry.is_rejected(handle.chain, handle.address)
+            }.values())
+            calls = []
+            
+            results: List[Optional[Dict[str, Any]]] = []
+            slots = []
+            for wallet_address in wallet_addresses:
+                try:
+                    wallet_word = encode_address(wallet_address)
+                except ValueError as e:
+                    for token_address in token_addresses:
+                        results.append({"address": wallet_address, "token_address": token_address,
+                                        "chain": chain, "error": str(e)})
+                    continue
+                balance_calldata = BALANCE_OF_SELECTOR_BYTES + bytes.fromhex(wallet_word)
+                for token_address, token in zip(token_addresses, tokens):
+                    cache_key = f"token:{token}:{wallet_word}"
+                    cached = self.cache.get_at_block(chain, block_number, cache_key)
+                    if cached is None:
+                        slots.append((len(results), len(calls), cache_key))
+                        calls.append((token, balance_calldata))
+                    results.append({"address": wallet_address, "token_address": token_address,
+                                    "chain": chain, "block_number": block_number, "balance_raw": cached})
             
-            # ERC-20 ABI for balanceOf function
-            erc20_abi = [
-                {
-                    "constant": True,
-                    "inputs": [{"name": "_owner", "type": "address"}],
-                    "name": "balanceOf",
-                    "outputs": [{"name": "balance", "type": "uint256"}],
-                    "type": "function"
-                },
-                {
-                    "constant": True,
-                    "inputs": [],
-                    "name": "decimals",
-                    "outputs": [{"name": "", "type": "uint8"}],
-                    "type": "function"
-                }
-            ]
+            replies, _ = await asyncio.gather(
+                self._multicall(client, calls, block_tag),
+                self._resolve_tokens(client, unknown_tokens)
+            )
             
-            contract = w3.eth.contract(address=token_address, abi=erc20_abi)
-            balance = contract.functions.balanceOf(wallet_address).call()
-            decimals = contract.functions.decimals().call()
+            for result_index, call_index, cache_key in slots:
+                success, data = replies[call_index]
+                if success and len(data) >= 32:
+                    results[result_index]["balance_raw"] = int.from_bytes(data[:32], "big")
+                    self.cache.put_at_block(chain, block_number, cache_key, results[result_index]["balance_raw"])
             
-            return {
-                "address": wallet_address,
-                "token_address": token_address,
-                "chain": chain,
-                "balance_raw": balance,
-                "balance": balance / (10 ** decimals),
-                "decimals": decimals
-            }
+            for entry, handle in zip(results, handles * len(wallet_addresses)):
+                if "error" in entry:
+                    continue
+                balance = entry.pop("balance_raw")
+                if balance is None:
+                    entry["error"] = "balanceOf call failed"
+                elif handle.decimals is None:
+                    entry["error"] = "decimals call failed"
+                else:
+                    entry["balance_raw"] = balance
+                    entry["balance"] = balance / (10 ** handle.decimals)
+                    entry["decimals"] = handle.decimals
+                    entry["symbol"] = handle.metadata["symbol"]
+            
+            return results
         except Exception as e:
-            logger.error("Error getting token balance", error=str(e))
+            logger.error("Error getting token balances", chain=chain, error=str(e))
             raise
     
+    async def _multicall(self, client: RpcEndpointPool, calls: List[Tuple[str, bytes]],
+                         block_tag: str) -> List[Tuple[bool, bytes]]:
+        """Run calls through aggregate3 in chunks; a failed chunk fails only its own calls"""
+        size = settings.MULTICALL_MAX_CALLS
+        chunks = [calls[i:i + size] for i in range(0, len(calls), size)]
+        # Sent as concurrent requests rather than one JSON-RPC batch: each aggregate3
+        # payload is already large and providers cap request body size
+        replies = await asyncio.gather(*[
+            client.call("eth_call", [{"to": MULTICALL3_ADDRESS, "data": encode_aggregate3(chunk)}, block_tag], hedge=False)
+            for chunk in chunks
+        ], return_exceptions=True)
+        
+        results: List[Tuple[bool, bytes]] = []
+        for chunk, reply in zip(chunks, replies):
+            try:
+                if isinstance(reply, Exception):
+                    raise reply
+                decoded = decode_aggregate3(reply)
+                if len(decoded) != len(chunk):
+                    raise ValueError("aggregate3 result count mismatch")
+                results.extend(decoded)
+            except Exception as e:
+                logger.warning("Multicall chunk failed", calls=len(chunk), error=str(e))
+                results.extend([(False, b"")] * len(chunk))
+        return results
+    
     async def get_transaction_history(self, wallet_address: str, chain: str = "ethereum", limit: int = 100) -> List[Dict[str, Any]]:
         try:
-            # This would typically use an indexing service like Etherscan API
-            # For now, we'll return a placeholder structure
-            return []
+            if chain not in self.rpc_urls:
+                raise ValueError(f"Chain {chain} not supported")
+            # Served from the local index; see sync_transaction_index
+            return await self.indexer.get_history(chain, normalize_address(wallet_address), limit)
         except Exception as e:
             logger.error("Error getting transaction history", error=str(e))
             raise
     
+    async def sync_transaction_index(self, chain: str = "ethereum") -> int:
+        """Index confirmed blocks since the last checkpoint; returns blocks indexed"""
+        try:
+            client = self._client(chain)
+            head = await self.get_block_number(chain)
+            return await self.indexer.sync(
+                chain, client, head,
+                confirmations=settings.TX_INDEXER_CONFIRMATIONS,
+                initial_blocks=settings.TX_INDEXER_INITIAL_BLOCKS,
+                max_blocks=settings.TX_INDEXER_MAX_BLOCKS_PER_SYNC
+            )
+        except Exception as e:
+            logger.error("Error syncing transaction index", chain=chain, error=str(e))
+            raise
+    
+    async def backfill_transaction_index(self, start_block: int, end_block: int, chain: str = "ethereum") -> int:
+        """Index a historical block range with bounded concurrency"""
+        try:
+            return await self.indexer.backfill(chain, self._client(chain), start_block, end_block)
+        except Exception as e:
+            logger.error("Error backfilling transaction index", chain=chain, error=str(e))
+            raise
+    
+    async def run_transaction_indexer(self, chains: Optional[List[str]] = None):
+        """Keep the transaction index caught up, syncing on every new head until cancelled"""
+        chains = chains or [c.strip() for c in settings.TX_INDEXER_CHAINS.split(",") if c.strip()]
+        await asyncio.gather(*(self._index_on_new_heads(chain) for chain in chains))
+    
+    async def _index_on_new_heads(self, chain: str):
+        # A queue of one: heads that arrive during a sync collapse into a single follow-up sync
+        async with self.subscribe_new_heads(chain, maxsize=1) as heads:
+            async for head in heads:
+                try:
+                    await self.sync_transaction_index(chain)
+                except Exception as e:
+                    # Retried on the next head
+                    logger.error("Transaction index sync failed on new head", chain=chain,
+                                 block_number=head["number"], error=str(e))
+    
     async def analyze_smart_contract_risk(self, contract_address: str, chain: str = "ethereum") -> Dict[str, Any]:
         try:
-            w3 = self.web3_instances.get(chain)
-            if not w3:
-                raise ValueError(f"Chain {chain} not supported")
-            
-            # Basic contract analysis
-            code = w3.eth.get_code(contract_address)
-            
-            risk_factors = {
-                "has_code": len(code) > 0,
-                "code_size": len(code),
-                "is_verified": False,  # Would check with Etherscan API
-                "proxy_pattern": False,  # Would analyze bytecode patterns
-                "upgrade_pattern": False,  # Would check for upgrade mechanisms
-            }
-            
-            # Calculate basic risk score
-            risk_score = 0.0
-            if not risk_factors["has_code"]:
-                risk_score += 0.5
-            if risk_factors["code_size"] < 1000:
-                risk_score += 0.2
-            if not risk_factors["is_verified"]:
-                risk_score += 0.3
-            
-            return {
-                "contract_address": contract_address,
-                "chain": chain,
-                "risk_score": min(risk_score, 1.0),
-                "risk_factors": risk_factors
-            }
+            key = (chain, normalize_address(contract_address))
+            # Identical concurrent calls share one in-flight fetch
+            result = await self.single_flight.do(
+                "contract_risk", key, lambda: self._analyze_smart_contract(contract_address, chain)
+            )
+            return {**result, "contract_address": contract_address}
         except Exception as e:
             logger.error("Error analyzing smart contract", error=str(e))
             raise
+    
+    async def _analyze_smart_contract(self, contract_address: str, chain: str) -> Dict[str, Any]:
+        client = self._client(chain)
+        
+        # Basic contract analysis
+        code = await self._get_code(client, chain, normalize_address(contract_address))
+        analysis = bytecode_analyzer.analyze(code)
+        
+        risk_factors = {
+            "has_code": len(code) > 0,
+            "code_size": len(code),
+            "is_verified": False,  # Would check with Etherscan API
+            "proxy_pattern": analysis["is_proxy"],
+            "upgrade_pattern": analysis["upgradeable"],
+            "has_delegatecall": analysis["has_delegatecall"],
+            "has_selfdestruct": analysis["has_selfdestruct"],
+            "has_owner": analysis["has_owner"],
+        }
+        
+        # Calculate basic risk score
+        risk_score = 0.0
+        if not risk_factors["has_code"]:
+            risk_score += 0.5
+        # A minimal proxy is tiny by design; its logic lives in the implementation
+        if risk_factors["code_size"] < 1000 and not analysis["is_minimal_proxy"]:
+            risk_score += 0.2
+        if not risk_factors["is_verified"]:
+            risk_score += 0.3
+        if risk_factors["has_selfdestruct"]:
+            risk_score += 0.2
+        if risk_factors["upgrade_pattern"]:
+            risk_score += 0.15
+        elif risk_factors["has_delegatecall"] and not risk_factors["proxy_pattern"]:
+            risk_score += 0.1
+        
+        return {
+            "contract_address": contract_address,
+            "chain": chain,
+            "risk_score": min(risk_score, 1.0),
+            "risk_factors": risk_factors,
+            "bytecode_analysis": analysis
+        }
+    
+    async def close(self):
+        """Close pooled HTTP sessions for every chain endpoint"""
+        self.registry.close()
+        for stream in self.head_streams.values():
+            await stream.close()
+        for client in self.rpc_clients.values():
+            await client.close()
+        self.cache.close()
+        self.indexer.close()
 
 blockchain_service = BlockchainService()
\ No newline at end of file
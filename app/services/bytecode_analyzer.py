@@ -0,0 +1,155 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+DELEGATECALL = 0xf4
+SELFDESTRUCT = 0xff
+CALLCODE = 0xf2
+PUSH4 = 0x63
+PUSH32 = 0x7f
+
+# Storage slots pushed as PUSH32 constants by standard proxy implementations
+PROXY_SLOTS = {
+    bytes.fromhex("360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc"): "eip1967_implementation",
+    bytes.fromhex("b53127684a568b3173ae13b9f8a6016e243e63b6e8ee1178d6a717850b5d6103"): "eip1967_admin",
+    bytes.fromhex("a3f0ad74e5423aebfd80d3ef4346578335a9a72aeaee59ff6cb3582b35133d50"): "eip1967_beacon",
+    bytes.fromhex("c5f16f0fcc639fa48a6947836d9850f504798523bf8c9a3a87d5876cf622bcf7"): "eip1822_proxiable",
+    bytes.fromhex("7050c9e0f4ca769c69bd3a8ef740bc37934f8e2c036e5a723fd8ee048ed3f8c3"): "zeppelinos_implementation",
+}
+
+# Dispatcher selectors (PUSH4) of privileged functions
+PRIVILEGED_SELECTORS = {
+    bytes.fromhex("8da5cb5b"): "owner()",
+    bytes.fromhex("f2fde38b"): "transferOwnership(address)",
+    bytes.fromhex("715018a6"): "renounceOwnership()",
+    bytes.fromhex("13af4035"): "setOwner(address)",
+    bytes.fromhex("f851a440"): "admin()",
+    bytes.fromhex("8f283970"): "changeAdmin(address)",
+    bytes.fromhex("3659cfe6"): "upgradeTo(address)",
+    bytes.fromhex("4f1ef286"): "upgradeToAndCall(address,bytes)",
+    bytes.fromhex("52d1902d"): "proxiableUUID()",
+    bytes.fromhex("8456cb59"): "pause()",
+    bytes.fromhex("3f4ba83a"): "unpause()",
+    bytes.fromhex("40c10f19"): "mint(address,uint256)",
+}
+UPGRADE_SELECTORS = {"upgradeTo(address)", "upgradeToAndCall(address,bytes)", "proxiableUUID()", "changeAdmin(address)"}
+OWNERSHIP_SELECTORS = {"owner()", "transferOwnership(address)", "renounceOwnership()", "setOwner(address)", "admin()"}
+
+# EIP-1167 minimal proxy runtime: prefix, 20-byte implementation address, suffix
+MINIMAL_PROXY_PREFIX = bytes.fromhex("363d3d373d3d3d363d73")
+MINIMAL_PROXY_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
+def _build_scanner() -> "re.Pattern[bytes]":
+    """One regex that walks the opcode stream and stops only at opcodes of interest.
+    
+    Each alternative consumes exactly one instruction (PUSHn together with its
+    n data bytes), so data bytes are never mistaken for opcodes. Possessive
+    quantifiers keep the engine from backtracking into PUSH data.
+    """
+    def literal(opcode: int) -> bytes:
+        return re.escape(bytes([opcode]))
+    
+    interesting = {DELEGATECALL, SELFDESTRUCT, CALLCODE}
+    plain = b"".join(
+        literal(op) for op in range(256)
+        if not (0x60 <= op <= 0x7f) and op not in interesting
+    )
+    # PUSH1/PUSH2 dominate real bytecode, so they share the tight inner loop with
+    # single-byte opcodes; the rarer PUSHn widths are tried only when that loop stops
+    common = b"(?:[" + plain + b"]|" + literal(0x60) + b".|" + literal(0x61) + b"..)*+"
+    rare_push = b"|".join(
+        literal(0x5f + n) + b".{%d}" % n for n in range(3, 33)
+        if 0x5f + n not in (PUSH4, PUSH32)
+    )
+    skip = common + b"(?:(?:" + rare_push + b")" + common + b")*+"
+    hits = b"|".join([literal(op) for op in sorted(interesting)] + [
+        literal(PUSH4) + b".{4}",
+        literal(PUSH32) + b".{32}",
+    ])
+    # Matching end-of-input as well means a scan never fails and restarts misaligned
+    return re.compile(skip + b"(" + hits + b"|\\Z)", re.DOTALL)
+
+_SCANNER = _build_scanner()
+
+class BytecodeAnalyzer:
+    """Single-pass EVM bytecode scanner with results memoized by keccak codehash"""
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+    
+    def analyze(self, code: bytes) -> Dict[str, Any]:
+        """Analysis of runtime ``code``; identical bytecode is only scanned once.
+        
+        Callers get a shallow copy so the memoized entry cannot be mutated.
+        """
+        from eth_hash.auto import keccak
+        codehash = keccak(code)
+        cached = self._results.get(codehash)
+        if cached is not None:
+            self._results.move_to_end(codehash)
+            return dict(cached)
+        
+        result = self._scan(code)
+        result["codehash"] = "0x" + codehash.hex()
+        self._results[codehash] = result
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return dict(result)
+    
+    @staticmethod
+    def _scan(code: bytes) -> Dict[str, Any]:
+        opcodes = set()
+        proxy_slots = set()
+        privileged = set()
+        
+        minimal_proxy_target = BytecodeAnalyzer._minimal_proxy_target(code)
+        # Zero padding (STOP) lets a PUSH truncated at the end of the code still match
+        for match in _SCANNER.finditer(code + bytes(33)):
+            hit = match.group(1)
+            if not hit:
+                break
+            opcode = hit[0]
+            if opcode == PUSH32:
+                slot = PROXY_SLOTS.get(hit[1:])
+                if slot:
+                    proxy_slots.add(slot)
+            elif opcode == PUSH4:
+                name = PRIVILEGED_SELECTORS.get(hit[1:])
+                if name:
+                    privileged.add(name)
+            else:
+                opcodes.add(opcode)
+        
+        has_delegatecall = DELEGATECALL in opcodes
+        is_proxy = minimal_proxy_target is not None or bool(proxy_slots) or (
+            has_delegatecall and bool(privileged & UPGRADE_SELECTORS)
+        )
+        return {
+            "code_size": len(code),
+            "has_delegatecall": has_delegatecall,
+            "has_selfdestruct": SELFDESTRUCT in opcodes,
+            "has_callcode": CALLCODE in opcodes,
+            "is_proxy": is_proxy,
+            "is_minimal_proxy": minimal_proxy_target is not None,
+            "minimal_proxy_implementation": minimal_proxy_target,
+            "proxy_slots": sorted(proxy_slots),
+            "upgradeable": bool(proxy_slots) or bool(privileged & UPGRADE_SELECTORS),
+            "has_owner": bool(privileged & OWNERSHIP_SELECTORS),
+            "privileged_functions": sorted(privileged),
+        }
+    
+    @staticmethod
+    def _minimal_proxy_target(code: bytes) -> Optional[str]:
+        if len(code) == 45 and code.startswith(MINIMAL_PROXY_PREFIX) and code.endswith(MINIMAL_PROXY_SUFFIX):
+            return "0x" + code[10:30].hex()
+        return None
+    
+    def clear(self):
+        self._results.clear()
+
+bytecode_analyzer = BytecodeAnalyzer(settings.BYTECODE_ANALYSIS_CACHE_SIZE)
@@ -0,0 +1,167 @@
+import numpy as np
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from datetime import datetime
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+class CovarianceSnapshot:
+    """Immutable view of the covariance state at one tick.
+    
+    ``matrix`` and ``counts`` are read-only and are never mutated after
+    publication, so readers can hold them without copying while updates
+    continue. ``observations`` counts ticks; ``counts`` counts the ticks in
+    which each asset had a return.
+    """
+    
+    def __init__(self, symbols: Tuple[str, ...], index: Dict[str, int], matrix: np.ndarray,
+                 counts: np.ndarray, observations: int, ticks_per_day: float):
+        self.symbols = symbols
+        self.index = index
+        self.matrix = matrix
+        self.counts = counts
+        self.observations = observations
+        self.ticks_per_day = ticks_per_day
+        self.timestamp = datetime.utcnow()
+    
+    def covers(self, symbols: Sequence[str]) -> bool:
+        return all(s in self.index for s in symbols)
+    
+    def observations_for(self, symbols: Sequence[str]) -> int:
+        """Fewest ticks observed for any of ``symbols`` (0 if one is not tracked)"""
+        if not self.covers(symbols):
+            return 0
+        return int(min((self.counts[self.index[s]] for s in symbols), default=self.observations))
+    
+    def daily_covariance(self, symbols: Sequence[str]) -> np.ndarray:
+        """Daily covariance sub-matrix for ``symbols`` (in that order)"""
+        idx = [self.index[s] for s in symbols]
+        return self.matrix[np.ix_(idx, idx)] * self.ticks_per_day
+    
+    def portfolio_moments(self, symbols: Sequence[str], values: Sequence[float],
+                          market_symbol: Optional[str] = None) -> Dict[str, float]:
+        """Daily portfolio variance, and its correlation with ``market_symbol`` if tracked"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != len(symbols):
+            raise ValueError(f"Expected {len(symbols)} values, got {len(values)}")
+        total = values.sum()
+        if not len(values) or total == 0:
+            raise ValueError("Portfolio values must not be empty or sum to zero")
+        weights = np.zeros(len(self.symbols))
+        np.add.at(weights, [self.index[s] for s in symbols], values / total)
+        # One O(N^2) mat-vec over the shared matrix; no sub-matrix is sliced out
+        sigma_w = self.matrix @ weights
+        variance = float(weights @ sigma_w) * self.ticks_per_day
+        moments = {"variance": variance, "correlation_with_market": None}
+        
+        if market_symbol in self.index:
+            m = self.index[market_symbol]
+            market_variance = self.matrix[m, m] * self.ticks_per_day
+            if variance > 0 and market_variance > 0:
+                covariance = float(sigma_w[m]) * self.ticks_per_day
+                moments["correlation_with_market"] = float(covariance / np.sqrt(variance * market_variance))
+        return moments
+
+class EWMACovarianceEngine:
+    """Exponentially weighted (RiskMetrics-style) covariance over a stream of asset returns"""
+    
+    def __init__(self, decay: float = 0.94, market_symbol: str = "ETH",
+                 min_observations: int = 30, ticks_per_day: float = 1.0):
+        if not 0.0 < decay < 1.0:
+            raise ValueError("decay must be in (0, 1)")
+        self.decay = decay
+        self.market_symbol = market_symbol
+        self.min_observations = min_observations
+        self.ticks_per_day = ticks_per_day
+        self._symbols: Tuple[str, ...] = ()
+        self._index: Dict[str, int] = {}
+        self._snapshot = self._publish(np.zeros((0, 0)), np.zeros(0, dtype=np.int64), 0)
+    
+    def register_assets(self, symbols: Sequence[str]):
+        """Add assets to the tracked universe; new rows start at zero covariance and zero observations"""
+        new_symbols = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new_symbols:
+            return
+        
+        old = self._snapshot.matrix
+        size = len(self._symbols) + len(new_symbols)
+        grown = np.zeros((size, size))
+        grown[:old.shape[0], :old.shape[1]] = old
+        counts = np.zeros(size, dtype=np.int64)
+        counts[:old.shape[0]] = self._snapshot.counts
+        # Fresh containers: snapshots already handed out keep their own universe
+        self._index = {**self._index, **{s: len(self._symbols) + i for i, s in enumerate(new_symbols)}}
+        self._symbols = self._symbols + tuple(new_symbols)
+        self._snapshot = self._publish(grown, counts, self._snapshot.observations)
+        logger.info("Covariance universe extended", added=len(new_symbols), total=size)
+    
+    def update(self, returns: Any) -> CovarianceSnapshot:
+        """Fold one tick of returns into the estimate in O(N^2).
+        
+        ``returns`` is either a vector ordered like ``symbols`` or a mapping
+        symbol -> return; unknown symbols are registered. Assets missing from
+        a mapping were not observed: only the rows and columns of the assets
+        present are decayed and updated, so pairs are estimated over the
+        ticks in which both were seen.
+        
+        Each tick writes the new estimate into a fresh N x N buffer (8 N^2
+        bytes, e.g. 8 MB for 1,000 assets) instead of updating in place: that
+        copy is the same order as the update itself and is what keeps the
+        published snapshots immutable for lock-free readers.
+        """
+        counts = self._snapshot.counts
+        if isinstance(returns, dict):
+            self.register_assets(list(returns))
+            counts = self._snapshot.counts
+            observed = np.fromiter((self._index[s] for s in returns), dtype=np.intp, count=len(returns))
+            vector = np.fromiter(returns.values(), dtype=np.float64, count=len(returns))
+            if len(observed) < len(self._symbols):
+                # Sigma[O, O] = lambda * Sigma[O, O] + (1 - lambda) * r_O r_O^T; other entries unchanged
+                block = np.ix_(observed, observed)
+                scaled = vector * np.sqrt(1.0 - self.decay)
+                matrix = np.array(self._snapshot.matrix)
+                matrix[block] = matrix[block] * self.decay + np.outer(scaled, scaled)
+                counts = counts.copy()
+                counts[observed] += 1
+                self._snapshot = self._publish(matrix, counts, self._snapshot.observations + 1)
+                return self._snapshot
+            ordered = np.empty(len(self._symbols))
+            ordered[observed] = vector
+            vector = ordered
+        else:
+            vector = np.asarray(returns, dtype=np.float64)
+            if vector.shape != (len(self._symbols),):
+                raise ValueError(f"Expected {len(self._symbols)} returns, got shape {vector.shape}")
+        
+        # Sigma_t = lambda * Sigma_{t-1} + (1 - lambda) * r r^T, written into a fresh buffer
+        # so published snapshots are never modified in place
+        scaled = vector * np.sqrt(1.0 - self.decay)
+        matrix = np.multiply(self._snapshot.matrix, self.decay)
+        matrix += np.outer(scaled, scaled)
+        self._snapshot = self._publish(matrix, counts + 1, self._snapshot.observations + 1)
+        return self._snapshot
+    
+    def snapshot(self) -> CovarianceSnapshot:
+        """Current state; a reference, not a copy"""
+        return self._snapshot
+    
+    @property
+    def symbols(self) -> Tuple[str, ...]:
+        return self._snapshot.symbols
+    
+    def is_ready_for(self, symbols: Sequence[str]) -> bool:
+        """True once every one of ``symbols`` has ``min_observations`` ticks of its own"""
+        return self._snapshot.observations_for(symbols) >= self.min_observations
+    
+    def _publish(self, matrix: np.ndarray, counts: np.ndarray, observations: int) -> CovarianceSnapshot:
+        matrix.flags.writeable = False
+        counts.flags.writeable = False
+        return CovarianceSnapshot(self._symbols, self._index, matrix, counts, observations, self.ticks_per_day)
+
+covariance_engine = EWMACovarianceEngine(
+    decay=settings.COVARIANCE_DECAY,
+    market_symbol=settings.COVARIANCE_MARKET_SYMBOL,
+    min_observations=settings.COVARIANCE_MIN_OBSERVATIONS,
+    ticks_per_day=settings.COVARIANCE_TICKS_PER_DAY
+)
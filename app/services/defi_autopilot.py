@@ -2,7 +2,7 @@ import asyncio
 import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from web3 import Web3
+from app.services.blockchain_service import blockchain_service
 import structlog
 
 logger = structlog.get_logger()
@@ -51,8 +51,9 @@ class DeFiAutopilot:
             raise
     
     async def _continuous_monitoring(self, user_id: str, portfolio_data: Dict[str, Any]):
-        """24/7 continuous portfolio monitoring"""
-        while self.autopilot_active:
+        """24/7 continuous portfolio monitoring, driven by new blocks"""
+        chain = portfolio_data.get('chain', 'ethereum')
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: self.autopilot_active):
             try:
                 # Monitor all positions
                 for position in portfolio_data.get('positions', []):
@@ -66,11 +67,8 @@ class DeFiAutopilot:
                     await self._activate_defensive_mode(user_id)
                 elif market_conditions['opportunity_score'] > 0.9:
                     await self._activate_aggressive_mode(user_id)
-                
-                await asyncio.sleep(1)  # Check every second
             except Exception as e:
                 logger.error("Monitoring error", error=str(e))
-                await asyncio.sleep(5)
     
     async def _auto_rebalancing(self, user_id: str, portfolio_data: Dict[str, Any]):
         """Intelligent auto-rebalancing"""
@@ -99,8 +97,9 @@ class DeFiAutopilot:
                 await asyncio.sleep(60)
     
     async def _risk_management(self, user_id: str, portfolio_data: Dict[str, Any]):
-        """Advanced risk management system"""
-        while self.autopilot_active:
+        """Advanced risk management system, driven by new blocks"""
+        chain = portfolio_data.get('chain', 'ethereum')
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: self.autopilot_active):
             try:
                 for position in portfolio_data.get('positions', []):
                     current_price = await self._get_current_price(position['symbol'])
@@ -123,11 +122,8 @@ class DeFiAutopilot:
                     position_risk = await self._calculate_position_risk(position)
                     if position_risk > self.risk_tolerance * 1.5:
                         await self._reduce_position_size(user_id, position, 0.5)
-                
-                await asyncio.sleep(10)  # Check every 10 seconds
             except Exception as e:
                 logger.error("Risk management error", error=str(e))
-                await asyncio.sleep(30)
     
     async def _opportunity_scanning(self, user_id: str):
         """AI-powered opportunity detection"""
@@ -0,0 +1,214 @@
+import asyncio
+import json
+from typing import Dict, Any, Awaitable, Callable, Optional, Set
+import aiohttp
+from prometheus_client import Counter
+from app.services.rpc_client import RpcError
+import structlog
+
+logger = structlog.get_logger()
+
+HEADS_PUBLISHED = Counter(
+    "head_stream_heads_total", "New chain heads published to subscribers", ["chain", "source"]
+)
+HEADS_DROPPED = Counter(
+    "head_stream_dropped_total", "Heads dropped for subscribers that fell behind", ["chain"]
+)
+HEAD_POLLS = Counter(
+    "head_stream_polls_total", "eth_getBlockByNumber polls issued by the head stream", ["chain"]
+)
+
+def parse_head(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact head from an eth_getBlockByNumber result or a newHeads notification"""
+    return {
+        "number": int(block["number"], 16),
+        "hash": block.get("hash"),
+        "parent_hash": block.get("parentHash"),
+        "timestamp": int(block["timestamp"], 16) if block.get("timestamp") else None,
+    }
+
+class HeadSubscription:
+    """One consumer's view of a head stream, used as an async iterator.
+    
+    The queue is bounded: a consumer that falls behind loses its oldest
+    heads rather than the newest one.
+    """
+    
+    def __init__(self, stream: "NewHeadStream", maxsize: int = 16):
+        self._stream = stream
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+    
+    def _deliver(self, head: Optional[Dict[str, Any]]):
+        if self._queue.full():
+            self._queue.get_nowait()
+            if head is not None:
+                HEADS_DROPPED.labels(chain=self._stream.chain).inc()
+        self._queue.put_nowait(head)
+    
+    def __aiter__(self) -> "HeadSubscription":
+        return self
+    
+    async def __anext__(self) -> Dict[str, Any]:
+        if self.closed:
+            raise StopAsyncIteration
+        head = await self._queue.get()
+        if head is None:
+            raise StopAsyncIteration
+        return head
+    
+    async def __aenter__(self) -> "HeadSubscription":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._stream._unsubscribe(self)
+        # Wakes a consumer blocked in __anext__
+        self._deliver(None)
+
+class NewHeadStream:
+    """Single new-block feed for one chain, fanned out to every subscriber.
+    
+    With a websocket URL the stream holds an ``eth_subscribe("newHeads")``
+    subscription; if that fails or goes quiet it polls for a while and then
+    tries the websocket again. Polling waits one block time after a new head,
+    retries sooner when the head has not moved yet, and backs off
+    exponentially on errors. The feed only runs while someone is subscribed.
+    """
+    
+    def __init__(self, chain: str, poll: Callable[[], Awaitable[Dict[str, Any]]], ws_url: Optional[str] = None,
+                 block_time: float = 12.0, max_backoff: float = 60.0, ws_retry_seconds: float = 60.0,
+                 on_head: Optional[Callable[[str, int], None]] = None):
+        self.chain = chain
+        self.poll = poll
+        self.ws_url = ws_url or None
+        self.block_time = block_time
+        self.max_backoff = max_backoff
+        self.ws_retry_seconds = ws_retry_seconds
+        self.on_head = on_head
+        self.latest: Optional[Dict[str, Any]] = None
+        self._subscribers: Set[HeadSubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    def subscribe(self, maxsize: int = 16) -> HeadSubscription:
+        subscription = HeadSubscription(self, maxsize)
+        self._subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return subscription
+    
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def _unsubscribe(self, subscription: HeadSubscription):
+        self._subscribers.discard(subscription)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def _publish(self, head: Dict[str, Any], source: str) -> bool:
+        latest = self.latest
+        # Same height with a new hash is a reorg and is published again
+        if latest is not None and (
+            head["number"] < latest["number"]
+            or (head["number"] == latest["number"] and head["hash"] == latest["hash"])
+        ):
+            return False
+        self.latest = head
+        HEADS_PUBLISHED.labels(chain=self.chain, source=source).inc()
+        if self.on_head:
+            self.on_head(self.chain, head["number"])
+        for subscription in list(self._subscribers):
+            subscription._deliver(head)
+        return True
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        failures = 0
+        try:
+            while True:
+                started = loop.time()
+                try:
+                    await self._feed()
+                    return
+                except Exception as e:
+                    # Anything unexpected (a malformed head, a failing on_head) restarts the
+                    # feed with backoff instead of silently ending it
+                    failures = 1 if loop.time() - started > self.max_backoff else failures + 1
+                    delay = min(self.block_time * 2 ** failures, self.max_backoff)
+                    logger.error("Head stream failed, restarting", chain=self.chain,
+                                 error=str(e) or type(e).__name__, retry_in=delay)
+                    await asyncio.sleep(delay)
+        finally:
+            # However the feed ends, nobody is left waiting for a head that will not come.
+            # A cancelled feed may unwind after a new one started: those subscribers are not ours
+            if self._task is asyncio.current_task():
+                for subscription in list(self._subscribers):
+                    subscription._deliver(None)
+    
+    async def _feed(self):
+        while True:
+            if not self.ws_url:
+                await self._poll_heads()
+                return
+            try:
+                await self._websocket_heads()
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError, RpcError, ValueError) as e:
+                logger.warning("Head subscription unavailable, polling", chain=self.chain,
+                               error=str(e) or type(e).__name__)
+            await self._poll_heads(self.ws_retry_seconds)
+    
+    async def _websocket_heads(self):
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.ws_url, heartbeat=30.0) as ws:
+                await ws.send_json({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]})
+                reply = await ws.receive_json(timeout=self.max_backoff)
+                if reply.get("error"):
+                    error = reply["error"]
+                    raise RpcError(error.get("code", -32000), error.get("message", "eth_subscribe failed"))
+                logger.info("Subscribed to new heads", chain=self.chain)
+                while True:
+                    # No block for max_backoff seconds means the subscription silently died
+                    message = await ws.receive(timeout=self.max_backoff)
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        raise ConnectionResetError(f"Head subscription closed ({message.type.name})")
+                    payload = json.loads(message.data)
+                    params = payload.get("params") or {}
+                    if payload.get("method") == "eth_subscription" and params.get("result"):
+                        self._publish(parse_head(params["result"]), "websocket")
+    
+    async def _poll_heads(self, duration: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration is not None else None
+        retry = self.block_time / 4
+        failures = 0
+        while deadline is None or loop.time() < deadline:
+            HEAD_POLLS.labels(chain=self.chain).inc()
+            try:
+                block = await self.poll()
+                failures = 0
+                if block and self._publish(parse_head(block), "poll"):
+                    delay = self.block_time
+                    retry = self.block_time / 4
+                else:
+                    # The block is due; check again soon, then progressively less often
+                    delay = retry
+                    retry = min(retry * 2, self.max_backoff)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError, RpcError, ValueError) as e:
+                failures += 1
+                delay = min(self.block_time * 2 ** failures, self.max_backoff)
+                logger.warning("Head poll failed", chain=self.chain, error=str(e) or type(e).__name__,
+                               retry_in=delay)
+            await asyncio.sleep(delay)
+    
+    async def close(self):
+        for subscription in list(self._subscribers):
+            subscription.close()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+import numpy as np
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+from app.services.multiverse_simulator import multiverse_simulator
+from app.services.time_machine import time_machine
+import structlog
+
+logger = structlog.get_logger()
+
+JOBS = Counter("jobs_total", "Background jobs by kind and final status", ["kind", "status"])
+JOBS_RUNNING = Gauge("jobs_running", "Background jobs currently executing in this process")
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+async def _multiverse_job(params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    async for event, data in multiverse_simulator.stream_all_futures(params["portfolio_data"]):
+        if event == 'progress':
+            progress(data)
+        elif event == 'result':
+            return {
+                'feature': 'MULTIVERSE_SIMULATOR',
+                'universes_simulated': data['total_universes_simulated'],
+                'simulation': data
+            }
+
+async def _backtest_job(params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    result = await time_machine.time_travel_backtest(params["strategy"], params.get("years", 5), progress=progress)
+    return {
+        'feature': 'TIME_MACHINE',
+        'backtest_results': result
+    }
+
+# Job kind -> coroutine run on a worker; kinds must be importable by Celery workers too
+JOB_KINDS: Dict[str, Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]] = {
+    "multiverse": _multiverse_job,
+    "backtest": _backtest_job,
+}
+
+def _to_builtin(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class MemoryJobStore:
+    """Job records in this process's memory, dropped ``ttl_seconds`` after their last update
+    
+    Only the process that submitted a job can see it, so this store is only
+    suitable for a single API process; see ``JobManager.store``.
+    """
+    
+    blocking = False
+    
+    def __init__(self, ttl_seconds: float = 3600.0):
+        self.ttl_seconds = ttl_seconds
+        # job_id -> (expires_at, record)
+        self._jobs: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+    
+    def save(self, record: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            self._jobs[record["job_id"]] = (now + self.ttl_seconds, record)
+            for job_id in [k for k, (expires_at, _) in self._jobs.items() if expires_at <= now]:
+                del self._jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._jobs.get(job_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+    
+    def close(self):
+        pass
+
+class RedisJobStore:
+    """Job records in Redis as JSON, shared between the API and Celery workers"""
+    
+    blocking = True
+    
+    def __init__(self, url: str, ttl_seconds: float = 3600.0, prefix: str = "defi-risk:job:"):
+        import redis
+        
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+    
+    def save(self, record: Dict[str, Any]):
+        payload = json.dumps(record, default=_to_builtin, separators=(",", ":"))
+        self.client.set(self.prefix + record["job_id"], payload, ex=max(int(self.ttl_seconds), 1))
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        payload = self.client.get(self.prefix + job_id)
+        return json.loads(payload) if payload is not None else None
+    
+    def close(self):
+        self.client.close()
+
+class LocalJobBackend:
+    """Runs jobs on a thread pool inside the API process, each on its own event loop"""
+    
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+    
+    def submit(self, run: Callable[[str, str, Dict[str, Any]], None], job_id: str, kind: str, params: Dict[str, Any]):
+        self.executor.submit(run, job_id, kind, params)
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class CeleryJobBackend:
+    """Sends jobs to Celery workers (``celery -A app.worker:celery_app worker``)"""
+    
+    def __init__(self, celery_app):
+        self.celery = celery_app
+    
+    def submit(self, run: Callable[[str, str, Dict[str, Any]], None], job_id: str, kind: str, params: Dict[str, Any]):
+        self.celery.send_task(RUN_JOB_TASK, args=[job_id, kind, params])
+    
+    def close(self):
+        pass
+
+RUN_JOB_TASK = "defi_risk.run_job"
+
+def create_celery_app():
+    """Celery application whose workers execute jobs submitted by the API"""
+    from celery import Celery
+    
+    broker = settings.CELERY_BROKER_URL or settings.REDIS_URL
+    celery_app = Celery("defi_risk_analyzer", broker=broker)
+    # Jobs report through the job store, not Celery's result backend
+    celery_app.conf.update(task_ignore_result=True, task_acks_late=True, worker_prefetch_multiplier=1)
+    
+    @celery_app.task(name=RUN_JOB_TASK)
+    def run_job(job_id: str, kind: str, params: Dict[str, Any]):
+        job_manager.run(job_id, kind, params)
+    
+    return celery_app
+
+def _server_workers() -> int:
+    # uvicorn and gunicorn both take their default worker count from WEB_CONCURRENCY
+    try:
+        return int(os.environ.get("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+class JobManager:
+    """Submit long computations, then poll or stream their progress and fetch the result.
+    
+    Records (status, latest progress, result or error) live in the job store
+    for ``JOB_RESULT_TTL_SECONDS`` after their last update. Execution is
+    delegated to a backend: a local thread pool, or Celery workers sharing a
+    Redis job store. The in-memory store is per process, so it is replaced by
+    Redis when ``WEB_CONCURRENCY`` asks for more than one API worker; with
+    ``--workers`` on the command line set ``JOB_RESULT_STORE=redis`` yourself.
+    """
+    
+    def __init__(self, store=None, backend=None):
+        self._store = store
+        self._backend = backend
+    
+    @property
+    def store(self):
+        if self._store is None:
+            if settings.JOB_BACKEND == "celery" or settings.JOB_RESULT_STORE == "redis":
+                self._store = RedisJobStore(settings.REDIS_URL, settings.JOB_RESULT_TTL_SECONDS)
+            elif _server_workers() > 1:
+                # Status polls load-balance across workers that would not see each other's jobs
+                logger.warning("Several API workers; using the Redis job store", workers=_server_workers())
+                self._store = RedisJobStore(settings.REDIS_URL, settings.JOB_RESULT_TTL_SECONDS)
+            else:
+                self._store = MemoryJobStore(settings.JOB_RESULT_TTL_SECONDS)
+        return self._store
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.JOB_BACKEND == "celery":
+                self._backend = CeleryJobBackend(create_celery_app())
+            else:
+                self._backend = LocalJobBackend(settings.JOB_WORKERS)
+        return self._backend
+    
+    async def _call(self, fn: Callable, *args: Any) -> Any:
+        # Redis and the Celery broker are synchronous clients; keep them off the event loop
+        if self.store.blocking:
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        return fn(*args)
+    
+    async def submit(self, kind: str, params: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        record = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "user_id": user_id,
+            "status": "queued",
+            "progress": None,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        
+        def enqueue():
+            self.store.save(dict(record))
+            self.backend.submit(self.run, record["job_id"], kind, params)
+        
+        try:
+            await self._call(enqueue)
+        except Exception as e:
+            logger.error("Job submission failed", kind=kind, error=str(e))
+            raise
+        logger.info("Job submitted", job_id=record["job_id"], kind=kind)
+        return record
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._call(self.store.get, job_id)
+    
+    def run(self, job_id: str, kind: str, params: Dict[str, Any]):
+        """Execute a job to completion on the calling (worker) thread"""
+        record = self.store.get(job_id)
+        if record is None:
+            logger.warning("Job expired before it ran", job_id=job_id, kind=kind)
+            return
+        record = dict(record)
+        
+        def update(**fields: Any):
+            record.update(fields, updated_at=time.time())
+            # Memory-store readers see a fresh dict, never one mid-update
+            self.store.save(dict(record))
+        
+        JOBS_RUNNING.inc()
+        try:
+            update(status="running", started_at=time.time())
+            result = asyncio.run(JOB_KINDS[kind](params, lambda progress: update(progress=progress)))
+            # A result the store cannot save fails the job like any other error
+            update(status="succeeded", result=result)
+        except Exception as e:
+            logger.error("Job failed", job_id=job_id, kind=kind, error=str(e))
+            try:
+                update(status="failed", result=None, error=str(e))
+            except Exception as save_error:
+                # Nothing else reports executor failures; readers see the job stuck until its record expires
+                logger.error("Job status could not be saved", job_id=job_id, kind=kind, error=str(save_error))
+        finally:
+            JOBS_RUNNING.dec()
+            JOBS.labels(kind=kind, status=record["status"]).inc()
+    
+    async def events(self, job_id: str) -> AsyncIterator[Tuple[str, Any]]:
+        """``(event, data)`` pairs for a job: ``status`` on each change, then ``result`` or ``error``"""
+        last_update = None
+        while True:
+            record = await self.get(job_id)
+            if record is None:
+                raise LookupError(f"Job {job_id} not found or expired")
+            if record["updated_at"] != last_update:
+                last_update = record["updated_at"]
+                if record["status"] == "succeeded":
+                    yield 'result', record["result"]
+                    return
+                if record["status"] == "failed":
+                    yield 'error', {"detail": record["error"]}
+                    return
+                yield 'status', {"status": record["status"], "progress": record["progress"]}
+            await asyncio.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+    
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+        if self._store is not None:
+            self._store.close()
+
+job_manager = JobManager()
@@ -1,6 +1,6 @@
 import asyncio
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, AsyncIterator, Tuple
 from datetime import datetime
 import structlog
 
@@ -13,14 +13,32 @@ class MultiverseSimulator:
         self.parallel_universes = 10000
         self.simulation_accuracy = 0.997
         self.quantum_branches = 1000000
-        
+    
     async def simulate_all_futures(self, portfolio_data: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate 10,000 parallel universes to see ALL possible futures"""
-        
+        async for event, data in self.stream_all_futures(portfolio_data):
+            if event == 'result':
+                return data
+    
+    async def stream_all_futures(self, portfolio_data: Dict[str, Any],
+                                 batch_size: int = 500) -> AsyncIterator[Tuple[str, Any]]:
+        """The simulation as ``(event, data)`` pairs: a ``progress`` event per batch of
+        universes, then the aggregated ``result``"""
         universe_outcomes = []
-        for universe_id in range(self.parallel_universes):
-            outcome = await self._simulate_universe(portfolio_data, universe_id)
-            universe_outcomes.append(outcome)
+        for batch_start in range(0, self.parallel_universes, batch_size):
+            batch = []
+            for universe_id in range(batch_start, min(batch_start + batch_size, self.parallel_universes)):
+                batch.append(await self._simulate_universe(portfolio_data, universe_id))
+            universe_outcomes.extend(batch)
+            
+            batch_returns = [o['return_pct'] for o in batch]
+            yield 'progress', {
+                'universes_completed': len(universe_outcomes),
+                'total_universes': self.parallel_universes,
+                'batch_best_return_pct': max(batch_returns),
+                'batch_worst_return_pct': min(batch_returns),
+                'batch_mean_return_pct': float(np.mean(batch_returns))
+            }
         
         # Aggregate multiverse data
         best_outcome = max(universe_outcomes, key=lambda x: x['final_value'])
@@ -30,7 +48,7 @@ class MultiverseSimulator:
         # Find optimal path across all universes
         optimal_path = await self._find_optimal_path(universe_outcomes)
         
-        return {
+        yield 'result', {
             'total_universes_simulated': self.parallel_universes,
             'simulation_accuracy': self.simulation_accuracy,
             'best_possible_outcome': best_outcome,
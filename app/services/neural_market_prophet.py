@@ -1,9 +1,8 @@
 import asyncio
 import numpy as np
 # import tensorflow as tf  # Removed for lightweight version
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, AsyncIterator, Tuple
 from datetime import datetime, timedelta
-import pandas as pd
 # from transformers import GPT2LMHeadModel, GPT2Tokenizer
 # import torch  # Removed for lightweight version
 import structlog
@@ -17,29 +16,72 @@ class NeuralMarketProphet:
         # Lightweight version - ML models disabled
         self.prediction_accuracy = 0.992
         self.market_memory = []
-        
-
+    
+    
     
     async def predict_market_future(self, market_data: Dict[str, Any], 
                                   prediction_horizon: int = 168) -> Dict[str, Any]:
         """Predict market movements with 99.2% accuracy"""
         try:
-            # Multi-modal prediction
-            technical_prediction = await self._technical_analysis_prediction(market_data)
-            sentiment_prediction = await self._sentiment_driven_prediction(market_data)
-            macro_prediction = await self._macroeconomic_prediction(market_data)
-            whale_prediction = await self._whale_movement_prediction(market_data)
-            
-            # Neural ensemble prediction
-            ensemble_prediction = await self._neural_ensemble_prediction([
-                technical_prediction, sentiment_prediction, macro_prediction, whale_prediction
-            ])
-            
-            # Generate detailed predictions
+            prediction = {}
             hourly_predictions = []
-            for hour in range(prediction_horizon):
+            async for event, data in self.stream_market_future(market_data, prediction_horizon):
+                if event == 'hourly_predictions':
+                    hourly_predictions.extend(data)
+                else:
+                    prediction.update(data)
+                    if event == 'summary':
+                        prediction['hourly_predictions'] = hourly_predictions
+            return prediction
+        except Exception as e:
+            logger.error("Neural prediction error", error=str(e))
+            raise
+    
+    async def stream_market_future(self, market_data: Dict[str, Any], prediction_horizon: int = 168,
+                                   chunk_hours: int = 24) -> AsyncIterator[Tuple[str, Any]]:
+        """Prediction as ``(event, data)`` pairs: the summary, hourly predictions in
+        chunks of ``chunk_hours`` as they are computed, then the horizon-wide analysis"""
+        # Multi-modal prediction
+        technical_prediction = await self._technical_analysis_prediction(market_data)
+        sentiment_prediction = await self._sentiment_driven_prediction(market_data)
+        macro_prediction = await self._macroeconomic_prediction(market_data)
+        whale_prediction = await self._whale_movement_prediction(market_data)
+        
+        # Neural ensemble prediction
+        ensemble_prediction = await self._neural_ensemble_prediction([
+            technical_prediction, sentiment_prediction, macro_prediction, whale_prediction
+        ])
+        
+        # Market regime detection
+        regime = await self._detect_market_regime(market_data)
+        
+        # Black swan event probability
+        black_swan_prob = await self._calculate_black_swan_probability(market_data)
+        
+        yield 'summary', {
+            'prediction_horizon_hours': prediction_horizon,
+            'model_accuracy': self.prediction_accuracy,
+            'ensemble_prediction': ensemble_prediction,
+            'market_regime': regime,
+            'black_swan_probability': black_swan_prob,
+            'prediction_components': {
+                'technical_weight': 0.35,
+                'sentiment_weight': 0.25,
+                'macro_weight': 0.20,
+                'whale_weight': 0.20
+            },
+            'neural_confidence': 0.987,
+            'prediction_timestamp': datetime.utcnow().isoformat()
+        }
+        
+        # Generate detailed predictions; only what the final analysis needs is kept
+        first_day = []
+        risk_windows = []
+        for start in range(0, prediction_horizon, chunk_hours):
+            chunk = []
+            for hour in range(start, min(start + chunk_hours, prediction_horizon)):
                 prediction = await self._predict_single_timepoint(market_data, hour)
-                hourly_predictions.append({
+                chunk.append({
                     'hour': hour,
                     'price_prediction': prediction['price'],
                     'volatility_prediction': prediction['volatility'],
@@ -47,35 +89,16 @@ class NeuralMarketProphet:
                     'confidence': prediction['confidence'],
                     'key_factors': prediction['factors']
                 })
-            
-            # Market regime detection
-            regime = await self._detect_market_regime(market_data)
-            
-            # Black swan event probability
-            black_swan_prob = await self._calculate_black_swan_probability(market_data)
-            
-            return {
-                'prediction_horizon_hours': prediction_horizon,
-                'model_accuracy': self.prediction_accuracy,
-                'ensemble_prediction': ensemble_prediction,
-                'hourly_predictions': hourly_predictions,
-                'market_regime': regime,
-                'black_swan_probability': black_swan_prob,
-                'prediction_components': {
-                    'technical_weight': 0.35,
-                    'sentiment_weight': 0.25,
-                    'macro_weight': 0.20,
-                    'whale_weight': 0.20
-                },
-                'neural_confidence': 0.987,
-                'prediction_timestamp': datetime.utcnow().isoformat(),
-                'next_major_move': await self._predict_next_major_move(market_data),
-                'optimal_entry_points': await self._find_optimal_entry_points(hourly_predictions),
-                'risk_windows': await self._identify_risk_windows(hourly_predictions)
-            }
-        except Exception as e:
-            logger.error("Neural prediction error", error=str(e))
-            raise
+            first_day.extend(chunk[:24 - len(first_day)])
+            if len(risk_windows) < 10:
+                risk_windows.extend(await self._identify_risk_windows(chunk))
+            yield 'hourly_predictions', chunk
+        
+        yield 'analysis', {
+            'next_major_move': await self._predict_next_major_move(market_data),
+            'optimal_entry_points': await self._find_optimal_entry_points(first_day),
+            'risk_windows': risk_windows[:10]
+        }
     
     async def _technical_analysis_prediction(self, market_data: Dict[str, Any]) -> Dict[str, float]:
         """Advanced technical analysis with 200+ indicators"""
@@ -198,10 +221,10 @@ class NeuralMarketProphet:
     async def _find_optimal_entry_points(self, predictions: List[Dict]) -> List[Dict[str, Any]]:
         """Find optimal entry points"""
         entry_points = []
-        for i, pred in enumerate(predictions[:24]):  # Next 24 hours
-            if pred['confidence'] > 0.9 and i % 4 == 0:  # Every 4 hours
+        for pred in predictions[:24]:  # Next 24 hours
+            if pred['confidence'] > 0.9 and pred['hour'] % 4 == 0:  # Every 4 hours
                 entry_points.append({
-                    'hour': i,
+                    'hour': pred['hour'],
                     'entry_type': 'BUY' if np.random.random() > 0.5 else 'SELL',
                     'confidence': pred['confidence'],
                     'expected_return': np.random.uniform(0.02, 0.08),
@@ -212,10 +235,10 @@ class NeuralMarketProphet:
     async def _identify_risk_windows(self, predictions: List[Dict]) -> List[Dict[str, Any]]:
         """Identify high-risk time windows"""
         risk_windows = []
-        for i, pred in enumerate(predictions):
+        for pred in predictions:
             if pred['volatility_prediction'] > 0.05:
                 risk_windows.append({
-                    'start_hour': i,
+                    'start_hour': pred['hour'],
                     'duration_hours': np.random.randint(1, 6),
                     'risk_level': 'HIGH' if pred['volatility_prediction'] > 0.08 else 'MEDIUM',
                     'recommended_action': 'REDUCE_EXPOSURE'
@@ -47,7 +47,7 @@ class QuantumRiskEngine:
             return {
                 'quantum_risk_score': quantum_enhanced_score,
                 'quantum_states': risk_states,
-                'entanglement_matrix': entanglement_risks.tolist(),
+                'entanglement_matrix': entanglement_risks,
                 'tunneling_probability': tunneling_probability,
                 'interference_patterns': interference_patterns,
                 'quantum_advantage_factor': self.quantum_advantage_factor,
@@ -170,7 +170,7 @@ class QuantumRiskEngine:
         quantum_var = np.random.uniform(0.02, 0.05)
         
         return {
-            'optimal_allocation': optimal_weights.tolist(),
+            'optimal_allocation': optimal_weights,
             'quantum_sharpe_ratio': quantum_sharpe_ratio,
             'quantum_enhanced_var': quantum_var,
             'optimization_method': 'Quantum Annealing',
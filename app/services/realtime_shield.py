@@ -4,6 +4,7 @@ import json
 from typing import Dict, List, Any, Set
 from datetime import datetime, timedelta
 import numpy as np
+from app.services.blockchain_service import blockchain_service
 import structlog
 
 logger = structlog.get_logger()
@@ -53,15 +54,16 @@ class RealtimeShield:
         """Activate real-time protection shield"""
         try:
             self.active_shields.add(user_id)
+            chain = portfolio_data.get('chain', 'ethereum')
             
-            # Start monitoring tasks
+            # Start monitoring tasks; each wakes on new blocks of the shared head stream
             monitoring_tasks = [
-                asyncio.create_task(self._monitor_transactions(user_id)),
-                asyncio.create_task(self._monitor_smart_contracts(user_id)),
-                asyncio.create_task(self._monitor_market_manipulation(user_id)),
-                asyncio.create_task(self._monitor_governance_risks(user_id)),
-                asyncio.create_task(self._monitor_oracle_attacks(user_id)),
-                asyncio.create_task(self._monitor_mev_attacks(user_id))
+                asyncio.create_task(self._monitor_transactions(user_id, chain)),
+                asyncio.create_task(self._monitor_smart_contracts(user_id, chain)),
+                asyncio.create_task(self._monitor_market_manipulation(user_id, chain)),
+                asyncio.create_task(self._monitor_governance_risks(user_id, chain)),
+                asyncio.create_task(self._monitor_oracle_attacks(user_id, chain)),
+                asyncio.create_task(self._monitor_mev_attacks(user_id, chain))
             ]
             
             return {
@@ -88,91 +90,73 @@ class RealtimeShield:
             logger.error("Error activating shield", error=str(e))
             raise
     
-    async def _monitor_transactions(self, user_id: str):
-        """Monitor all transactions for anomalies"""
-        while user_id in self.active_shields:
+    async def _monitor_transactions(self, user_id: str, chain: str = "ethereum"):
+        """Monitor all transactions for anomalies, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 # Simulate transaction monitoring
                 suspicious_tx = await self._detect_suspicious_transaction(user_id)
                 
                 if suspicious_tx:
                     await self._handle_threat(user_id, 'SUSPICIOUS_TRANSACTION', suspicious_tx)
-                
-                await asyncio.sleep(0.1)  # Check every 100ms
             except Exception as e:
                 logger.error("Transaction monitoring error", error=str(e))
-                await asyncio.sleep(1)
     
-    async def _monitor_smart_contracts(self, user_id: str):
-        """Monitor smart contract interactions"""
-        while user_id in self.active_shields:
+    async def _monitor_smart_contracts(self, user_id: str, chain: str = "ethereum"):
+        """Monitor smart contract interactions, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 # Check for contract vulnerabilities
                 vulnerability = await self._scan_contract_vulnerability(user_id)
                 
                 if vulnerability['severity'] == 'CRITICAL':
                     await self._handle_threat(user_id, 'CONTRACT_VULNERABILITY', vulnerability)
-                
-                await asyncio.sleep(1)  # Check every second
             except Exception as e:
                 logger.error("Smart contract monitoring error", error=str(e))
-                await asyncio.sleep(5)
     
-    async def _monitor_market_manipulation(self, user_id: str):
-        """Monitor for market manipulation attempts"""
-        while user_id in self.active_shields:
+    async def _monitor_market_manipulation(self, user_id: str, chain: str = "ethereum"):
+        """Monitor for market manipulation attempts, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 manipulation = await self._detect_market_manipulation()
                 
                 if manipulation['confidence'] > 0.9:
                     await self._handle_threat(user_id, 'MARKET_MANIPULATION', manipulation)
-                
-                await asyncio.sleep(0.5)  # Check every 500ms
             except Exception as e:
                 logger.error("Market manipulation monitoring error", error=str(e))
-                await asyncio.sleep(2)
     
-    async def _monitor_governance_risks(self, user_id: str):
-        """Monitor governance attacks and malicious proposals"""
-        while user_id in self.active_shields:
+    async def _monitor_governance_risks(self, user_id: str, chain: str = "ethereum"):
+        """Monitor governance attacks and malicious proposals, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 governance_risk = await self._analyze_governance_proposals(user_id)
                 
                 if governance_risk['threat_level'] == 'HIGH':
                     await self._handle_threat(user_id, 'GOVERNANCE_ATTACK', governance_risk)
-                
-                await asyncio.sleep(10)  # Check every 10 seconds
             except Exception as e:
                 logger.error("Governance monitoring error", error=str(e))
-                await asyncio.sleep(30)
     
-    async def _monitor_oracle_attacks(self, user_id: str):
-        """Monitor oracle price manipulation"""
-        while user_id in self.active_shields:
+    async def _monitor_oracle_attacks(self, user_id: str, chain: str = "ethereum"):
+        """Monitor oracle price manipulation, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 oracle_attack = await self._detect_oracle_manipulation()
                 
                 if oracle_attack['manipulation_detected']:
                     await self._handle_threat(user_id, 'ORACLE_ATTACK', oracle_attack)
-                
-                await asyncio.sleep(0.2)  # Check every 200ms
             except Exception as e:
                 logger.error("Oracle monitoring error", error=str(e))
-                await asyncio.sleep(1)
     
-    async def _monitor_mev_attacks(self, user_id: str):
-        """Monitor MEV attacks and sandwich attacks"""
-        while user_id in self.active_shields:
+    async def _monitor_mev_attacks(self, user_id: str, chain: str = "ethereum"):
+        """Monitor MEV attacks and sandwich attacks, once per new block"""
+        async for _ in blockchain_service.watch_new_heads(chain, lambda: user_id in self.active_shields):
             try:
                 mev_attack = await self._detect_mev_attack(user_id)
                 
                 if mev_attack['attack_detected']:
                     await self._handle_threat(user_id, 'MEV_ATTACK', mev_attack)
-                
-                await asyncio.sleep(0.05)  # Check every 50ms
             except Exception as e:
                 logger.error("MEV monitoring error", error=str(e))
-                await asyncio.sleep(0.5)
     
     async def _handle_threat(self, user_id: str, threat_type: str, threat_data: Dict[str, Any]):
         """Handle detected threats with immediate response"""
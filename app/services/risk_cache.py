@@ -0,0 +1,166 @@
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+import numpy as np
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+from app.services.risk_model import risk_model_registry
+from app.services.single_flight import SingleFlight
+import structlog
+
+logger = structlog.get_logger()
+
+CACHE_HITS = Counter("risk_cache_hits_total", "Risk assessment cache hits")
+CACHE_MISSES = Counter("risk_cache_misses_total", "Risk assessment cache misses")
+CACHE_EVICTIONS = Counter(
+    "risk_cache_evictions_total", "Risk assessment cache evictions", ["reason"]
+)
+CACHE_ENTRIES = Gauge("risk_cache_entries", "Entries held by the risk assessment cache")
+CACHE_BYTES = Gauge("risk_cache_bytes", "Approximate bytes held by the risk assessment cache")
+
+class RiskAssessmentCache:
+    """Content-addressed LRU cache for risk assessments with TTL and memory cap"""
+    
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size_bytes, value), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._pending = SingleFlight()
+        self._bytes = 0
+    
+    async def get_or_compute(self, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any],
+                             compute: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return the cached assessment for these inputs, computing it on a miss
+        
+        Like ``get``, every caller receives its own copy.
+        """
+        key = self.make_key(protocol_data, portfolio_data)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        
+        async def compute_and_store() -> Dict[str, Any]:
+            result = await compute(protocol_data, portfolio_data)
+            self.put(key, result)
+            return result
+        
+        # Concurrent misses for the same inputs wait on the first computation;
+        # a client that disconnects or times out does not cancel it for the rest
+        return self._copy(await self._pending.do("risk_assessment", key, compute_and_store))
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached value, so callers can edit it without touching the entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            CACHE_MISSES.inc()
+            return None
+        
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key, "ttl")
+            CACHE_MISSES.inc()
+            return None
+        
+        self._entries.move_to_end(key)
+        CACHE_HITS.inc()
+        return self._copy(value)
+    
+    def put(self, key: str, value: Dict[str, Any]):
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            logger.warning("Risk assessment too large to cache", size_bytes=size)
+            return
+        
+        if key in self._entries:
+            self._remove(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)), "lru")
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), "memory")
+        self._update_gauges()
+    
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+    
+    def _remove(self, key: str, reason: Optional[str]):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        if reason:
+            CACHE_EVICTIONS.labels(reason=reason).inc()
+        self._update_gauges()
+    
+    def _update_gauges(self):
+        CACHE_ENTRIES.set(len(self._entries))
+        CACHE_BYTES.set(self._bytes)
+    
+    @classmethod
+    def make_key(cls, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any]) -> str:
+        """Canonical SHA-256 of the normalized inputs"""
+        canonical = json.dumps(
+            [cls._normalize(protocol_data), cls._normalize(portfolio_data)],
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    @classmethod
+    def _normalize(cls, value: Any) -> Any:
+        """Normalize so equal inputs hash equally (1 == 1.0, tuples == lists, NumPy == Python)"""
+        if isinstance(value, dict):
+            return {str(k): cls._normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return [cls._normalize(v) for v in value]
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return float(value)
+        return value
+    
+    @classmethod
+    def _copy(cls, value: Any) -> Any:
+        """Fresh containers around the same scalars; attributes such as an assessment's inputs stay shared"""
+        if isinstance(value, dict):
+            # copy.copy keeps the dict subclass and its slots
+            copied = copy.copy(value)
+            for k, v in value.items():
+                if isinstance(v, (dict, list, np.ndarray)):
+                    copied[k] = cls._copy(v)
+            return copied
+        if isinstance(value, list):
+            return [cls._copy(v) for v in value]
+        if isinstance(value, np.ndarray):
+            return value.copy()
+        return value
+    
+    @classmethod
+    def _estimate_size(cls, value: Any) -> int:
+        """Approximate JSON size in bytes, without serializing"""
+        if isinstance(value, dict):
+            return 2 + sum(len(str(k)) + 4 + cls._estimate_size(v) for k, v in value.items())
+        if isinstance(value, (list, tuple)):
+            return 2 + sum(cls._estimate_size(v) + 1 for v in value)
+        if isinstance(value, np.ndarray):
+            return 2 + value.size * 20
+        if isinstance(value, str):
+            return len(value) + 2
+        # Numbers, booleans and None
+        return 20
+
+risk_cache = RiskAssessmentCache(
+    max_entries=settings.RISK_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RISK_CACHE_TTL_SECONDS,
+    max_bytes=settings.RISK_CACHE_MAX_BYTES
+)
+
+# Assessments scored by a previous model version must not be served after a swap
+risk_model_registry.add_listener(lambda model: risk_cache.clear())
@@ -1,74 +1,399 @@
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import asyncio
 from datetime import datetime, timedelta
+from app.core.config import settings
+from app.services.var_engine import var_engine
+from app.services.covariance_engine import covariance_engine
+from app.services.risk_model import RiskModel, risk_model_registry
 import structlog
 
 logger = structlog.get_logger()
 
+# Defaults mirror the ``.get`` fallbacks used by the scalar risk helpers
+PROTOCOL_FEATURE_DEFAULTS = {
+    "tvl": 0.0,
+    "daily_volume": 0.0,
+    "volatility": 0.5,
+    "audit_status": False,
+    "code_quality_score": 0.5,
+    "days_since_deployment": 0.0,
+    "governance_score": 0.5,
+    "team_reputation": 0.5,
+    "decentralization_level": 0.5,
+}
+
+PORTFOLIO_FEATURE_DEFAULTS = {
+    "total_value": 0.0,
+    "correlation_with_market": 0.7,
+}
+
+PORTFOLIO_FIELDS = set(PORTFOLIO_FEATURE_DEFAULTS) | {
+    "positions",
+    "returns_history",
+    "covariance_matrix",
+    "correlation_matrix",
+    "var_confidence",
+    "var_paths",
+}
+
+# Input fields read by each part of the assessment; drives update_assessment
+COMPONENT_DEPENDENCIES = {
+    "liquidity_risk": ("tvl", "daily_volume"),
+    "market_risk": ("volatility", "correlation_with_market", "positions"),
+    "smart_contract_risk": ("audit_status", "code_quality_score", "days_since_deployment"),
+    "counterparty_risk": ("governance_score", "team_reputation", "decentralization_level"),
+}
+
+# Score-driven fallback VaR also follows the overall score; see update_assessment
+VAR_DEPENDENCIES = (
+    "total_value", "positions", "returns_history", "covariance_matrix",
+    "correlation_matrix", "correlation_with_market", "var_confidence", "var_paths",
+)
+
+FIELD_DEPENDENCIES: Dict[str, set] = {}
+for _component, _fields in {**COMPONENT_DEPENDENCIES, "var_metrics": VAR_DEPENDENCIES}.items():
+    for _field in _fields:
+        FIELD_DEPENDENCIES.setdefault(_field, set()).add(_component)
+
+# Default shock grid for stress tests; every combination is one scenario
+DEFAULT_STRESS_SHOCKS = {
+    "tvl_drawdown": [0.0, 0.3, 0.5, 0.8],            # fraction of TVL lost
+    "volume_drawdown": [0.0, 0.5],                   # fraction of daily volume lost
+    "volatility_spike": [1.0, 1.5, 2.0, 3.0],        # volatility multiplier
+    "correlation_breakdown": [0.0, 0.5, 1.0],        # blend of market correlation towards 1
+    "audit_flip": [False, True],                     # treat every protocol as unaudited
+}
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH", "CRITICAL"])
+
+class RiskAssessment(dict):
+    """Assessment payload that also remembers the inputs it was computed from.
+    
+    ``inputs`` is an attribute rather than a key, so it is never serialized
+    into responses or counted by the risk cache; update_assessment reads it.
+    """
+    
+    __slots__ = ("inputs",)
+
 class RiskEngine:
     def __init__(self):
-        self.risk_thresholds = {
-            "low": 0.3,
-            "medium": 0.6,
-            "high": 0.8,
-            "critical": 1.0
-        }
-        logger.info("Risk engine initialized (lightweight mode)")
+        logger.info("Risk engine initialized (lightweight mode)", model_version=self.model.version)
+    
+    @property
+    def model(self) -> RiskModel:
+        """Currently active risk model; swapped atomically on reload"""
+        return risk_model_registry.model
+    
+    @property
+    def risk_thresholds(self) -> Dict[str, float]:
+        return self.model.thresholds
     
     async def calculate_overall_risk(self, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate comprehensive risk assessment"""
+        risk_model_registry.maybe_reload()
         try:
             # Calculate individual risk components
-            liquidity_risk = await self._calculate_liquidity_risk(protocol_data)
-            market_risk = await self._calculate_market_risk(protocol_data, portfolio_data)
-            smart_contract_risk = await self._calculate_smart_contract_risk(protocol_data)
-            counterparty_risk = await self._calculate_counterparty_risk(protocol_data)
-            
-            # Weighted risk calculation
-            weights = {
-                'liquidity': 0.25,
-                'market': 0.30,
-                'smart_contract': 0.25,
-                'counterparty': 0.20
+            components = {
+                "liquidity_risk": await self._calculate_liquidity_risk(protocol_data),
+                "market_risk": await self._calculate_market_risk(protocol_data, portfolio_data),
+                "smart_contract_risk": await self._calculate_smart_contract_risk(protocol_data),
+                "counterparty_risk": await self._calculate_counterparty_risk(protocol_data)
             }
             
-            overall_risk = (
-                liquidity_risk * weights['liquidity'] +
-                market_risk * weights['market'] +
-                smart_contract_risk * weights['smart_contract'] +
-                counterparty_risk * weights['counterparty']
-            )
-            
-            # Determine risk level
-            risk_level = self._get_risk_level(overall_risk)
+            overall_risk = self._weighted_risk(components)
             
             # Calculate Value at Risk (VaR)
             var_metrics = await self._calculate_var(portfolio_data, overall_risk)
             
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                overall_risk, liquidity_risk, market_risk, smart_contract_risk, counterparty_risk
+            # Which positions drive the risk
+            risk_attribution = self._calculate_risk_attribution(portfolio_data)
+            
+            return self._build_assessment(
+                protocol_data, portfolio_data, components, overall_risk, var_metrics, risk_attribution
+            )
+        except Exception as e:
+            logger.error("Error calculating overall risk", error=str(e))
+            raise
+    
+    async def update_assessment(self, previous: Dict[str, Any], changed_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Recompute only what depends on ``changed_fields`` (field name -> new value).
+
+        ``previous`` must be an assessment returned by this engine (its inputs
+        are not part of the serialized payload); they are patched with the changed values and only the components
+        that read those fields are recalculated. The aggregate score, level
+        and recommendations are re-derived from the components, and VaR is
+        re-simulated only when one of its own inputs changed. An assessment
+        scored by a different model version is recomputed in full.
+        """
+        inputs = getattr(previous, "inputs", None)
+        if inputs is None:
+            raise ValueError("update_assessment needs an assessment returned by this engine")
+        risk_model_registry.maybe_reload()
+        try:
+            protocol_data = dict(inputs["protocol_data"])
+            portfolio_data = dict(inputs["portfolio_data"])
+            for field, value in changed_fields.items():
+                target = portfolio_data if field in PORTFOLIO_FIELDS else protocol_data
+                target[field] = value
+            
+            # Components scored by an older model cannot be mixed with the new weights
+            if previous.get("model_version") != self.model.version:
+                return await self.calculate_overall_risk(protocol_data, portfolio_data)
+            
+            affected = set()
+            for field in changed_fields:
+                affected.update(FIELD_DEPENDENCIES.get(field, ()))
+            
+            components = dict(previous["risk_components"])
+            for component in COMPONENT_DEPENDENCIES:
+                if component in affected:
+                    components[component] = await self._calculate_component(
+                        component, protocol_data, portfolio_data
+                    )
+            
+            overall_risk = self._weighted_risk(components)
+            
+            var_metrics = previous["var_metrics"]
+            score_driven_var = not portfolio_data.get("positions")
+            if "var_metrics" in affected or (score_driven_var and overall_risk != previous["overall_risk_score"]):
+                var_metrics = await self._calculate_var(portfolio_data, overall_risk)
+            
+            risk_attribution = previous.get("risk_attribution")
+            if "var_metrics" in affected:
+                risk_attribution = self._calculate_risk_attribution(portfolio_data)
+            
+            return self._build_assessment(
+                protocol_data, portfolio_data, components, overall_risk, var_metrics, risk_attribution
             )
+        except Exception as e:
+            logger.error("Error updating risk assessment", error=str(e))
+            raise
+    
+    async def _calculate_component(self, component: str, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any]) -> float:
+        """Dispatch a single risk component by name"""
+        if component == "liquidity_risk":
+            return await self._calculate_liquidity_risk(protocol_data)
+        if component == "market_risk":
+            return await self._calculate_market_risk(protocol_data, portfolio_data)
+        if component == "smart_contract_risk":
+            return await self._calculate_smart_contract_risk(protocol_data)
+        if component == "counterparty_risk":
+            return await self._calculate_counterparty_risk(protocol_data)
+        raise ValueError(f"Unknown risk component: {component}")
+    
+    def _weighted_risk(self, components: Dict[str, float]) -> float:
+        """Weighted risk calculation"""
+        model = self.model
+        return (
+            components["liquidity_risk"] * model.liquidity_weight +
+            components["market_risk"] * model.market_weight +
+            components["smart_contract_risk"] * model.smart_contract_weight +
+            components["counterparty_risk"] * model.counterparty_weight
+        )
+    
+    def _build_assessment(self, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any],
+                          components: Dict[str, float], overall_risk: float,
+                          var_metrics: Dict[str, Any],
+                          risk_attribution: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Assemble the assessment payload from its components"""
+        # Generate recommendations
+        recommendations = self._generate_recommendations(
+            overall_risk,
+            components["liquidity_risk"],
+            components["market_risk"],
+            components["smart_contract_risk"],
+            components["counterparty_risk"]
+        )
+        
+        assessment = RiskAssessment({
+            "overall_risk_score": overall_risk,
+            "risk_level": self._get_risk_level(overall_risk),
+            "risk_components": components,
+            "var_metrics": var_metrics,
+            "risk_attribution": risk_attribution,
+            "recommendations": recommendations,
+            "confidence_score": 0.85,  # Model confidence
+            "model_version": self.model.version,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        # Shallow copies: fields the caller reassigns later cannot alter what is patched.
+        # Nested values (positions, matrices) are shared and must not be mutated in place.
+        assessment.inputs = {
+            "protocol_data": dict(protocol_data),
+            "portfolio_data": dict(portfolio_data)
+        }
+        return assessment
+    
+    async def calculate_batch_risk(self, protocol_features: Dict[str, Any], portfolio_features: Dict[str, Any]) -> Dict[str, Any]:
+        """Score many protocol/portfolio pairs in one vectorized pass.
+
+        Features are columnar: each key maps to a 1-D array (or list) with one
+        entry per pair. Missing columns fall back to the same defaults as the
+        scalar path, and the outputs match ``calculate_overall_risk`` exactly.
+        """
+        risk_model_registry.maybe_reload()
+        try:
+            protocol = self._to_columns(protocol_features, PROTOCOL_FEATURE_DEFAULTS)
+            portfolio = self._to_columns(portfolio_features, PORTFOLIO_FEATURE_DEFAULTS)
+            size = self._batch_size(protocol, portfolio)
+            protocol = {k: np.broadcast_to(v, size) for k, v in protocol.items()}
+            portfolio = {k: np.broadcast_to(v, size) for k, v in portfolio.items()}
+            
+            # Read the model once so the whole batch is scored by a single version
+            model = self.model
+            scores = model.kernel(protocol, portfolio)
             
             return {
-                "overall_risk_score": overall_risk,
-                "risk_level": risk_level,
+                "count": int(size[0]),
+                "overall_risk_score": scores["overall_risk_score"],
+                "risk_level": RISK_LEVELS[scores["risk_level_index"]],
                 "risk_components": {
-                    "liquidity_risk": liquidity_risk,
-                    "market_risk": market_risk,
-                    "smart_contract_risk": smart_contract_risk,
-                    "counterparty_risk": counterparty_risk
+                    "liquidity_risk": scores["liquidity_risk"],
+                    "market_risk": scores["market_risk"],
+                    "smart_contract_risk": scores["smart_contract_risk"],
+                    "counterparty_risk": scores["counterparty_risk"]
                 },
-                "var_metrics": var_metrics,
-                "recommendations": recommendations,
-                "confidence_score": 0.85,  # Model confidence
+                "var_metrics": {
+                    "var_1d": scores["var_1d"],
+                    "var_7d": scores["var_7d"],
+                    "var_30d": scores["var_30d"],
+                    "confidence_level": 0.95
+                },
+                "confidence_score": 0.85,
+                "model_version": model.version,
                 "timestamp": datetime.utcnow().isoformat()
             }
         except Exception as e:
-            logger.error("Error calculating overall risk", error=str(e))
+            logger.error("Error calculating batch risk", error=str(e))
             raise
     
+    async def run_stress_test(self, protocol_features: Dict[str, Any], portfolio_features: Dict[str, Any],
+                              shocks: Optional[Dict[str, List[Any]]] = None,
+                              protocol_ids: Optional[List[Any]] = None,
+                              top_k: int = 10) -> Dict[str, Any]:
+        """Score every protocol under every shock scenario in one broadcast pass.
+
+        Scenarios are the Cartesian product of the shock lists. Shocks are laid
+        out as (S, 1) columns against (1, P) protocol rows, so the compiled
+        model kernel scores the whole S x P grid at once, in scenario chunks
+        to bound peak memory.
+        """
+        risk_model_registry.maybe_reload()
+        try:
+            shocks = {**DEFAULT_STRESS_SHOCKS, **(shocks or {})}
+            unknown = set(shocks) - set(DEFAULT_STRESS_SHOCKS)
+            if unknown:
+                raise ValueError(f"Unknown stress shocks: {sorted(unknown)}")
+            if any(len(values) == 0 for values in shocks.values()):
+                raise ValueError("Every stress shock needs at least one value")
+            
+            protocol = self._to_columns(protocol_features, PROTOCOL_FEATURE_DEFAULTS)
+            portfolio = self._to_columns(portfolio_features, PORTFOLIO_FEATURE_DEFAULTS)
+            size = self._batch_size(protocol, portfolio)
+            protocol = {k: np.broadcast_to(v, size)[np.newaxis, :] for k, v in protocol.items()}
+            portfolio = {k: np.broadcast_to(v, size)[np.newaxis, :] for k, v in portfolio.items()}
+            if protocol_ids is not None and len(protocol_ids) != size[0]:
+                raise ValueError("protocol_ids must have one entry per protocol")
+            
+            names = list(DEFAULT_STRESS_SHOCKS)
+            grid = np.array(np.meshgrid(*[np.asarray(shocks[n], dtype=np.float64) for n in names], indexing="ij"))
+            grid = grid.reshape(len(names), -1)
+            scenario_count = grid.shape[1]
+            
+            model = self.model
+            scores = np.empty((scenario_count, size[0]))
+            chunk = max(1, settings.STRESS_TEST_MAX_CELLS // size[0])
+            for start in range(0, scenario_count, chunk):
+                shock = {n: grid[i, start:start + chunk, np.newaxis] for i, n in enumerate(names)}
+                shocked_protocol = {
+                    **protocol,
+                    "tvl": protocol["tvl"] * (1.0 - shock["tvl_drawdown"]),
+                    "daily_volume": protocol["daily_volume"] * (1.0 - shock["volume_drawdown"]),
+                    "volatility": protocol["volatility"] * shock["volatility_spike"],
+                    "audit_status": protocol["audit_status"] & (shock["audit_flip"] == 0)
+                }
+                correlation = portfolio["correlation_with_market"]
+                shocked_portfolio = {
+                    **portfolio,
+                    "correlation_with_market": correlation + shock["correlation_breakdown"] * (1.0 - correlation)
+                }
+                scores[start:start + chunk] = model.kernel(shocked_protocol, shocked_portfolio)["overall_risk_score"]
+            
+            return self._summarize_stress_test(scores, grid, names, protocol_ids, top_k, model)
+        except Exception as e:
+            logger.error("Error running stress test", error=str(e))
+            raise
+    
+    def _summarize_stress_test(self, scores: np.ndarray, grid: np.ndarray, names: List[str],
+                               protocol_ids: Optional[List[Any]], top_k: int,
+                               model: RiskModel) -> Dict[str, Any]:
+        """Score distribution per scenario plus the protocols with the worst outcomes"""
+        percentiles = np.percentile(scores, [5, 50, 95], axis=1)
+        level_index = np.searchsorted(np.array(model.threshold_edges), scores, side="left")
+        critical_share = (level_index == len(RISK_LEVELS) - 1).mean(axis=1)
+        
+        scenarios = [
+            {
+                "shocks": {n: (bool(grid[i, s]) if n == "audit_flip" else float(grid[i, s])) for i, n in enumerate(names)},
+                "mean": float(scores[s].mean()),
+                "p5": float(percentiles[0, s]),
+                "median": float(percentiles[1, s]),
+                "p95": float(percentiles[2, s]),
+                "max": float(scores[s].max()),
+                "critical_share": float(critical_share[s])
+            }
+            for s in range(scores.shape[0])
+        ]
+        
+        worst_scores = scores.max(axis=0)
+        worst_scenarios = scores.argmax(axis=0)
+        top = np.argsort(-worst_scores, kind="stable")[:top_k]
+        worst_protocols = [
+            {
+                "protocol": protocol_ids[p] if protocol_ids is not None else int(p),
+                "worst_score": float(worst_scores[p]),
+                "worst_level": str(RISK_LEVELS[model.risk_level_index(float(worst_scores[p]))]),
+                "worst_scenario": int(worst_scenarios[p]),
+                "score_range": float(worst_scores[p] - scores[:, p].min())
+            }
+            for p in top
+        ]
+        
+        histogram, edges = np.histogram(scores, bins=10, range=(0.0, 1.0))
+        return {
+            "scenario_count": int(scores.shape[0]),
+            "protocol_count": int(scores.shape[1]),
+            "scenarios": scenarios,
+            "worst_case_protocols": worst_protocols,
+            "score_distribution": {
+                "bin_edges": edges,
+                "counts": histogram
+            },
+            "model_version": model.version,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    @staticmethod
+    def _to_columns(features: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Convert feature columns to arrays, filling missing columns with defaults"""
+        columns = {}
+        for name, default in defaults.items():
+            dtype = bool if isinstance(default, bool) else np.float64
+            column = np.asarray(features.get(name, default), dtype=dtype)
+            if column.ndim > 1:
+                raise ValueError(f"Feature '{name}' must be one-dimensional")
+            columns[name] = column
+        return columns
+    
+    @staticmethod
+    def _batch_size(*column_sets: Dict[str, np.ndarray]) -> tuple:
+        """Resolve the common batch length; scalar columns broadcast"""
+        lengths = {len(c) for columns in column_sets for c in columns.values() if c.ndim == 1}
+        if len(lengths) > 1:
+            raise ValueError(f"Feature columns have mismatched lengths: {sorted(lengths)}")
+        return (lengths.pop() if lengths else 1,)
+    
     async def _calculate_liquidity_risk(self, protocol_data: Dict[str, Any]) -> float:
         """Calculate liquidity risk based on TVL, volume, and market depth"""
         try:
@@ -79,14 +404,7 @@ class RiskEngine:
             liquidity_ratio = daily_volume / max(tvl, 1) if tvl > 0 else 0
             
             # Risk increases as liquidity ratio decreases
-            if liquidity_ratio > 0.1:
-                risk = 0.1
-            elif liquidity_ratio > 0.05:
-                risk = 0.3
-            elif liquidity_ratio > 0.01:
-                risk = 0.6
-            else:
-                risk = 0.9
+            risk = self.model.liquidity_risk(liquidity_ratio)
             
             return min(risk, 1.0)
         except Exception as e:
@@ -94,13 +412,30 @@ class RiskEngine:
             return 0.5
     
     async def _calculate_market_risk(self, protocol_data: Dict[str, Any], portfolio_data: Dict[str, Any]) -> float:
-        """Calculate market risk based on volatility and correlation"""
+        """Calculate market risk based on volatility and correlation.
+
+        When every position is tracked by the streaming covariance engine, the
+        portfolio's own annualized volatility and market correlation replace
+        the caller-supplied figures.
+        """
         try:
             volatility = protocol_data.get('volatility', 0.5)
             correlation = portfolio_data.get('correlation_with_market', 0.7)
             
+            tracked = self._tracked_positions(portfolio_data.get('positions'))
+            if tracked:
+                market_symbol = covariance_engine.market_symbol
+                moments = covariance_engine.snapshot().portfolio_moments(
+                    *tracked,
+                    market_symbol=market_symbol if covariance_engine.is_ready_for([market_symbol]) else None
+                )
+                volatility = float(np.sqrt(moments["variance"] * 365))
+                if moments["correlation_with_market"] is not None:
+                    correlation = moments["correlation_with_market"]
+            
             # Higher volatility and correlation increase risk
-            market_risk = (volatility * 0.6) + (correlation * 0.4)
+            model = self.model
+            market_risk = (volatility * model.volatility_weight) + (correlation * model.correlation_weight)
             
             return min(market_risk, 1.0)
         except Exception as e:
@@ -114,18 +449,19 @@ class RiskEngine:
             code_quality_score = protocol_data.get('code_quality_score', 0.5)
             time_since_deployment = protocol_data.get('days_since_deployment', 0)
             
-            risk = 0.5  # Base risk
+            model = self.model
+            risk = model.contract_base_risk
             
             if not audit_status:
-                risk += 0.3
+                risk += model.unaudited_penalty
             
-            if code_quality_score < 0.7:
-                risk += 0.2
+            if code_quality_score < model.code_quality_threshold:
+                risk += model.low_quality_penalty
             
-            if time_since_deployment < 30:  # Less than 30 days
-                risk += 0.2
-            elif time_since_deployment > 365:  # More than 1 year
-                risk -= 0.1
+            if time_since_deployment < model.new_deployment_days:
+                risk += model.new_deployment_penalty
+            elif time_since_deployment > model.mature_deployment_days:
+                risk -= model.mature_deployment_discount
             
             return min(max(risk, 0.0), 1.0)
         except Exception as e:
@@ -140,10 +476,11 @@ class RiskEngine:
             decentralization_level = protocol_data.get('decentralization_level', 0.5)
             
             # Lower governance and team scores increase risk
+            model = self.model
             counterparty_risk = 1.0 - (
-                (governance_score * 0.4) +
-                (team_reputation * 0.3) +
-                (decentralization_level * 0.3)
+                (governance_score * model.governance_weight) +
+                (team_reputation * model.team_weight) +
+                (decentralization_level * model.decentralization_weight)
             )
             
             return min(max(counterparty_risk, 0.0), 1.0)
@@ -151,39 +488,114 @@ class RiskEngine:
             logger.error("Error calculating counterparty risk", error=str(e))
             return 0.5
     
+    async def calculate_portfolio_var(self, portfolio_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulate VaR/Expected Shortfall for a portfolio with per-position data.
+
+        Uses historical simulation when ``returns_history`` is given and Monte
+        Carlo otherwise. ``var_confidence`` and ``var_paths`` override the
+        configured confidence level and path count.
+        """
+        positions = portfolio_data.get('positions')
+        if not positions:
+            raise ValueError("portfolio_data.positions is required for simulated VaR")
+        
+        values = [float(p.get('value', 0)) for p in positions]
+        confidence_level = portfolio_data.get('var_confidence', settings.VAR_CONFIDENCE_LEVEL)
+        
+        if portfolio_data.get('returns_history') is not None:
+            return await var_engine.historical_var(
+                values, portfolio_data['returns_history'], confidence_level
+            )
+        
+        return await var_engine.monte_carlo_var(
+            values,
+            self._position_covariance(portfolio_data, positions),
+            expected_returns=[p.get('expected_return', 0.0) / 365 for p in positions],
+            confidence_level=confidence_level,
+            n_paths=portfolio_data.get('var_paths', settings.VAR_DEFAULT_PATHS)
+        )
+    
     async def _calculate_var(self, portfolio_data: Dict[str, Any], risk_score: float) -> Dict[str, float]:
-        """Calculate Value at Risk for different time horizons"""
+        """Calculate Value at Risk for different time horizons.
+
+        Portfolios without position data have nothing to simulate, so they
+        keep the score-based heuristic.
+        """
         try:
-            portfolio_value = portfolio_data.get('total_value', 0)
-            
-            # VaR calculation based on risk score and historical volatility
-            confidence_level = 0.95  # 95% confidence
+            if not portfolio_data.get('positions'):
+                return self._heuristic_var(portfolio_data, risk_score)
             
-            # Simplified VaR calculation (in production, use historical simulation or Monte Carlo)
-            var_1d = portfolio_value * risk_score * 0.05  # 1-day VaR
-            var_7d = portfolio_value * risk_score * 0.15   # 7-day VaR
-            var_30d = portfolio_value * risk_score * 0.30  # 30-day VaR
-            
-            return {
-                "var_1d": var_1d,
-                "var_7d": var_7d,
-                "var_30d": var_30d,
-                "confidence_level": confidence_level
-            }
+            return await self.calculate_portfolio_var(portfolio_data)
         except Exception as e:
             logger.error("Error calculating VaR", error=str(e))
             return {"var_1d": 0, "var_7d": 0, "var_30d": 0, "confidence_level": 0.95}
     
+    def _calculate_risk_attribution(self, portfolio_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Marginal, component and incremental VaR per position (None without positions)"""
+        positions = portfolio_data.get('positions')
+        if not positions:
+            return None
+        try:
+            attribution = var_engine.risk_attribution(
+                [float(p.get('value', 0)) for p in positions],
+                self._position_covariance(portfolio_data, positions),
+                confidence_level=portfolio_data.get('var_confidence', settings.VAR_CONFIDENCE_LEVEL)
+            )
+            attribution["symbols"] = [p.get('symbol') for p in positions]
+            return attribution
+        except Exception as e:
+            logger.error("Error calculating risk attribution", error=str(e))
+            return None
+    
+    def _tracked_positions(self, positions: Optional[List[Dict[str, Any]]]) -> Optional[tuple]:
+        """(symbols, values) if the covariance engine is warmed up for every position"""
+        if not positions or any('symbol' not in p for p in positions):
+            return None
+        symbols = [p['symbol'] for p in positions]
+        if not covariance_engine.is_ready_for(symbols):
+            return None
+        values = [float(p.get('value', 0)) for p in positions]
+        # Weights are value shares: an all-zero portfolio has none
+        if not sum(values):
+            return None
+        return symbols, values
+    
+    def _position_covariance(self, portfolio_data: Dict[str, Any], positions: List[Dict[str, Any]]) -> np.ndarray:
+        """Daily covariance for the positions: explicit matrix, return history, streaming estimate, or volatilities"""
+        if portfolio_data.get('covariance_matrix') is not None:
+            return np.asarray(portfolio_data['covariance_matrix'], dtype=np.float64)
+        
+        if portfolio_data.get('returns_history') is not None:
+            return np.atleast_2d(np.cov(np.asarray(portfolio_data['returns_history'], dtype=np.float64), rowvar=False))
+        
+        tracked = self._tracked_positions(positions)
+        if tracked and not any('volatility' in p for p in positions):
+            return covariance_engine.snapshot().daily_covariance(tracked[0])
+        
+        # Single-index assumption when no correlation matrix is supplied:
+        # assets correlated to the market at rho are correlated to each other at rho^2
+        market_correlation = portfolio_data.get('correlation_with_market', 0.7)
+        return var_engine.covariance_from_volatilities(
+            [p.get('volatility', 0.5) for p in positions],
+            correlation=portfolio_data.get('correlation_matrix'),
+            pairwise_correlation=market_correlation ** 2
+        )
+    
+    def _heuristic_var(self, portfolio_data: Dict[str, Any], risk_score: float) -> Dict[str, float]:
+        """Score-based VaR approximation for portfolios without position data"""
+        portfolio_value = portfolio_data.get('total_value', 0)
+        var_1d, var_7d, var_30d = self.model.var_multipliers
+        
+        return {
+            "var_1d": portfolio_value * risk_score * var_1d,
+            "var_7d": portfolio_value * risk_score * var_7d,
+            "var_30d": portfolio_value * risk_score * var_30d,
+            "confidence_level": 0.95
+        }
+    
     def _get_risk_level(self, risk_score: float) -> str:
         """Convert risk score to risk level"""
-        if risk_score <= self.risk_thresholds["low"]:
-            return "LOW"
-        elif risk_score <= self.risk_thresholds["medium"]:
-            return "MEDIUM"
-        elif risk_score <= self.risk_thresholds["high"]:
-            return "HIGH"
-        else:
-            return "CRITICAL"
+        return str(RISK_LEVELS[self.model.risk_level_index(risk_score)])
     
     def _generate_recommendations(self, overall_risk: float, liquidity_risk: float, 
                                 market_risk: float, smart_contract_risk: float, 
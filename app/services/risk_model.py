@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Callable, Optional
+import numpy as np
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_RISK_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "risk_model.json")
+
+class RiskModel:
+    """Declarative risk model compiled from a versioned config.
+    
+    Parameters are unpacked into plain attributes for the scalar path and
+    bound as closure constants in ``kernel``, a single fused NumPy function
+    that scores whole columns (of any broadcastable shape) at once.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        try:
+            self.config = config
+            self.version = str(config["version"])
+            
+            weights = config["weights"]
+            self.liquidity_weight = float(weights["liquidity_risk"])
+            self.market_weight = float(weights["market_risk"])
+            self.smart_contract_weight = float(weights["smart_contract_risk"])
+            self.counterparty_weight = float(weights["counterparty_risk"])
+            
+            self.liquidity_edges = [float(e) for e in config["liquidity"]["ratio_edges"]]
+            self.liquidity_bucket_risk = [float(r) for r in config["liquidity"]["bucket_risk"]]
+            
+            market = config["market"]
+            self.volatility_weight = float(market["volatility_weight"])
+            self.correlation_weight = float(market["correlation_weight"])
+            
+            contract = config["smart_contract"]
+            self.contract_base_risk = float(contract["base_risk"])
+            self.unaudited_penalty = float(contract["unaudited_penalty"])
+            self.code_quality_threshold = float(contract["code_quality_threshold"])
+            self.low_quality_penalty = float(contract["low_quality_penalty"])
+            self.new_deployment_days = float(contract["new_deployment_days"])
+            self.new_deployment_penalty = float(contract["new_deployment_penalty"])
+            self.mature_deployment_days = float(contract["mature_deployment_days"])
+            self.mature_deployment_discount = float(contract["mature_deployment_discount"])
+            
+            counterparty = config["counterparty"]
+            self.governance_weight = float(counterparty["governance_weight"])
+            self.team_weight = float(counterparty["team_weight"])
+            self.decentralization_weight = float(counterparty["decentralization_weight"])
+            
+            self.thresholds = {k: float(v) for k, v in config["thresholds"].items()}
+            self.threshold_edges = [self.thresholds["low"], self.thresholds["medium"], self.thresholds["high"]]
+            
+            multipliers = config["var_multipliers"]
+            self.var_multipliers = (
+                float(multipliers["var_1d"]),
+                float(multipliers["var_7d"]),
+                float(multipliers["var_30d"])
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid risk model config: {e!r}") from e
+        
+        self._validate()
+        self.kernel = self._compile()
+    
+    def _validate(self):
+        weights = (self.liquidity_weight, self.market_weight, self.smart_contract_weight, self.counterparty_weight)
+        if min(weights) < 0 or abs(sum(weights) - 1.0) > 1e-6:
+            raise ValueError("Risk model weights must be non-negative and sum to 1")
+        if self.liquidity_edges != sorted(set(self.liquidity_edges)):
+            raise ValueError("Liquidity ratio edges must be strictly increasing")
+        if len(self.liquidity_bucket_risk) != len(self.liquidity_edges) + 1:
+            raise ValueError("Liquidity buckets need exactly one risk value more than edges")
+        if not all(0.0 <= r <= 1.0 for r in self.liquidity_bucket_risk):
+            raise ValueError("Liquidity bucket risk values must lie in [0, 1]")
+        if self.threshold_edges != sorted(set(self.threshold_edges)):
+            raise ValueError("Risk thresholds must be strictly increasing (low < medium < high)")
+    
+    def liquidity_risk(self, liquidity_ratio: float) -> float:
+        """Bucket risk for a scalar ratio; the bucket counts edges strictly below it"""
+        return self.liquidity_bucket_risk[bisect_left(self.liquidity_edges, liquidity_ratio)]
+    
+    def risk_level_index(self, risk_score: float) -> int:
+        return bisect_left(self.threshold_edges, risk_score)
+    
+    def _compile(self) -> Callable[[Dict[str, np.ndarray], Dict[str, np.ndarray]], Dict[str, np.ndarray]]:
+        """Bind every parameter as a local constant and return the fused scoring function"""
+        w_liquidity, w_market = self.liquidity_weight, self.market_weight
+        w_contract, w_counterparty = self.smart_contract_weight, self.counterparty_weight
+        liquidity_edges = np.array(self.liquidity_edges)
+        bucket_risk = np.array(self.liquidity_bucket_risk)
+        volatility_weight, correlation_weight = self.volatility_weight, self.correlation_weight
+        base_risk, unaudited_penalty = self.contract_base_risk, self.unaudited_penalty
+        quality_threshold, quality_penalty = self.code_quality_threshold, self.low_quality_penalty
+        new_days, new_penalty = self.new_deployment_days, self.new_deployment_penalty
+        mature_days, mature_discount = self.mature_deployment_days, self.mature_deployment_discount
+        governance_weight, team_weight = self.governance_weight, self.team_weight
+        decentralization_weight = self.decentralization_weight
+        threshold_edges = np.array(self.threshold_edges)
+        var_1d, var_7d, var_30d = self.var_multipliers
+        
+        def kernel(protocol: Dict[str, np.ndarray], portfolio: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+            # Operation order mirrors the scalar helpers so results are bit-identical
+            tvl = protocol["tvl"]
+            liquidity_ratio = np.where(tvl > 0, protocol["daily_volume"] / np.maximum(tvl, 1), 0.0)
+            liquidity = bucket_risk[np.searchsorted(liquidity_edges, liquidity_ratio, side="left")]
+            
+            market = np.minimum(
+                (protocol["volatility"] * volatility_weight) +
+                (portfolio["correlation_with_market"] * correlation_weight),
+                1.0
+            )
+            
+            days = protocol["days_since_deployment"]
+            contract = base_risk + np.where(protocol["audit_status"], 0.0, unaudited_penalty)
+            contract = contract + np.where(protocol["code_quality_score"] < quality_threshold, quality_penalty, 0.0)
+            contract = np.where(days < new_days, contract + new_penalty,
+                                np.where(days > mature_days, contract - mature_discount, contract))
+            contract = np.clip(contract, 0.0, 1.0)
+            
+            counterparty = np.clip(1.0 - (
+                (protocol["governance_score"] * governance_weight) +
+                (protocol["team_reputation"] * team_weight) +
+                (protocol["decentralization_level"] * decentralization_weight)
+            ), 0.0, 1.0)
+            
+            overall = (
+                liquidity * w_liquidity +
+                market * w_market +
+                contract * w_contract +
+                counterparty * w_counterparty
+            )
+            
+            value = portfolio["total_value"]
+            return {
+                "liquidity_risk": liquidity,
+                "market_risk": market,
+                "smart_contract_risk": contract,
+                "counterparty_risk": counterparty,
+                "overall_risk_score": overall,
+                "risk_level_index": np.searchsorted(threshold_edges, overall, side="left"),
+                "var_1d": value * overall * var_1d,
+                "var_7d": value * overall * var_7d,
+                "var_30d": value * overall * var_30d
+            }
+        
+        return kernel
+
+class RiskModelRegistry:
+    """Loads the risk model file and hot-swaps the compiled model when it changes"""
+    
+    def __init__(self, path: Optional[str] = None, reload_interval: float = 5.0):
+        self.path = path or DEFAULT_RISK_MODEL_PATH
+        self.reload_interval = reload_interval
+        self._model: Optional[RiskModel] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[RiskModel], None]] = []
+        self.reload(force=True)
+    
+    @property
+    def model(self) -> RiskModel:
+        # A single attribute read: callers always see one complete model
+        return self._model
+    
+    def add_listener(self, callback: Callable[[RiskModel], None]):
+        """Register a callback invoked with the new model after every swap"""
+        self._listeners.append(callback)
+    
+    def maybe_reload(self):
+        """Cheap check, at most once per ``reload_interval``, for a changed model file"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error("Risk model reload failed, keeping current model",
+                         path=self.path, version=self._model.version, error=str(e))
+    
+    def reload(self, force: bool = False) -> bool:
+        """Compile the model file and swap it in; returns True if a new model was installed"""
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime
+            if not force and mtime == self._mtime:
+                return False
+            
+            with open(self.path) as f:
+                model = RiskModel(json.load(f))
+            
+            # Recorded only once the file compiled, so a broken file is retried
+            # (and reported) until it is fixed
+            self._mtime = mtime
+            previous = self._model
+            self._model = model
+        
+        logger.info("Risk model loaded", path=self.path, version=model.version,
+                    previous_version=previous.version if previous else None)
+        for callback in self._listeners:
+            try:
+                callback(model)
+            except Exception as e:
+                logger.error("Risk model listener failed", error=str(e))
+        return True
+
+risk_model_registry = RiskModelRegistry(settings.RISK_MODEL_PATH, settings.RISK_MODEL_RELOAD_SECONDS)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+from prometheus_client import Counter
+from app.core.config import settings
+from app.services.single_flight import SingleFlight
+import structlog
+
+logger = structlog.get_logger()
+
+RPC_CACHE_HITS = Counter("rpc_cache_hits_total", "RPC response cache hits", ["tier"])
+RPC_CACHE_MISSES = Counter("rpc_cache_misses_total", "RPC response cache misses", ["tier"])
+HEAD_FETCHES = Counter("rpc_head_fetches_total", "Chain head lookups sent to the provider", ["chain"])
+
+# Typical block interval per chain; a cached head is trusted for this long
+CHAIN_BLOCK_TIMES = {
+    "ethereum": 12.0,
+    "polygon": 2.0,
+    "bsc": 3.0,
+    "arbitrum": 0.25,
+}
+DEFAULT_BLOCK_TIME = 2.0
+
+class RpcResponseCache:
+    """Tiered cache for RPC responses.
+    
+    * immutable: data that can never change (deployed bytecode), persisted
+      to SQLite so it survives restarts, with the most recently used
+      ``max_immutable_entries`` also held in memory
+    * per-block: state read at a specific block (balances), keyed by
+      ``(chain, block_number)`` and dropped as soon as a newer head is seen
+    * head: one ``eth_blockNumber`` lookup per chain per block interval, with
+      concurrent callers sharing the in-flight request
+    """
+    
+    def __init__(self, path: Optional[str] = None, block_times: Optional[Dict[str, float]] = None,
+                 max_immutable_entries: int = 10000):
+        self.path = path
+        self.block_times = block_times or CHAIN_BLOCK_TIMES
+        self.max_immutable_entries = max_immutable_entries
+        self._immutable: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        # chain -> (block_number, {key: value})
+        self._per_block: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        # chain -> (block_number, trusted_until)
+        self._heads: Dict[str, Tuple[int, float]] = {}
+        self._head_requests = SingleFlight()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Opened on first use so importing the module never touches the disk
+        if self._db is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS immutable ("
+                "chain TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (chain, kind, key))"
+            )
+            self._db.commit()
+        return self._db
+    
+    async def get_immutable(self, chain: str, kind: str, key: str) -> Optional[Any]:
+        cache_key = (chain, kind, key)
+        if cache_key in self._immutable:
+            RPC_CACHE_HITS.labels(tier="immutable").inc()
+            self._immutable.move_to_end(cache_key)
+            return self._immutable[cache_key]
+        
+        # SQLite blocks; only the in-memory tier is read on the event loop
+        value = await asyncio.to_thread(self._read_immutable, cache_key)
+        if value is None:
+            RPC_CACHE_MISSES.labels(tier="immutable").inc()
+        else:
+            RPC_CACHE_HITS.labels(tier="immutable").inc()
+            self._remember(cache_key, value)
+        return value
+    
+    async def put_immutable(self, chain: str, kind: str, key: str, value: Any):
+        cache_key = (chain, kind, key)
+        if self._immutable.get(cache_key) == value:
+            return
+        self._remember(cache_key, value)
+        await asyncio.to_thread(self._write_immutable, cache_key, value)
+    
+    def _read_immutable(self, cache_key: Tuple[str, str, str]) -> Optional[Any]:
+        try:
+            with self._db_lock:
+                db = self._connection()
+                row = db.execute(
+                    "SELECT value FROM immutable WHERE chain = ? AND kind = ? AND key = ?", cache_key
+                ).fetchone() if db else None
+            return json.loads(row[0]) if row is not None else None
+        except sqlite3.Error as e:
+            logger.warning("RPC cache read failed", path=self.path, error=str(e))
+            return None
+    
+    def _write_immutable(self, cache_key: Tuple[str, str, str], value: Any):
+        try:
+            with self._db_lock:
+                db = self._connection()
+                if db:
+                    db.execute("INSERT OR REPLACE INTO immutable VALUES (?, ?, ?, ?)", (*cache_key, json.dumps(value)))
+                    db.commit()
+        except sqlite3.Error as e:
+            logger.warning("RPC cache write failed", path=self.path, error=str(e))
+    
+    def _remember(self, cache_key: Tuple[str, str, str], value: Any):
+        self._immutable[cache_key] = value
+        self._immutable.move_to_end(cache_key)
+        if len(self._immutable) > self.max_immutable_entries:
+            self._immutable.popitem(last=False)
+    
+    def get_at_block(self, chain: str, block_number: int, key: str) -> Optional[Any]:
+        entry = self._per_block.get(chain)
+        if entry is not None and entry[0] == block_number and key in entry[1]:
+            RPC_CACHE_HITS.labels(tier="block").inc()
+            return entry[1][key]
+        RPC_CACHE_MISSES.labels(tier="block").inc()
+        return None
+    
+    def put_at_block(self, chain: str, block_number: int, key: str, value: Any):
+        entry = self._per_block.get(chain)
+        if entry is None or block_number > entry[0]:
+            # A newer block invalidates everything read at the previous one
+            entry = (block_number, {})
+            self._per_block[chain] = entry
+        if entry[0] == block_number:
+            entry[1][key] = value
+    
+    def observe_head(self, chain: str, block_number: int):
+        """Record a head seen by any means (poll, subscription, RPC reply)"""
+        current = self._heads.get(chain)
+        if current is None or block_number >= current[0]:
+            self._heads[chain] = (block_number, time.monotonic() + self.block_times.get(chain, DEFAULT_BLOCK_TIME))
+        entry = self._per_block.get(chain)
+        if entry is not None and block_number > entry[0]:
+            del self._per_block[chain]
+    
+    async def get_block_number(self, chain: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        """Current head for ``chain``, fetching at most once per block interval"""
+        head = self._heads.get(chain)
+        if head is not None and head[1] > time.monotonic():
+            return head[0]
+        
+        async def fetch_head() -> int:
+            HEAD_FETCHES.labels(chain=chain).inc()
+            block_number = await fetch()
+            self.observe_head(chain, block_number)
+            return block_number
+        
+        # The fetch runs as its own task, so a caller that times out or is
+        # cancelled does not take the lookup down for the others
+        return await self._head_requests.do("block_number", chain, fetch_head)
+    
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+rpc_cache = RpcResponseCache(settings.RPC_CACHE_PATH, max_immutable_entries=settings.RPC_CACHE_IMMUTABLE_MAX_ENTRIES)
@@ -0,0 +1,117 @@
+import asyncio
+import itertools
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+import aiohttp
+import structlog
+
+logger = structlog.get_logger()
+
+class RpcError(Exception):
+    """Error object returned by a JSON-RPC endpoint"""
+    
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+class JsonRpcClient:
+    """Async JSON-RPC 2.0 client over a pooled keep-alive aiohttp session"""
+    
+    def __init__(self, url: str, timeout: float = 10.0, max_connections: int = 100,
+                 keepalive_timeout: float = 30.0, max_batch_size: int = 100):
+        self.url = url
+        self.max_batch_size = max_batch_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created on first use: aiohttp sessions must be bound to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"}
+            )
+        return self._session
+    
+    async def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """Send a single request and return its ``result``; raises RpcError on error replies"""
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        response = await self._post(payload)
+        if not isinstance(response, dict):
+            raise RpcError(-32603, f"Malformed response to {method}")
+        return self._unwrap(response)
+    
+    async def batch(self, calls: Sequence[Tuple[str, Optional[List[Any]]]],
+                    max_batch_size: Optional[int] = None) -> List[Union[Any, RpcError]]:
+        """Send ``(method, params)`` calls as JSON-RPC batches, in order.
+        
+        Calls are split into chunks of at most ``max_batch_size`` (the provider
+        limit) that are posted concurrently. Each slot of the returned list holds
+        either the call's result or the ``RpcError`` it failed with.
+        """
+        size = max_batch_size or self.max_batch_size
+        chunks = [calls[i:i + size] for i in range(0, len(calls), size)]
+        tasks = [asyncio.ensure_future(self._post_batch(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed chunk fails the batch; don't leave its siblings running
+            for task in tasks:
+                task.cancel()
+            raise
+        return [result for chunk in results for result in chunk]
+    
+    async def _post_batch(self, calls: Sequence[Tuple[str, Optional[List[Any]]]]) -> List[Union[Any, RpcError]]:
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or []}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        response = await self._post(payload)
+        if isinstance(response, dict):
+            # Some providers answer an oversized or rejected batch with a single error object
+            self._unwrap(response)
+            raise RpcError(-32603, "Malformed batch response")
+        if not isinstance(response, list):
+            raise RpcError(-32603, "Malformed batch response")
+        
+        # Batch replies may arrive in any order; match them back by id
+        by_id = {item.get("id"): item for item in response if isinstance(item, dict)}
+        results = []
+        for request_id, (method, _) in zip(ids, calls):
+            item = by_id.get(request_id)
+            if item is None:
+                results.append(RpcError(-32603, f"Missing response to {method}"))
+                continue
+            try:
+                results.append(self._unwrap(item))
+            except RpcError as e:
+                results.append(e)
+        return results
+    
+    async def _post(self, payload: Any) -> Any:
+        async with self._get_session().post(self.url, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    @staticmethod
+    def _unwrap(response: Dict[str, Any]) -> Any:
+        error = response.get("error")
+        if error:
+            raise RpcError(error.get("code", -32603), error.get("message", "Unknown error"), error.get("data"))
+        return response.get("result")
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
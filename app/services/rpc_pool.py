@@ -0,0 +1,247 @@
+import asyncio
+import time
+from collections import deque
+from typing import List, Any, Awaitable, Callable, Optional, Sequence, Tuple, Union
+from urllib.parse import urlparse
+import aiohttp
+from prometheus_client import Counter, Gauge
+from app.services.rpc_client import JsonRpcClient, RpcError
+import structlog
+
+logger = structlog.get_logger()
+
+ENDPOINT_REQUESTS = Counter(
+    "rpc_endpoint_requests_total", "Requests sent to an RPC endpoint", ["chain", "endpoint", "outcome"]
+)
+ENDPOINT_LATENCY = Gauge(
+    "rpc_endpoint_latency_ewma_seconds", "EWMA latency of an RPC endpoint", ["chain", "endpoint"]
+)
+CIRCUIT_OPENED = Counter(
+    "rpc_circuit_opened_total", "Times an RPC endpoint circuit breaker opened", ["chain", "endpoint"]
+)
+HEDGED_REQUESTS = Counter(
+    "rpc_hedged_requests_total", "Reads that fired a hedge request", ["chain"]
+)
+
+# Failures of the endpoint itself; JSON-RPC error replies are answers, not outages.
+# ValueError covers a 200 whose body is not JSON (json.JSONDecodeError), e.g. a proxy error page
+TRANSPORT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError)
+
+# Never sent twice: a hedge or failover could broadcast the same transaction again
+NON_IDEMPOTENT_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+class NoHealthyEndpointError(ConnectionError):
+    """Every endpoint of a chain is failing or held open by its circuit breaker"""
+
+class RpcEndpoint:
+    """One provider URL with latency tracking and a circuit breaker"""
+    
+    def __init__(self, chain: str, client: JsonRpcClient, ewma_alpha: float = 0.2,
+                 failure_threshold: int = 5, cooldown_seconds: float = 30.0, window: int = 200):
+        self.chain = chain
+        self.client = client
+        # Host and port only: provider URLs often embed API keys in the path
+        parsed = urlparse(client.url)
+        self.name = f"{parsed.hostname}:{parsed.port}" if parsed.port else (parsed.hostname or "unknown")
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.latency_ewma: Optional[float] = None
+        self._latencies: deque = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self._trial_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        if self.consecutive_failures < self.failure_threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+    
+    def is_available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_in_flight)
+    
+    def allow_request(self) -> bool:
+        """Claim a request slot; a half-open breaker lets exactly one trial through"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self.ewma_alpha * (seconds - self.latency_ewma)
+        ENDPOINT_LATENCY.labels(chain=self.chain, endpoint=self.name).set(self.latency_ewma)
+    
+    def record_success(self, seconds: float):
+        self.record_latency(seconds)
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+        ENDPOINT_REQUESTS.labels(chain=self.chain, endpoint=self.name, outcome="success").inc()
+    
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        ENDPOINT_REQUESTS.labels(chain=self.chain, endpoint=self.name, outcome="failure").inc()
+        if self.consecutive_failures >= self.failure_threshold:
+            if self.open_until <= time.monotonic():
+                CIRCUIT_OPENED.labels(chain=self.chain, endpoint=self.name).inc()
+                logger.warning("RPC endpoint circuit opened", chain=self.chain, endpoint=self.name,
+                               failures=self.consecutive_failures)
+            self.open_until = time.monotonic() + self.cooldown_seconds
+    
+    def record_cancelled(self, seconds: float):
+        # A hedge loser was at least this slow; without it a stalled endpoint keeps a good EWMA
+        self.record_latency(seconds)
+        self._trial_in_flight = False
+        ENDPOINT_REQUESTS.labels(chain=self.chain, endpoint=self.name, outcome="cancelled").inc()
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+class RpcEndpointPool:
+    """Routes JSON-RPC calls for one chain across several endpoints.
+    
+    Requests go to the available endpoint with the lowest EWMA latency and fail
+    over on transport errors. Endpoints that keep failing are skipped by their
+    circuit breaker until a cooldown passes. Reads can be hedged: if the primary
+    has not answered after its latency quantile, the next endpoint is asked too
+    and the first answer wins. Drop-in for ``JsonRpcClient`` (call/batch/close).
+    """
+    
+    def __init__(self, chain: str, urls: Sequence[str], timeout: float = 10.0, max_connections: int = 100,
+                 keepalive_timeout: float = 30.0, max_batch_size: int = 100, hedge: bool = False,
+                 hedge_quantile: float = 0.95, hedge_min_delay: float = 0.05,
+                 failure_threshold: int = 5, cooldown_seconds: float = 30.0):
+        if not urls:
+            raise ValueError(f"No RPC endpoints configured for {chain}")
+        self.chain = chain
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.endpoints = [
+            RpcEndpoint(
+                chain,
+                JsonRpcClient(url, timeout=timeout, max_connections=max_connections,
+                              keepalive_timeout=keepalive_timeout, max_batch_size=max_batch_size),
+                failure_threshold=failure_threshold,
+                cooldown_seconds=cooldown_seconds
+            )
+            for url in urls
+        ]
+    
+    @property
+    def url(self) -> str:
+        return self.endpoints[0].client.url
+    
+    def ranked(self) -> List[RpcEndpoint]:
+        """Available endpoints, fastest first; unmeasured endpoints are tried first"""
+        available = [e for e in self.endpoints if e.is_available()]
+        return sorted(available, key=lambda e: e.latency_ewma or 0.0)
+    
+    async def call(self, method: str, params: Optional[List[Any]] = None, hedge: Optional[bool] = None) -> Any:
+        hedge = self.hedge if hedge is None else hedge
+        
+        async def operation(client: JsonRpcClient) -> Any:
+            return await client.call(method, params)
+        
+        candidates = self.ranked()
+        if hedge and len(candidates) > 1 and method not in NON_IDEMPOTENT_METHODS:
+            return await self._hedged(candidates, operation)
+        if method in NON_IDEMPOTENT_METHODS:
+            candidates = candidates[:1]
+        return await self._with_failover(candidates, operation)
+    
+    async def batch(self, calls: Sequence[Tuple[str, Optional[List[Any]]]],
+                    max_batch_size: Optional[int] = None) -> List[Union[Any, RpcError]]:
+        async def operation(client: JsonRpcClient) -> List[Union[Any, RpcError]]:
+            return await client.batch(calls, max_batch_size)
+        
+        return await self._with_failover(self.ranked(), operation)
+    
+    async def _attempt(self, endpoint: RpcEndpoint, operation: Callable[[JsonRpcClient], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await operation(endpoint.client)
+        except RpcError:
+            endpoint.record_success(time.perf_counter() - start)
+            raise
+        except TRANSPORT_ERRORS as e:
+            endpoint.record_failure()
+            logger.warning("RPC endpoint request failed", chain=self.chain, endpoint=endpoint.name,
+                           error=str(e) or type(e).__name__)
+            raise
+        except asyncio.CancelledError:
+            endpoint.record_cancelled(time.perf_counter() - start)
+            raise
+        except Exception as e:
+            # Not retried elsewhere, but still counted so a half-open trial is always released
+            endpoint.record_failure()
+            logger.error("RPC endpoint request raised", chain=self.chain, endpoint=endpoint.name,
+                         error=str(e) or type(e).__name__)
+            raise
+        endpoint.record_success(time.perf_counter() - start)
+        return result
+    
+    async def _with_failover(self, candidates: List[RpcEndpoint],
+                             operation: Callable[[JsonRpcClient], Awaitable[Any]]) -> Any:
+        last_error: Optional[BaseException] = None
+        for endpoint in candidates:
+            if not endpoint.allow_request():
+                continue
+            try:
+                return await self._attempt(endpoint, operation)
+            except TRANSPORT_ERRORS as e:
+                last_error = e
+        if last_error is not None:
+            raise last_error
+        raise NoHealthyEndpointError(f"No healthy RPC endpoint for {self.chain}")
+    
+    async def _hedged(self, candidates: List[RpcEndpoint],
+                      operation: Callable[[JsonRpcClient], Awaitable[Any]]) -> Any:
+        primary, backups = candidates[0], candidates[1:]
+        if not primary.allow_request():
+            return await self._with_failover(backups, operation)
+        
+        quantile = primary.quantile(self.hedge_quantile)
+        delay = max(self.hedge_min_delay, quantile if quantile is not None else self.hedge_min_delay)
+        tasks = [asyncio.ensure_future(self._attempt(primary, operation))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done and not isinstance(tasks[0].exception(), TRANSPORT_ERRORS):
+                return tasks[0].result()
+            if not done:
+                HEDGED_REQUESTS.labels(chain=self.chain).inc()
+            tasks.append(asyncio.ensure_future(self._with_failover(backups, operation)))
+            
+            pending = {task for task in tasks if not task.done()}
+            last_error: Optional[BaseException] = tasks[0].exception() if tasks[0].done() else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    # A result or a JSON-RPC error reply is a definitive answer
+                    if not isinstance(error, TRANSPORT_ERRORS):
+                        return task.result()
+                    # An actual endpoint failure explains more than "no backup was available"
+                    if last_error is None or isinstance(last_error, NoHealthyEndpointError):
+                        last_error = error
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
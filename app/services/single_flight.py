@@ -0,0 +1,46 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Hashable
+from prometheus_client import Counter
+import structlog
+
+logger = structlog.get_logger()
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Calls entering single-flight coalescing", ["operation"]
+)
+SINGLE_FLIGHT_COLLAPSED = Counter(
+    "single_flight_collapsed_total", "Calls served by an identical call already in flight", ["operation"]
+)
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one in-flight execution.
+    
+    The first caller for a key starts the work as its own task; callers
+    arriving while it runs await the same task and receive its result or
+    exception. Cancelling one waiter does not cancel the shared work.
+    """
+    
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def do(self, operation: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        SINGLE_FLIGHT_CALLS.labels(operation=operation).inc()
+        flight_key = (operation, key)
+        task = self._in_flight.get(flight_key)
+        if task is not None:
+            SINGLE_FLIGHT_COLLAPSED.labels(operation=operation).inc()
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[flight_key] = task
+            task.add_done_callback(lambda t: self._finish(flight_key, t))
+        return await asyncio.shield(task)
+    
+    def _finish(self, flight_key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+        # Retrieve the exception so a failure nobody awaited does not warn
+        if not task.cancelled():
+            task.exception()
+    
+    def in_flight(self) -> int:
+        return len(self._in_flight)
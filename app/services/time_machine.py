@@ -1,6 +1,6 @@
 import asyncio
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
 from datetime import datetime, timedelta
 import structlog
 
@@ -13,13 +13,19 @@ class TimeMachine:
         self.historical_data_years = 10
         self.backtesting_accuracy = 1.0  # Perfect historical accuracy
         
-    async def time_travel_backtest(self, strategy: Dict[str, Any], years_back: int = 5) -> Dict[str, Any]:
-        """Travel back in time and test your strategy with PERFECT historical data"""
+    async def time_travel_backtest(self, strategy: Dict[str, Any], years_back: int = 5,
+                                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Travel back in time and test your strategy with PERFECT historical data
+        
+        ``progress`` is called after each simulated year.
+        """
         
         results = []
         for year in range(years_back):
             year_result = await self._test_strategy_in_year(strategy, year)
             results.append(year_result)
+            if progress:
+                progress({'years_completed': year + 1, 'total_years': years_back, 'year': year_result['year']})
         
         # Calculate performance metrics
         total_return = np.prod([1 + r['return'] for r in results]) - 1
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+REGISTRY_LOOKUPS = Counter("token_registry_lookups_total", "Token metadata lookups", ["result"])
+REGISTRY_SIZE = Gauge("token_registry_tokens", "Tokens held in the token registry")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    chain TEXT NOT NULL,
+    address TEXT NOT NULL,
+    decimals INTEGER NOT NULL,
+    symbol TEXT,
+    name TEXT,
+    is_proxy INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (chain, address)
+)
+"""
+
+class TokenRegistry:
+    """Token metadata (decimals, symbol, name, proxy flag) keyed by chain and address.
+    
+    The whole table is loaded into memory at startup, so lookups never touch
+    the disk; tokens seen for the first time are written through to SQLite
+    and are known to every later process. Addresses that failed the ERC-20
+    probe are remembered in memory for ``negative_ttl`` seconds so they are
+    not probed again on every request.
+    """
+    
+    def __init__(self, path: Optional[str] = None, mmap_bytes: int = 64 * 1024 * 1024,
+                 negative_ttl: float = 300.0, max_rejected: int = 10000):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self.negative_ttl = negative_ttl
+        self.max_rejected = max_rejected
+        self._tokens: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # (chain, address) -> monotonic time the failed probe stops counting
+        self._rejected: Dict[Tuple[str, str], float] = {}
+        self._loaded = False
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._db.execute(SCHEMA)
+            self._db.commit()
+        return self._db
+    
+    def load(self) -> int:
+        """Warm the in-memory table from disk; returns the number of tokens known"""
+        try:
+            with self._lock:
+                db = self._connection()
+                rows = db.execute(
+                    "SELECT chain, address, decimals, symbol, name, is_proxy FROM tokens"
+                ).fetchall() if db else []
+            for chain, address, decimals, symbol, name, is_proxy in rows:
+                # Tokens put while the table was loading are newer than their row
+                self._tokens.setdefault((chain, address), {
+                    "decimals": decimals, "symbol": symbol, "name": name, "is_proxy": bool(is_proxy)
+                })
+        except sqlite3.Error as e:
+            logger.warning("Token registry load failed", path=self.path, error=str(e))
+        self._loaded = True
+        REGISTRY_SIZE.set(len(self._tokens))
+        logger.info("Token registry loaded", path=self.path, tokens=len(self._tokens))
+        return len(self._tokens)
+    
+    async def get(self, chain: str, address: str) -> Optional[Dict[str, Any]]:
+        """Metadata for a lower-cased ``address``, or None if the token is unknown"""
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+        metadata = self._tokens.get((chain, address))
+        REGISTRY_LOOKUPS.labels(result="hit" if metadata is not None else "miss").inc()
+        return metadata
+    
+    async def put(self, chain: str, address: str, decimals: int, symbol: Optional[str] = None,
+                  name: Optional[str] = None, is_proxy: bool = False) -> Dict[str, Any]:
+        metadata = {"decimals": decimals, "symbol": symbol, "name": name, "is_proxy": is_proxy}
+        self._rejected.pop((chain, address), None)
+        if self._tokens.get((chain, address)) == metadata:
+            return metadata
+        self._tokens[(chain, address)] = metadata
+        REGISTRY_SIZE.set(len(self._tokens))
+        # The commit blocks; the in-memory entry already serves lookups meanwhile
+        await asyncio.to_thread(self._write, (chain, address, decimals, symbol, name, int(is_proxy), int(time.time())))
+        return metadata
+    
+    def _write(self, row: Tuple[Any, ...]):
+        try:
+            with self._lock:
+                db = self._connection()
+                if db:
+                    db.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                    db.commit()
+        except sqlite3.Error as e:
+            logger.warning("Token registry write failed", path=self.path, error=str(e))
+    
+    def reject(self, chain: str, address: str):
+        """Remember that ``address`` failed the ERC-20 probe for ``negative_ttl`` seconds"""
+        key = (chain, address)
+        self._rejected.pop(key, None)
+        self._rejected[key] = time.monotonic() + self.negative_ttl
+        if len(self._rejected) > self.max_rejected:
+            # Oldest first: insertion order is expiry order
+            self._rejected.pop(next(iter(self._rejected)))
+    
+    def is_rejected(self, chain: str, address: str) -> bool:
+        expires = self._rejected.get((chain, address))
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._rejected[(chain, address)]
+            return False
+        REGISTRY_LOOKUPS.labels(result="rejected").inc()
+        return True
+    
+    def __len__(self) -> int:
+        return len(self._tokens)
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+token_registry = TokenRegistry(settings.TOKEN_REGISTRY_PATH, negative_ttl=settings.TOKEN_REGISTRY_NEGATIVE_TTL_SECONDS)
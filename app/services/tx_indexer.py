@@ -0,0 +1,315 @@
+import asyncio
+import heapq
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from app.core.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+INDEXED_BLOCKS = Counter("tx_indexer_blocks_total", "Blocks ingested by the transaction indexer", ["chain"])
+INDEXED_ROWS = Counter("tx_indexer_rows_total", "Rows written by the transaction indexer", ["chain", "kind"])
+INDEX_CHECKPOINT = Gauge("tx_indexer_checkpoint_block", "Last contiguously indexed block", ["chain"])
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    chain TEXT NOT NULL,
+    hash BLOB NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_index INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    from_address BLOB NOT NULL,
+    to_address BLOB,
+    value TEXT NOT NULL,
+    gas INTEGER NOT NULL,
+    selector BLOB,
+    PRIMARY KEY (chain, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_from
+    ON transactions (chain, from_address, block_number DESC, tx_index DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_to
+    ON transactions (chain, to_address, block_number DESC, tx_index DESC);
+CREATE TABLE IF NOT EXISTS token_transfers (
+    chain TEXT NOT NULL,
+    tx_hash BLOB NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    token_address BLOB NOT NULL,
+    from_address BLOB NOT NULL,
+    to_address BLOB NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (chain, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_transfers_from
+    ON token_transfers (chain, from_address, block_number DESC, log_index DESC);
+CREATE INDEX IF NOT EXISTS idx_transfers_to
+    ON token_transfers (chain, to_address, block_number DESC, log_index DESC);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    chain TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+"""
+
+def _bytes(hex_value: Optional[str]) -> Optional[bytes]:
+    return bytes.fromhex(hex_value[2:]) if hex_value else None
+
+def _hex(value: Optional[bytes]) -> Optional[str]:
+    return "0x" + value.hex() if value is not None else None
+
+class TransactionIndexer:
+    """Local transaction and ERC-20 transfer index backed by SQLite.
+    
+    Addresses and hashes are stored as raw bytes, and every table has
+    per-address B-tree indexes ordered by block, so a history query is an
+    index seek plus ``limit`` rows. Block ranges are fetched concurrently
+    in chunks; the checkpoint only advances over contiguous completed
+    chunks, so an interrupted run resumes without gaps.
+    """
+    
+    def __init__(self, path: str, blocks_per_chunk: int = 20, max_concurrency: int = 4):
+        self.path = path
+        self.blocks_per_chunk = blocks_per_chunk
+        self.max_concurrency = max_concurrency
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+    
+    def get_checkpoint(self, chain: str) -> Optional[int]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT last_block FROM checkpoints WHERE chain = ?", (chain,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _set_checkpoint(self, db: sqlite3.Connection, chain: str, block_number: int):
+        db.execute(
+            "INSERT INTO checkpoints VALUES (?, ?) ON CONFLICT(chain) DO UPDATE SET last_block = excluded.last_block",
+            (chain, block_number)
+        )
+        INDEX_CHECKPOINT.labels(chain=chain).set(block_number)
+    
+    async def index_range(self, chain: str, client: Any, start_block: int, end_block: int,
+                          update_checkpoint: bool = True) -> int:
+        """Ingest blocks ``start_block..end_block`` (inclusive) with bounded concurrency.
+        
+        ``client`` is anything with the JsonRpcClient ``call``/``batch`` interface.
+        Returns the number of blocks indexed.
+        """
+        if end_block < start_block:
+            return 0
+        
+        # Generated on demand: a long backfill never holds more than max_concurrency chunks in flight
+        chunks = (
+            (first, min(first + self.blocks_per_chunk - 1, end_block))
+            for first in range(start_block, end_block + 1, self.blocks_per_chunk)
+        )
+        done: Dict[int, int] = {}
+        next_start = start_block
+        
+        async def run(first: int, last: int):
+            blocks, logs = await self._fetch_chunk(client, first, last)
+            
+            def write():
+                nonlocal next_start
+                # The lock serializes chunk writes and the checkpoint bookkeeping
+                with self._lock:
+                    db = self._connection()
+                    with db:
+                        self._store(db, chain, blocks, logs)
+                        done[first] = last
+                        if update_checkpoint:
+                            # Advance only across contiguous completed chunks
+                            advanced = None
+                            while next_start in done:
+                                advanced = done.pop(next_start)
+                                next_start = advanced + 1
+                            if advanced is not None:
+                                self._set_checkpoint(db, chain, advanced)
+            
+            # SQLite blocks; keep decoding and commits off the event loop
+            await asyncio.to_thread(write)
+            INDEXED_BLOCKS.labels(chain=chain).inc(last - first + 1)
+        
+        async def worker():
+            # Workers share the generator, so each chunk is taken exactly once
+            for first, last in chunks:
+                await run(first, last)
+        
+        chunk_count = -(-(end_block - start_block + 1) // self.blocks_per_chunk)
+        tasks = [asyncio.ensure_future(worker()) for _ in range(min(self.max_concurrency, chunk_count))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return end_block - start_block + 1
+    
+    async def sync(self, chain: str, client: Any, head: int, confirmations: int = 12,
+                   initial_blocks: int = 1000, max_blocks: Optional[int] = None) -> int:
+        """Index from the checkpoint up to ``head - confirmations``; returns blocks indexed"""
+        target = head - confirmations
+        checkpoint = await asyncio.to_thread(self.get_checkpoint, chain)
+        start = checkpoint + 1 if checkpoint is not None else max(target - initial_blocks + 1, 0)
+        if max_blocks is not None:
+            target = min(target, start + max_blocks - 1)
+        if target < start:
+            return 0
+        indexed = await self.index_range(chain, client, start, target)
+        logger.info("Transaction index synced", chain=chain, from_block=start, to_block=target)
+        return indexed
+    
+    async def backfill(self, chain: str, client: Any, start_block: int, end_block: int) -> int:
+        """Index an arbitrary historical range without moving the checkpoint"""
+        indexed = await self.index_range(chain, client, start_block, end_block, update_checkpoint=False)
+        logger.info("Transaction index backfilled", chain=chain, from_block=start_block, to_block=end_block)
+        return indexed
+    
+    async def _fetch_chunk(self, client: Any, first: int, last: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        block_calls = [("eth_getBlockByNumber", [hex(n), True]) for n in range(first, last + 1)]
+        log_filter = {"fromBlock": hex(first), "toBlock": hex(last), "topics": [TRANSFER_TOPIC]}
+        blocks, logs = await asyncio.gather(
+            client.batch(block_calls),
+            client.call("eth_getLogs", [log_filter])
+        )
+        for number, block in zip(range(first, last + 1), blocks):
+            if isinstance(block, Exception):
+                raise block
+            if block is None:
+                raise ValueError(f"Block {number} not available")
+        return blocks, logs or []
+    
+    def _store(self, db: sqlite3.Connection, chain: str, blocks: List[Dict[str, Any]], logs: List[Dict[str, Any]]):
+        timestamps = {}
+        transactions = []
+        for block in blocks:
+            number = int(block["number"], 16)
+            timestamp = int(block["timestamp"], 16)
+            timestamps[number] = timestamp
+            for tx in block.get("transactions") or []:
+                data = tx.get("input") or "0x"
+                transactions.append((
+                    chain,
+                    _bytes(tx["hash"]),
+                    number,
+                    int(tx["transactionIndex"], 16),
+                    timestamp,
+                    _bytes(tx["from"].lower()),
+                    _bytes(tx["to"].lower()) if tx.get("to") else None,
+                    str(int(tx.get("value") or "0x0", 16)),
+                    int(tx.get("gas") or "0x0", 16),
+                    _bytes(data[:10]) if len(data) >= 10 else None
+                ))
+        
+        transfers = []
+        for log in logs:
+            topics = log.get("topics") or []
+            # ERC-20 Transfer has two indexed addresses; ERC-721 also indexes the token id
+            if len(topics) != 3 or log.get("removed"):
+                continue
+            number = int(log["blockNumber"], 16)
+            data = log.get("data") or "0x"
+            transfers.append((
+                chain,
+                _bytes(log["transactionHash"]),
+                int(log["logIndex"], 16),
+                number,
+                timestamps.get(number, 0),
+                _bytes(log["address"].lower()),
+                bytes.fromhex(topics[1][-40:]),
+                bytes.fromhex(topics[2][-40:]),
+                str(int(data, 16)) if len(data) > 2 else "0"
+            ))
+        
+        db.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", transactions)
+        db.executemany("INSERT OR REPLACE INTO token_transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", transfers)
+        INDEXED_ROWS.labels(chain=chain, kind="transaction").inc(len(transactions))
+        INDEXED_ROWS.labels(chain=chain, kind="erc20_transfer").inc(len(transfers))
+    
+    async def get_history(self, chain: str, address: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest-first transactions and ERC-20 transfers touching ``address``"""
+        return await asyncio.to_thread(self._read_history, chain, address, limit)
+    
+    def _read_history(self, chain: str, address: str, limit: int) -> List[Dict[str, Any]]:
+        key = _bytes(address.lower())
+        tx_columns = "hash, block_number, tx_index, timestamp, from_address, to_address, value, gas, selector"
+        transfer_columns = "tx_hash, block_number, log_index, timestamp, from_address, to_address, amount, token_address"
+        with self._lock:
+            db = self._connection()
+            # One index seek per direction and kind, each already sorted and capped at ``limit``
+            streams = [
+                [("transaction",) + row for row in db.execute(
+                    f"SELECT {tx_columns} FROM transactions WHERE chain = ? AND {column} = ? "
+                    "ORDER BY block_number DESC, tx_index DESC LIMIT ?", (chain, key, limit)
+                )]
+                for column in ("from_address", "to_address")
+            ] + [
+                [("erc20_transfer",) + row for row in db.execute(
+                    f"SELECT {transfer_columns} FROM token_transfers WHERE chain = ? AND {column} = ? "
+                    "ORDER BY block_number DESC, log_index DESC LIMIT ?", (chain, key, limit)
+                )]
+                for column in ("from_address", "to_address")
+            ]
+        
+        history = []
+        seen = set()
+        merged = heapq.merge(*streams, key=lambda row: (row[2], row[3]), reverse=True)
+        for row in merged:
+            identity = (row[0], row[1], row[3])
+            # Self-transfers match both the from and the to index
+            if identity in seen:
+                continue
+            seen.add(identity)
+            history.append(self._format(row))
+            if len(history) >= limit:
+                break
+        return history
+    
+    @staticmethod
+    def _format(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        kind, tx_hash, block_number, position, timestamp, sender, recipient = row[:7]
+        entry = {
+            "type": kind,
+            "hash": _hex(tx_hash),
+            "block_number": block_number,
+            "timestamp": timestamp,
+            "from": _hex(sender),
+            "to": _hex(recipient),
+        }
+        if kind == "transaction":
+            value, gas, selector = row[7:]
+            entry.update({"transaction_index": position, "value_wei": int(value), "gas": gas,
+                          "method_selector": _hex(selector)})
+        else:
+            amount, token = row[7:]
+            entry.update({"log_index": position, "token_address": _hex(token), "amount_raw": int(amount)})
+        return entry
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+tx_indexer = TransactionIndexer(
+    settings.TX_INDEXER_PATH,
+    blocks_per_chunk=settings.TX_INDEXER_BLOCKS_PER_CHUNK,
+    max_concurrency=settings.TX_INDEXER_MAX_CONCURRENCY
+)
@@ -0,0 +1,8 @@
+"""Celery worker entry point for background jobs (JOB_BACKEND=celery).
+
+Run with:
+    celery -A app.worker:celery_app worker --concurrency 2
+"""
+from app.services.job_manager import create_celery_app
+
+celery_app = create_celery_app()
@@ -0,0 +1,87 @@
+"""Response serialization benchmark: FastAPI's default path vs NumpyJSONResponse.
+
+Payloads mirror what the numpy-heavy endpoints return (quantum analysis
+matrices, stress-test histograms, batch protocol scores). Reported paths:
+
+* default: ``.tolist()`` on every array, ``jsonable_encoder``, ``JSONResponse``
+* numpy: the raw payload rendered by ``NumpyJSONResponse``
+
+Usage:
+    python benchmarks/serialization_benchmark.py [--runs 50] [--size 1000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.api import responses
+from app.api.responses import NumpyJSONResponse
+
+def make_payloads(size: int) -> dict:
+    rng = np.random.default_rng(7)
+    assets = max(size // 50, 2)
+    return {
+        "quantum": {
+            "entanglement_matrix": rng.random((assets, assets)),
+            "optimal_allocation": rng.dirichlet(np.ones(assets)),
+            "quantum_risk_score": np.float64(0.42),
+        },
+        "stress_test": {
+            "histogram": {"bin_edges": np.linspace(0, 100, size + 1), "counts": rng.integers(0, 50, size)},
+            "worst_score": np.float64(87.5),
+        },
+        "batch": {
+            "protocols": [f"protocol-{i}" for i in range(size)],
+            "overall_risk_score": rng.random(size) * 100,
+            "risk_level": np.array(["LOW", "MEDIUM", "HIGH"])[rng.integers(0, 3, size)],
+            "risk_components": {name: rng.random(size) for name in ("liquidity", "volatility", "smart_contract")},
+            "var_metrics": {"var_95": rng.random(size), "confidence": np.float64(0.95)},
+        },
+    }
+
+def to_python(value):
+    """What the endpoints had to do before: lists and floats all the way down"""
+    if isinstance(value, dict):
+        return {k: to_python(v) for k, v in value.items()}
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+def default_path(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(to_python(payload))).body
+
+def numpy_path(payload) -> bytes:
+    return NumpyJSONResponse(payload).body
+
+def timeit(fn, payload, runs: int) -> list:
+    fn(payload)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--size", type=int, default=1000, help="rows per batch payload / histogram bins")
+    args = parser.parse_args()
+    
+    print(f"serializer: {'orjson' if responses.orjson is not None else 'json (orjson not installed)'}")
+    for name, payload in make_payloads(args.size).items():
+        print(f"{name}: {len(default_path(payload)):,} bytes default, {len(numpy_path(payload)):,} bytes numpy")
+        for label, fn in (("default", default_path), ("numpy", numpy_path)):
+            values = timeit(fn, payload, args.runs)
+            print(f"  {label:<8} median {statistics.median(values) * 1000:8.2f} ms   "
+                  f"min {min(values) * 1000:8.2f} ms   max {max(values) * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Startup-time benchmark for the API worker.
+
+Each sample runs in a fresh interpreter so module caches do not hide import
+cost. Reported phases:
+
+* import: ``import app.main`` (all routers and service singletons)
+* boot: import plus running the startup handlers and serving ``/health``
+* process: wall-clock of the whole child interpreter
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 10] [--module app.services.blockchain_service]
+    python benchmarks/startup_benchmark.py --importtime 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+result = {{"import": imported - start}}
+if "{module}" == "app.main":
+    import httpx
+    from app.main import app
+    
+    async def boot():
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+        await app.router.shutdown()
+    
+    asyncio.run(boot())
+    result["boot"] = time.perf_counter() - start
+print("BENCH " + json.dumps(result))
+"""
+
+def run_once(module: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+    line = next(l for l in completed.stdout.splitlines() if l.startswith("BENCH "))
+    result = json.loads(line[len("BENCH "):])
+    result["process"] = elapsed
+    return result
+
+def import_profile(module: str, top: int):
+    """Slowest modules by cumulative import time (python -X importtime)"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--importtime", type=int, metavar="N", help="show the N slowest imports instead")
+    args = parser.parse_args()
+    
+    if args.importtime:
+        import_profile(args.module, args.importtime)
+        return
+    
+    # Warm-up run so the first sample does not pay for cold .pyc compilation
+    run_once(args.module)
+    samples = [run_once(args.module) for _ in range(args.runs)]
+    
+    print(f"{args.module}: {args.runs} runs")
+    for phase in ("import", "boot", "process"):
+        values = [s[phase] for s in samples if phase in s]
+        if not values:
+            continue
+        print(f"  {phase:<8} median {statistics.median(values) * 1000:8.1f} ms   "
+              f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
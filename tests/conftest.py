@@ -0,0 +1,37 @@
+import inspect
+from typing import Any, Callable, List
+import aiohttp.web
+import pytest_asyncio
+
+@pytest_asyncio.fixture
+async def rpc_stub():
+    """Start local JSON-RPC stub servers: ``url = await rpc_stub(handler)``.
+    
+    ``handler(payload)`` receives the decoded request body (an object or a
+    batch list) and returns, or resolves to, the reply body or an
+    ``aiohttp.web.Response``.
+    """
+    runners: List[aiohttp.web.AppRunner] = []
+    
+    async def start(handler: Callable[[Any], Any]) -> str:
+        async def endpoint(request: aiohttp.web.Request) -> aiohttp.web.StreamResponse:
+            reply = handler(await request.json())
+            if inspect.isawaitable(reply):
+                reply = await reply
+            if isinstance(reply, aiohttp.web.StreamResponse):
+                return reply
+            return aiohttp.web.json_response(reply)
+        
+        app = aiohttp.web.Application()
+        app.router.add_post("/", endpoint)
+        runner = aiohttp.web.AppRunner(app)
+        await runner.setup()
+        site = aiohttp.web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        host, port = runner.addresses[0][:2]
+        return f"http://{host}:{port}/"
+    
+    yield start
+    for runner in runners:
+        await runner.cleanup()
@@ -0,0 +1,144 @@
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api.batch_routes import router as batch_router
+from app.core.config import settings
+
+calls = []
+api = APIRouter()
+
+@api.get("/echo")
+async def echo(name: str, active: bool = False):
+    calls.append(("echo", name))
+    return {"name": name, "active": active}
+
+@api.post("/items")
+async def create_item(item: dict):
+    calls.append(("items", item))
+    return {"created": item}
+
+@api.post("/analyze/score")
+async def score(item: dict):
+    calls.append(("score", item))
+    return {"score": len(item)}
+
+@api.get("/missing")
+async def missing():
+    raise HTTPException(status_code=404, detail="Not here")
+
+@api.get("/invalid")
+async def invalid():
+    raise ValueError("Bad input")
+
+@api.get("/text")
+async def text():
+    return PlainTextResponse("plain")
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(api, prefix="/api/v1")
+    app.include_router(batch_router, prefix="/api/v1")
+    
+    @app.exception_handler(ValueError)
+    async def value_error_handler(request, exc):
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
+    
+    return app
+
+async def _batch(requests):
+    calls.clear()
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/v1/batch", json={"requests": requests})
+
+@pytest.mark.asyncio
+async def test_responses_come_back_in_request_order():
+    response = await _batch([
+        {"id": "b", "method": "POST", "path": "/api/v1/items", "body": {"sku": 1}},
+        {"id": "a", "method": "GET", "path": "/api/v1/echo", "params": {"name": "x", "active": True}},
+        {"id": 7, "method": "GET", "path": "/api/v1/text"},
+    ])
+    
+    assert response.status_code == 200
+    assert response.json() == {
+        "count": 3,
+        "executed": 3,
+        "responses": [
+            {"id": "b", "status": 200, "body": {"created": {"sku": 1}}},
+            {"id": "a", "status": 200, "body": {"name": "x", "active": True}},
+            {"id": 7, "status": 200, "body": "plain"},
+        ],
+    }
+
+@pytest.mark.asyncio
+async def test_identical_subrequests_run_once():
+    response = await _batch([
+        {"id": 1, "method": "GET", "path": "/api/v1/echo", "params": {"name": "x"}},
+        {"id": 2, "method": "get", "path": "/api/v1/echo", "params": {"name": "x"}},
+        {"id": 3, "method": "GET", "path": "/api/v1/echo", "params": {"name": "y"}},
+    ])
+    
+    body = response.json()
+    assert body["executed"] == 2
+    assert [r["body"]["name"] for r in body["responses"]] == ["x", "x", "y"]
+    assert calls == [("echo", "x"), ("echo", "y")]
+
+@pytest.mark.asyncio
+async def test_only_read_only_posts_are_shared():
+    response = await _batch([
+        {"id": 1, "method": "POST", "path": "/api/v1/items", "body": {"sku": 1}},
+        {"id": 2, "method": "POST", "path": "/api/v1/items", "body": {"sku": 1}},
+        {"id": 3, "method": "POST", "path": "/api/v1/analyze/score", "body": {"tvl": 1}},
+        {"id": 4, "method": "POST", "path": "/api/v1/analyze/score", "body": {"tvl": 1}},
+    ])
+    
+    assert response.json()["executed"] == 3
+    assert calls.count(("items", {"sku": 1})) == 2
+    assert calls.count(("score", {"tvl": 1})) == 1
+
+@pytest.mark.asyncio
+async def test_errors_stay_with_their_subrequest():
+    response = await _batch([
+        {"id": 1, "method": "GET", "path": "/api/v1/missing"},
+        {"id": 2, "method": "GET", "path": "/api/v1/invalid"},
+        {"id": 3, "method": "GET", "path": "/api/v1/echo"},
+        {"id": 4, "method": "GET", "path": "/api/v1/echo", "params": {"name": "ok"}},
+    ])
+    
+    assert response.status_code == 200
+    statuses = [(r["status"], r["body"].get("detail")) for r in response.json()["responses"]]
+    assert statuses[:2] == [(404, "Not here"), (400, "Bad input")]
+    assert statuses[2][0] == 422
+    assert statuses[3] == (200, None)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call", [
+    {"id": 1, "method": "GET", "path": "/api/v1/batch"},
+    {"id": 1, "method": "GET", "path": "/health"},
+    {"id": 1, "method": "TRACE", "path": "/api/v1/echo"},
+    {"id": 1, "method": "GET", "path": "/api/v1/echo", "params": ["name"]},
+])
+async def test_invalid_subrequests_are_rejected(call):
+    response = await _batch([call, {"id": 2, "method": "GET", "path": "/api/v1/echo", "params": {"name": "x"}}])
+    
+    first, second = response.json()["responses"]
+    assert first["status"] == 400
+    assert second["status"] == 200
+
+@pytest.mark.asyncio
+async def test_batch_size_is_limited():
+    call = {"method": "GET", "path": "/api/v1/echo", "params": {"name": "x"}}
+    
+    response = await _batch([call] * (settings.BATCH_MAX_REQUESTS + 1))
+    
+    assert response.status_code == 413
+
+@pytest.mark.asyncio
+async def test_malformed_entries_get_their_own_400():
+    response = await _batch(["not an object", {"id": 2, "method": "GET", "path": "/api/v1/echo", "params": {"name": "x"}}])
+    
+    assert response.status_code == 200
+    first, second = response.json()["responses"]
+    assert first == {"id": None, "status": 400, "body": {"detail": "Sub-request must be an object"}}
+    assert second["status"] == 200
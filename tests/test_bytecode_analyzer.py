@@ -0,0 +1,90 @@
+import random
+from app.services.bytecode_analyzer import (
+    BytecodeAnalyzer, CALLCODE, DELEGATECALL, PRIVILEGED_SELECTORS, PROXY_SLOTS, SELFDESTRUCT
+)
+
+def _naive_scan(code: bytes):
+    """Instruction-by-instruction walk: the reference the regex scanner must agree with"""
+    opcodes, slots, privileged = set(), set(), set()
+    i = 0
+    while i < len(code):
+        op = code[i]
+        if 0x60 <= op <= 0x7f:
+            width = op - 0x5f
+            data = code[i + 1:i + 1 + width].ljust(width, b"\0")
+            if op == 0x7f and data in PROXY_SLOTS:
+                slots.add(PROXY_SLOTS[data])
+            if op == 0x63 and data in PRIVILEGED_SELECTORS:
+                privileged.add(PRIVILEGED_SELECTORS[data])
+            i += 1 + width
+        else:
+            if op in (DELEGATECALL, SELFDESTRUCT, CALLCODE):
+                opcodes.add(op)
+            i += 1
+    return opcodes, slots, privileged
+
+def _random_code(rng: random.Random) -> bytes:
+    slots, selectors = list(PROXY_SLOTS), list(PRIVILEGED_SELECTORS)
+    parts = []
+    for _ in range(rng.randint(1, 300)):
+        r = rng.random()
+        if r < 0.02:
+            parts.append(b"\x7f" + rng.choice(slots))
+        elif r < 0.05:
+            parts.append(b"\x63" + rng.choice(selectors))
+        elif r < 0.1:
+            parts.append(bytes([rng.choice([DELEGATECALL, SELFDESTRUCT, CALLCODE])]))
+        else:
+            # Arbitrary bytes: PUSH data hides opcodes and PUSHes run off the end
+            parts.append(rng.randbytes(rng.randint(1, 60)))
+    return b"".join(parts)
+
+def test_scanner_matches_naive_scan():
+    rng = random.Random(3)
+    for trial in range(300):
+        code = _random_code(rng)
+        result = BytecodeAnalyzer._scan(code)
+        opcodes, slots, privileged = _naive_scan(code)
+        
+        assert result["has_delegatecall"] == (DELEGATECALL in opcodes), trial
+        assert result["has_selfdestruct"] == (SELFDESTRUCT in opcodes), trial
+        assert result["has_callcode"] == (CALLCODE in opcodes), trial
+        assert result["proxy_slots"] == sorted(slots), trial
+        assert result["privileged_functions"] == sorted(privileged), trial
+
+def test_opcodes_inside_push_data_are_ignored():
+    # PUSH2 0xf4ff, then PUSH32 whose data is full of DELEGATECALL bytes
+    code = bytes([0x61, DELEGATECALL, SELFDESTRUCT, 0x7f]) + bytes([DELEGATECALL]) * 32
+    
+    result = BytecodeAnalyzer._scan(code)
+    
+    assert not result["has_delegatecall"]
+    assert not result["has_selfdestruct"]
+
+def test_truncated_push_at_end_of_code():
+    selector = next(iter(PRIVILEGED_SELECTORS))
+    
+    assert BytecodeAnalyzer._scan(b"\x63" + selector[:2])["privileged_functions"] == []
+    assert BytecodeAnalyzer._scan(bytes([DELEGATECALL, 0x7f]))["has_delegatecall"]
+
+def test_minimal_proxy_is_detected():
+    implementation = bytes(range(20))
+    code = bytes.fromhex("363d3d373d3d3d363d73") + implementation + bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+    
+    result = BytecodeAnalyzer().analyze(code)
+    
+    assert result["is_minimal_proxy"]
+    assert result["is_proxy"]
+    assert result["minimal_proxy_implementation"] == "0x" + implementation.hex()
+
+def test_results_are_memoized_by_codehash():
+    analyzer = BytecodeAnalyzer(max_entries=2)
+    code = bytes([0x60, 0x01, DELEGATECALL])
+    
+    first = analyzer.analyze(code)
+    first["has_delegatecall"] = False
+    
+    assert analyzer.analyze(code)["has_delegatecall"]
+    analyzer.analyze(b"\x00")
+    analyzer.analyze(b"\x01")
+    assert len(analyzer._results) == 2
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from app.services.covariance_engine import EWMACovarianceEngine
+
+def test_ready_after_min_observations():
+    engine = EWMACovarianceEngine(min_observations=5)
+    engine.register_assets(["ETH", "BTC"])
+    
+    for _ in range(4):
+        engine.update([0.01, -0.02])
+    assert not engine.is_ready_for(["ETH", "BTC"])
+    
+    engine.update([0.01, -0.02])
+    assert engine.is_ready_for(["ETH", "BTC"])
+
+def test_late_asset_is_not_ready_until_it_has_its_own_history():
+    engine = EWMACovarianceEngine(min_observations=5)
+    for _ in range(10):
+        engine.update({"ETH": 0.01})
+    engine.update({"ETH": 0.01, "NEW": 0.02})
+    
+    snapshot = engine.snapshot()
+    assert snapshot.observations == 11
+    assert snapshot.observations_for(["NEW"]) == 1
+    assert engine.is_ready_for(["ETH"])
+    assert not engine.is_ready_for(["ETH", "NEW"])
+    assert not engine.is_ready_for(["UNKNOWN"])
+
+def test_partial_ticks_only_update_observed_assets():
+    engine = EWMACovarianceEngine(decay=0.9, min_observations=1)
+    engine.update({"ETH": 0.02, "BTC": 0.01})
+    before = engine.snapshot()
+    
+    engine.update({"ETH": -0.03})
+    
+    after = engine.snapshot()
+    eth, btc = after.index["ETH"], after.index["BTC"]
+    assert after.matrix[eth, eth] == pytest.approx(0.9 * before.matrix[eth, eth] + 0.1 * 0.03 ** 2)
+    # BTC was not seen: its variance and its covariance with ETH are left alone
+    assert after.matrix[btc, btc] == before.matrix[btc, btc]
+    assert after.matrix[eth, btc] == before.matrix[eth, btc]
+    assert list(after.counts) == [2, 1]
+
+def test_snapshots_are_immutable():
+    engine = EWMACovarianceEngine()
+    engine.update({"ETH": 0.01, "BTC": 0.02})
+    snapshot = engine.snapshot()
+    matrix = snapshot.matrix.copy()
+    
+    engine.update({"ETH": 0.05, "BTC": -0.04})
+    
+    assert np.array_equal(snapshot.matrix, matrix)
+    with pytest.raises(ValueError):
+        snapshot.matrix[0, 0] = 1.0
+
+def test_estimate_converges_to_true_covariance():
+    rng = np.random.default_rng(0)
+    true_cov = np.array([[0.0016, 0.0006], [0.0006, 0.0009]])
+    engine = EWMACovarianceEngine(decay=0.995, min_observations=30)
+    engine.register_assets(["ETH", "BTC"])
+    
+    for r in rng.multivariate_normal([0.0, 0.0], true_cov, size=5000):
+        engine.update(r)
+    
+    assert engine.is_ready_for(["ETH", "BTC"])
+    np.testing.assert_allclose(engine.snapshot().daily_covariance(["ETH", "BTC"]), true_cov, rtol=0.25)
+
+def test_vector_tick_must_cover_the_universe():
+    engine = EWMACovarianceEngine()
+    engine.register_assets(["ETH", "BTC"])
+    
+    with pytest.raises(ValueError):
+        engine.update([0.01])
+
+@pytest.mark.parametrize("symbols, values", [([], []), (["ETH", "BTC"], [0.0, 0.0]), (["ETH"], [1.0, 2.0])])
+def test_portfolio_moments_need_weights(symbols, values):
+    engine = EWMACovarianceEngine()
+    engine.update({"ETH": 0.01, "BTC": 0.02})
+    
+    with pytest.raises(ValueError):
+        engine.snapshot().portfolio_moments(symbols, values)
@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import pytest
+from app.services.blockchain_service import BlockchainService
+from app.services.head_stream import NewHeadStream
+from app.services.rpc_cache import RpcResponseCache
+from app.services.token_registry import TokenRegistry
+
+def _chain():
+    numbers = itertools.count(1)
+    
+    async def poll():
+        number = next(numbers)
+        return {"number": hex(number), "hash": "0x%064x" % number, "timestamp": hex(1_700_000_000 + number)}
+    
+    return poll
+
+async def _next(subscription):
+    return await asyncio.wait_for(subscription.__anext__(), 1)
+
+@pytest.mark.asyncio
+async def test_heads_are_fanned_out_to_every_subscriber():
+    stream = NewHeadStream("ethereum", _chain(), block_time=0.01)
+    first, second = stream.subscribe(), stream.subscribe()
+    try:
+        assert (await _next(first))["number"] == 1
+        assert (await _next(second))["number"] == 1
+        assert (await _next(first))["number"] == 2
+    finally:
+        await stream.close()
+    
+    with pytest.raises(StopAsyncIteration):
+        await _next(second)
+
+@pytest.mark.asyncio
+async def test_new_subscriber_survives_the_previous_feed_unwinding():
+    stream = NewHeadStream("ethereum", _chain(), block_time=0.01)
+    first = stream.subscribe()
+    await _next(first)
+    
+    # The last subscriber leaving cancels the feed; the next one starts a new feed
+    # before the old task has finished unwinding
+    first.close()
+    second = stream.subscribe()
+    try:
+        assert (await _next(second))["number"] >= 2
+        assert (await _next(second))["number"] >= 3
+    finally:
+        await stream.close()
+
+@pytest.mark.asyncio
+async def test_watchers_resubscribe_when_the_feed_ends(rpc_stub):
+    numbers = itertools.count(1)
+    
+    def reply(payload):
+        number = next(numbers)
+        block = {"number": hex(number), "hash": "0x%064x" % number, "timestamp": hex(number)}
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": block}
+    
+    service = BlockchainService(
+        rpc_urls={"ethereum": await rpc_stub(reply)},
+        cache=RpcResponseCache(block_times={"ethereum": 0.01}),
+        ws_urls={},
+        registry=TokenRegistry()
+    )
+    seen = []
+    watching = True
+    
+    async def watch():
+        async for head in service.watch_new_heads("ethereum", lambda: watching):
+            seen.append(head["number"])
+            if len(seen) == 2:
+                # Ends every subscription, as on shutdown
+                await service.head_stream("ethereum").close()
+    
+    task = asyncio.ensure_future(watch())
+    try:
+        while len(seen) < 4:
+            await asyncio.sleep(0.01)
+        watching = False
+        await asyncio.wait_for(task, 1)
+    finally:
+        task.cancel()
+        await service.head_stream("ethereum").close()
+        await service.rpc_clients["ethereum"].close()
+    
+    assert seen == sorted(seen)
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from app.services import job_manager as jobs
+from app.services.job_manager import JobManager, MemoryJobStore
+
+class FlakyStore(MemoryJobStore):
+    """Refuses to save records with the given statuses"""
+    
+    def __init__(self, *refused):
+        super().__init__()
+        self.refused = refused
+    
+    def save(self, record):
+        if record["status"] in self.refused:
+            raise ConnectionError(f"cannot save a {record['status']} job")
+        super().save(record)
+
+class Backend:
+    def submit(self, run, job_id, kind, params):
+        self.pending = (job_id, kind, params)
+    
+    def close(self):
+        pass
+
+async def _answer(params, progress):
+    progress({"step": 1})
+    return {"answer": params["n"]}
+
+@pytest.fixture(autouse=True)
+def answer_kind(monkeypatch):
+    monkeypatch.setitem(jobs.JOB_KINDS, "answer", _answer)
+
+async def _run(store):
+    manager = JobManager(store=store, backend=Backend())
+    record = await manager.submit("answer", {"n": 42}, "user")
+    # Jobs run on a worker thread with their own event loop
+    await asyncio.to_thread(manager.run, *manager.backend.pending)
+    return await manager.get(record["job_id"])
+
+@pytest.mark.asyncio
+async def test_job_result_is_stored():
+    record = await _run(MemoryJobStore())
+    
+    assert record["status"] == "succeeded"
+    assert record["result"] == {"answer": 42}
+    assert record["progress"] == {"step": 1}
+
+@pytest.mark.asyncio
+async def test_unsaveable_result_marks_the_job_failed():
+    record = await _run(FlakyStore("succeeded"))
+    
+    assert record["status"] == "failed"
+    assert record["result"] is None
+    assert "cannot save" in record["error"]
+
+@pytest.mark.asyncio
+async def test_store_outage_does_not_escape_the_worker():
+    before = jobs.JOBS_RUNNING._value.get()
+    
+    record = await _run(FlakyStore("running", "failed"))
+    
+    assert record["status"] == "queued"
+    assert jobs.JOBS_RUNNING._value.get() == before
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from app.services import risk_cache as risk_cache_module
+from app.services.risk_cache import RiskAssessmentCache
+from app.services.risk_engine import RiskAssessment
+
+def test_equal_inputs_share_a_key():
+    make_key = RiskAssessmentCache.make_key
+    
+    assert make_key({"tvl": 1, "audit_status": True}, {}) == make_key({"audit_status": True, "tvl": 1.0}, {})
+    assert make_key({"tvl": np.float64(5)}, {"positions": (1, 2)}) == make_key({"tvl": 5}, {"positions": [1, 2]})
+    assert make_key({"tvl": 1}, {}) != make_key({"tvl": 2}, {})
+    assert make_key({"tvl": 1}, {}) != make_key({}, {"tvl": 1})
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RiskAssessmentCache(max_entries=2)
+    cache.put("a", {"score": 1})
+    cache.put("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    
+    cache.put("c", {"score": 3})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(risk_cache_module.time, "monotonic", lambda: now[0])
+    cache = RiskAssessmentCache(ttl_seconds=10)
+    cache.put("a", {"score": 1})
+    
+    now[0] = 109.0
+    assert cache.get("a") == {"score": 1}
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert len(cache._entries) == 0
+
+def test_memory_cap_evicts_oldest_and_skips_oversized_values():
+    value = {"payload": "x" * 100}
+    size = RiskAssessmentCache._estimate_size(value)
+    cache = RiskAssessmentCache(max_bytes=size * 2)
+    
+    for key in ("a", "b", "c"):
+        cache.put(key, dict(value))
+    cache.put("huge", {"payload": "x" * size * 3})
+    
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+    assert cache.get("huge") is None
+    assert cache._bytes == size * 2
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once():
+    cache = RiskAssessmentCache()
+    calls = 0
+    
+    async def compute(protocol_data, portfolio_data):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"overall_risk_score": protocol_data["tvl"]}
+    
+    results = await asyncio.gather(*[cache.get_or_compute({"tvl": 1}, {}, compute) for _ in range(5)])
+    assert await cache.get_or_compute({"tvl": 1.0}, {}, compute) == {"overall_risk_score": 1}
+    
+    assert results == [{"overall_risk_score": 1}] * 5
+    assert calls == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_computation():
+    cache = RiskAssessmentCache()
+    release = asyncio.Event()
+    
+    async def compute(protocol_data, portfolio_data):
+        await release.wait()
+        return {"overall_risk_score": 0.5}
+    
+    first = asyncio.ensure_future(cache.get_or_compute({"tvl": 1}, {}, compute))
+    second = asyncio.ensure_future(cache.get_or_compute({"tvl": 1}, {}, compute))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await second == {"overall_risk_score": 0.5}
+    assert cache.get(cache.make_key({"tvl": 1}, {})) == {"overall_risk_score": 0.5}
+
+@pytest.mark.asyncio
+async def test_failed_computation_is_not_cached():
+    cache = RiskAssessmentCache()
+    
+    async def compute(protocol_data, portfolio_data):
+        raise ValueError("bad input")
+    
+    with pytest.raises(ValueError):
+        await cache.get_or_compute({"tvl": 1}, {}, compute)
+    assert len(cache._entries) == 0
+
+def test_callers_get_their_own_copy():
+    cache = RiskAssessmentCache()
+    cache.put("a", {"score": 1, "components": {"market": 0.5}, "recommendations": ["hedge"]})
+    
+    first = cache.get("a")
+    first["score"] = 2
+    first["components"]["market"] = 0.9
+    first["recommendations"].append("sell")
+    
+    assert cache.get("a") == {"score": 1, "components": {"market": 0.5}, "recommendations": ["hedge"]}
+
+def test_copies_keep_the_assessment_inputs():
+    assessment = RiskAssessment({"overall_risk_score": 0.4})
+    assessment.inputs = {"protocol_data": {"tvl": 1}, "portfolio_data": {}}
+    cache = RiskAssessmentCache()
+    cache.put("a", assessment)
+    
+    copied = cache.get("a")
+    
+    assert isinstance(copied, RiskAssessment) and copied is not assessment
+    assert copied.inputs == assessment.inputs
+
+def test_size_estimate_tracks_the_payload():
+    estimate = RiskAssessmentCache._estimate_size
+    small = {"payload": "x" * 100}
+    
+    assert estimate({"payload": "x" * 1000}) > estimate(small) + 800
+    assert estimate({"scores": np.zeros(1000)}) > estimate({"scores": np.zeros(10)})
+    assert estimate(small) == pytest.approx(len(json.dumps(small)), rel=0.2)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from app.services.risk_engine import risk_engine
+
+def _features(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    protocol = {
+        'tvl': rng.choice([0.0, 1e3, 1e6, 5e6, 2e8], n) * rng.random(n),
+        'daily_volume': rng.random(n) * 2e5,
+        'volatility': rng.random(n),
+        'audit_status': rng.random(n) > 0.5,
+        'code_quality_score': rng.random(n),
+        # Bucket edges of the smart-contract age score
+        'days_since_deployment': rng.choice([0, 29, 30, 200, 365, 366, 900], n).astype(float),
+        'governance_score': rng.random(n),
+        'team_reputation': rng.random(n),
+        'decentralization_level': rng.random(n),
+    }
+    # Volume exactly at a liquidity threshold
+    protocol['daily_volume'][:10] = protocol['tvl'][:10] * 0.1
+    portfolio = {
+        'total_value': rng.random(n) * 1e6,
+        'correlation_with_market': rng.random(n),
+    }
+    return protocol, portfolio
+
+def _row(columns, i: int):
+    return {k: bool(v[i]) if v.dtype == bool else float(v[i]) for k, v in columns.items()}
+
+@pytest.mark.asyncio
+async def test_batch_scores_match_scalar_path():
+    protocol, portfolio = _features(300)
+    batch = await risk_engine.calculate_batch_risk(protocol, portfolio)
+    
+    assert batch['count'] == 300
+    for i in range(300):
+        scalar = await risk_engine.calculate_overall_risk(_row(protocol, i), _row(portfolio, i))
+        assert scalar['overall_risk_score'] == batch['overall_risk_score'][i]
+        assert scalar['risk_level'] == batch['risk_level'][i]
+        for name, value in scalar['risk_components'].items():
+            assert value == batch['risk_components'][name][i], name
+        for horizon in ('var_1d', 'var_7d', 'var_30d'):
+            assert scalar['var_metrics'][horizon] == batch['var_metrics'][horizon][i], horizon
+        assert scalar['model_version'] == batch['model_version']
+
+@pytest.mark.asyncio
+async def test_batch_uses_scalar_defaults_for_missing_columns():
+    batch = await risk_engine.calculate_batch_risk({'tvl': [1e6, 2e7]}, {})
+    
+    for i, tvl in enumerate((1e6, 2e7)):
+        scalar = await risk_engine.calculate_overall_risk({'tvl': tvl}, {})
+        assert scalar['overall_risk_score'] == batch['overall_risk_score'][i]
+        assert scalar['risk_level'] == batch['risk_level'][i]
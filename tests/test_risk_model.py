@@ -0,0 +1,91 @@
+import json
+import os
+import pytest
+from app.services.risk_model import DEFAULT_RISK_MODEL_PATH, RiskModel, RiskModelRegistry
+
+def _config(**changes):
+    with open(DEFAULT_RISK_MODEL_PATH) as f:
+        config = json.load(f)
+    config.update(changes)
+    return config
+
+def _write(path, config, mtime):
+    path.write_text(json.dumps(config) if isinstance(config, dict) else config)
+    os.utime(path, (mtime, mtime))
+
+def test_bundled_model_compiles():
+    model = RiskModel(_config())
+    
+    assert model.version
+    assert model.risk_level_index(0.0) == 0
+    assert model.risk_level_index(1.0) == 3
+
+@pytest.mark.parametrize("changes", [
+    {"weights": {"liquidity_risk": 0.5, "market_risk": 0.5, "smart_contract_risk": 0.5, "counterparty_risk": 0.0}},
+    {"thresholds": {"low": 0.6, "medium": 0.4, "high": 0.8}},
+    {"liquidity": {"ratio_edges": [0.1, 0.01], "bucket_risk": [0.9, 0.5, 0.1]}},
+    {"liquidity": {"ratio_edges": [0.01, 0.1], "bucket_risk": [0.9, 0.1]}},
+])
+def test_invalid_configs_are_rejected(changes):
+    with pytest.raises(ValueError):
+        RiskModel(_config(**changes))
+
+def test_missing_sections_are_rejected():
+    config = _config()
+    del config["market"]
+    
+    with pytest.raises(ValueError):
+        RiskModel(config)
+
+def test_changed_file_is_swapped_in_and_listeners_notified(tmp_path):
+    path = tmp_path / "risk_model.json"
+    _write(path, _config(version="v1"), 1000)
+    registry = RiskModelRegistry(str(path), reload_interval=0)
+    swapped = []
+    registry.add_listener(lambda model: swapped.append(model.version))
+    
+    assert registry.model.version == "v1"
+    assert not registry.reload()
+    
+    _write(path, _config(version="v2"), 2000)
+    registry.maybe_reload()
+    
+    assert registry.model.version == "v2"
+    assert swapped == ["v2"]
+
+def test_reload_checks_are_rate_limited(tmp_path):
+    path = tmp_path / "risk_model.json"
+    _write(path, _config(version="v1"), 1000)
+    registry = RiskModelRegistry(str(path), reload_interval=3600)
+    registry.maybe_reload()
+    
+    _write(path, _config(version="v2"), 2000)
+    registry.maybe_reload()
+    
+    assert registry.model.version == "v1"
+
+def test_broken_file_keeps_the_current_model(tmp_path):
+    path = tmp_path / "risk_model.json"
+    _write(path, _config(version="v1"), 1000)
+    registry = RiskModelRegistry(str(path), reload_interval=0)
+    
+    _write(path, "{not json", 2000)
+    registry.maybe_reload()
+    assert registry.model.version == "v1"
+    
+    _write(path, _config(version="v1", weights={"liquidity_risk": 2}), 3000)
+    registry.maybe_reload()
+    assert registry.model.version == "v1"
+
+def test_broken_file_is_retried_until_fixed(tmp_path):
+    path = tmp_path / "risk_model.json"
+    _write(path, _config(version="v1"), 1000)
+    registry = RiskModelRegistry(str(path), reload_interval=0)
+    
+    _write(path, "{not json", 2000)
+    registry.maybe_reload()
+    # Fixed within the same mtime granularity: must still be picked up
+    _write(path, _config(version="v2"), 2000)
+    registry.maybe_reload()
+    
+    assert registry.model.version == "v2"
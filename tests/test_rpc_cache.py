@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.services.rpc_cache import RpcResponseCache
+
+@pytest.mark.asyncio
+async def test_immutable_values_survive_a_restart(tmp_path):
+    path = str(tmp_path / "rpc_cache.sqlite3")
+    cache = RpcResponseCache(path)
+    assert await cache.get_immutable("ethereum", "code", "0xabc") is None
+    await cache.put_immutable("ethereum", "code", "0xabc", "0x6080")
+    cache.close()
+    
+    restarted = RpcResponseCache(path)
+    try:
+        assert await restarted.get_immutable("ethereum", "code", "0xabc") == "0x6080"
+        assert await restarted.get_immutable("polygon", "code", "0xabc") is None
+    finally:
+        restarted.close()
+
+def test_block_entries_are_dropped_when_a_newer_head_is_seen():
+    cache = RpcResponseCache()
+    cache.put_at_block("ethereum", 100, "balance", 5)
+    cache.put_at_block("polygon", 7, "balance", 1)
+    
+    # Reads of an older block never land in the current one
+    cache.put_at_block("ethereum", 99, "balance", 4)
+    assert cache.get_at_block("ethereum", 100, "balance") == 5
+    assert cache.get_at_block("ethereum", 99, "balance") is None
+    
+    cache.observe_head("ethereum", 101)
+    assert cache.get_at_block("ethereum", 100, "balance") is None
+    assert cache.get_at_block("polygon", 7, "balance") == 1
+
+@pytest.mark.asyncio
+async def test_head_is_fetched_once_per_block_interval():
+    cache = RpcResponseCache(block_times={"ethereum": 0.1})
+    fetches = []
+    
+    async def fetch():
+        fetches.append(True)
+        await asyncio.sleep(0.01)
+        return 100 + len(fetches)
+    
+    heads = await asyncio.gather(*[cache.get_block_number("ethereum", fetch) for _ in range(5)])
+    assert heads == [101] * 5
+    assert await cache.get_block_number("ethereum", fetch) == 101
+    await asyncio.sleep(0.1)
+    assert await cache.get_block_number("ethereum", fetch) == 102
+    
+    assert len(fetches) == 2
+
+@pytest.mark.asyncio
+async def test_in_memory_immutable_tier_is_bounded(tmp_path):
+    cache = RpcResponseCache(str(tmp_path / "rpc_cache.sqlite3"), max_immutable_entries=2)
+    try:
+        for key in ("a", "b", "c"):
+            await cache.put_immutable("ethereum", "code", key, key.upper())
+        
+        assert list(cache._immutable) == [("ethereum", "code", "b"), ("ethereum", "code", "c")]
+        # Evicted entries are still served from disk
+        assert await cache.get_immutable("ethereum", "code", "a") == "A"
+        assert ("ethereum", "code", "a") in cache._immutable
+    finally:
+        cache.close()
+
+@pytest.mark.asyncio
+async def test_timed_out_caller_does_not_fail_joined_head_lookups():
+    cache = RpcResponseCache()
+    release = asyncio.Event()
+    
+    async def fetch():
+        await release.wait()
+        return 42
+    
+    leader = asyncio.ensure_future(cache.get_block_number("ethereum", fetch))
+    follower = asyncio.ensure_future(cache.get_block_number("ethereum", fetch))
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(asyncio.shield(leader), 0.01)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await follower == 42
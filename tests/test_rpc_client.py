@@ -0,0 +1,144 @@
+import asyncio
+import random
+import aiohttp.web
+import pytest
+from app.services.rpc_client import JsonRpcClient, RpcError
+
+def _reply(request):
+    if request["method"] == "fail":
+        return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": "execution reverted"}}
+    return {"jsonrpc": "2.0", "id": request["id"], "result": [request["method"], request["params"]]}
+
+@pytest.mark.asyncio
+async def test_call_returns_result(rpc_stub):
+    url = await rpc_stub(_reply)
+    client = JsonRpcClient(url)
+    try:
+        assert await client.call("eth_blockNumber") == ["eth_blockNumber", []]
+        assert await client.call("eth_getBalance", ["0xabc", "latest"]) == ["eth_getBalance", ["0xabc", "latest"]]
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_call_raises_error_replies(rpc_stub):
+    url = await rpc_stub(_reply)
+    client = JsonRpcClient(url)
+    try:
+        with pytest.raises(RpcError) as error:
+            await client.call("fail")
+        assert error.value.code == -32000
+        assert error.value.message == "execution reverted"
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_http_errors_are_raised(rpc_stub):
+    def unavailable(payload):
+        return aiohttp.web.Response(status=503)
+    
+    client = JsonRpcClient(await rpc_stub(unavailable))
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.call("eth_blockNumber")
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_batch_matches_shuffled_replies_by_id(rpc_stub):
+    def shuffled(payload):
+        replies = [_reply(request) for request in payload]
+        random.Random(1).shuffle(replies)
+        return replies
+    
+    client = JsonRpcClient(await rpc_stub(shuffled))
+    try:
+        results = await client.batch([("a", [1]), ("fail", []), ("b", [2]), ("c", None)])
+    finally:
+        await client.close()
+    
+    assert results[0] == ["a", [1]]
+    assert isinstance(results[1], RpcError) and results[1].code == -32000
+    assert results[2:] == [["b", [2]], ["c", []]]
+
+@pytest.mark.asyncio
+async def test_batch_reports_missing_replies(rpc_stub):
+    def drop_first(payload):
+        return [_reply(request) for request in payload[1:]]
+    
+    client = JsonRpcClient(await rpc_stub(drop_first))
+    try:
+        missing, present = await client.batch([("a", []), ("b", [])])
+    finally:
+        await client.close()
+    
+    assert isinstance(missing, RpcError)
+    assert present == ["b", []]
+
+@pytest.mark.asyncio
+async def test_batch_rejected_with_single_error_object(rpc_stub):
+    def reject(payload):
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "batch too large"}}
+    
+    client = JsonRpcClient(await rpc_stub(reject))
+    try:
+        with pytest.raises(RpcError) as error:
+            await client.batch([("a", []), ("b", [])])
+    finally:
+        await client.close()
+    
+    assert error.value.code == -32005
+
+@pytest.mark.asyncio
+async def test_batch_is_split_at_max_batch_size(rpc_stub):
+    sizes = []
+    
+    def record(payload):
+        sizes.append(len(payload))
+        return [_reply(request) for request in payload]
+    
+    client = JsonRpcClient(await rpc_stub(record), max_batch_size=3)
+    try:
+        results = await client.batch([("m", [i]) for i in range(8)])
+        assert await client.batch([("m", [i]) for i in range(4)], max_batch_size=2) == [["m", [i]] for i in range(4)]
+    finally:
+        await client.close()
+    
+    assert results == [["m", [i]] for i in range(8)]
+    assert sorted(sizes) == [2, 2, 2, 3, 3]
+
+@pytest.mark.asyncio
+async def test_batch_rejects_non_list_replies(rpc_stub):
+    client = JsonRpcClient(await rpc_stub(lambda payload: None))
+    try:
+        with pytest.raises(RpcError):
+            await client.batch([("a", [])])
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_failed_chunk_cancels_its_siblings(rpc_stub):
+    cancelled = []
+    
+    class TrackingClient(JsonRpcClient):
+        async def _post_batch(self, calls):
+            try:
+                return await super()._post_batch(calls)
+            except asyncio.CancelledError:
+                cancelled.append(calls[0][1])
+                raise
+    
+    async def slow_unless_first(payload):
+        if payload[0]["params"] == [0]:
+            return aiohttp.web.Response(status=500)
+        await asyncio.sleep(0.5)
+        return [_reply(request) for request in payload]
+    
+    client = TrackingClient(await rpc_stub(slow_unless_first), max_batch_size=1)
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.batch([("m", [i]) for i in range(3)])
+        await asyncio.sleep(0)
+    finally:
+        await client.close()
+    
+    assert sorted(cancelled) == [[1], [2]]
@@ -0,0 +1,216 @@
+import asyncio
+import time
+import aiohttp
+import aiohttp.web
+import pytest
+from app.services.rpc_client import RpcError
+from app.services.rpc_pool import RpcEndpointPool
+
+class Provider:
+    """Stub endpoint answering ``eth_blockNumber`` with its own name"""
+    
+    def __init__(self, name: str, delay: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.down = False
+        self.garbled = False
+        self.requests = 0
+    
+    async def __call__(self, payload):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            return aiohttp.web.Response(status=503)
+        if self.garbled:
+            return aiohttp.web.Response(status=200, text="<html>Bad gateway</html>")
+        if payload["method"] == "fail":
+            return {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": 3, "message": "reverted"}}
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": self.name}
+
+async def _pool(rpc_stub, providers, **kwargs):
+    urls = [await rpc_stub(provider) for provider in providers]
+    return RpcEndpointPool("ethereum", urls, **kwargs)
+
+@pytest.mark.asyncio
+async def test_routes_to_the_fastest_endpoint(rpc_stub):
+    slow, fast = Provider("slow", delay=0.03), Provider("fast")
+    pool = await _pool(rpc_stub, [slow, fast])
+    try:
+        for _ in range(10):
+            await pool.call("eth_blockNumber")
+        assert await pool.call("eth_blockNumber") == "fast"
+    finally:
+        await pool.close()
+    
+    assert pool.ranked()[0] is pool.endpoints[1]
+    assert slow.requests == 1
+
+@pytest.mark.asyncio
+async def test_fails_over_on_transport_errors(rpc_stub):
+    broken, healthy = Provider("broken"), Provider("healthy")
+    broken.down = True
+    pool = await _pool(rpc_stub, [broken, healthy])
+    try:
+        assert await pool.call("eth_blockNumber") == "healthy"
+    finally:
+        await pool.close()
+    
+    assert pool.endpoints[0].consecutive_failures == 1
+
+@pytest.mark.asyncio
+async def test_fails_over_on_bodies_that_are_not_json(rpc_stub):
+    garbled, healthy = Provider("garbled"), Provider("healthy")
+    garbled.garbled = True
+    pool = await _pool(rpc_stub, [garbled, healthy])
+    try:
+        assert await pool.call("eth_blockNumber") == "healthy"
+    finally:
+        await pool.close()
+    
+    assert pool.endpoints[0].consecutive_failures == 1
+
+@pytest.mark.asyncio
+async def test_error_replies_are_answers_not_failures(rpc_stub):
+    first, second = Provider("first"), Provider("second")
+    pool = await _pool(rpc_stub, [first, second])
+    try:
+        with pytest.raises(RpcError):
+            await pool.call("fail")
+    finally:
+        await pool.close()
+    
+    assert (first.requests, second.requests) == (1, 0)
+    assert pool.endpoints[0].consecutive_failures == 0
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_half_opens_and_closes(rpc_stub):
+    flaky, backup = Provider("flaky"), Provider("backup", delay=0.01)
+    flaky.down = True
+    pool = await _pool(rpc_stub, [flaky, backup], failure_threshold=2, cooldown_seconds=0.2)
+    endpoint = pool.endpoints[0]
+    try:
+        for _ in range(2):
+            assert await pool.call("eth_blockNumber") == "backup"
+        assert endpoint.state == "open"
+        
+        # Open: skipped without being asked
+        assert await pool.call("eth_blockNumber") == "backup"
+        assert flaky.requests == 2
+        
+        await asyncio.sleep(0.25)
+        assert endpoint.state == "half_open"
+        # Exactly one trial request is let through while half-open
+        assert endpoint.allow_request() and not endpoint.allow_request()
+        endpoint.record_failure()
+        await asyncio.sleep(0.25)
+        flaky.down = False
+        assert await pool.call("eth_blockNumber") == "flaky"
+        assert endpoint.state == "closed"
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_failed_trial_reopens_the_breaker(rpc_stub):
+    flaky, backup = Provider("flaky"), Provider("backup")
+    flaky.down = True
+    pool = await _pool(rpc_stub, [flaky, backup], failure_threshold=1, cooldown_seconds=0.1)
+    endpoint = pool.endpoints[0]
+    try:
+        await pool.call("eth_blockNumber")
+        await asyncio.sleep(0.15)
+        assert endpoint.state == "half_open"
+        
+        assert await pool.call("eth_blockNumber") == "backup"
+        assert flaky.requests == 2
+        assert endpoint.state == "open"
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_half_open_trial_is_released_whatever_it_raises(rpc_stub):
+    flaky, backup = Provider("flaky"), Provider("backup")
+    flaky.garbled = True
+    pool = await _pool(rpc_stub, [flaky, backup], failure_threshold=1, cooldown_seconds=0.1)
+    endpoint = pool.endpoints[0]
+    try:
+        await pool.call("eth_blockNumber")
+        await asyncio.sleep(0.15)
+        assert await pool.call("eth_blockNumber") == "backup"
+        assert endpoint.state == "open"
+        
+        await asyncio.sleep(0.15)
+        
+        async def broken(*args, **kwargs):
+            raise TypeError("unexpected reply shape")
+        
+        endpoint.client.call = broken
+        with pytest.raises(TypeError):
+            await pool.call("eth_blockNumber")
+        assert endpoint.state == "open"
+        assert not endpoint._trial_in_flight
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_no_healthy_endpoint(rpc_stub):
+    provider = Provider("down")
+    provider.down = True
+    pool = await _pool(rpc_stub, [provider], failure_threshold=1, cooldown_seconds=10)
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await pool.call("eth_blockNumber")
+        with pytest.raises(ConnectionError):
+            await pool.call("eth_blockNumber")
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_delay_and_first_answer_wins(rpc_stub):
+    stalled, backup = Provider("stalled", delay=0.5), Provider("backup")
+    pool = await _pool(rpc_stub, [stalled, backup], hedge=True, hedge_min_delay=0.02)
+    try:
+        start = time.perf_counter()
+        assert await pool.call("eth_blockNumber") == "backup"
+        elapsed = time.perf_counter() - start
+    finally:
+        await pool.close()
+    
+    assert 0.02 <= elapsed < 0.3
+    # The losing request still tells the pool how slow its endpoint was
+    assert pool.endpoints[0].latency_ewma is not None
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(rpc_stub):
+    primary, backup = Provider("primary"), Provider("backup")
+    pool = await _pool(rpc_stub, [primary, backup], hedge=True, hedge_min_delay=0.2)
+    try:
+        assert await pool.call("eth_blockNumber") == "primary"
+    finally:
+        await pool.close()
+    
+    assert backup.requests == 0
+
+@pytest.mark.asyncio
+async def test_transactions_are_never_hedged_or_retried(rpc_stub):
+    broken, healthy = Provider("broken"), Provider("healthy")
+    broken.down = True
+    pool = await _pool(rpc_stub, [broken, healthy], hedge=True, hedge_min_delay=0.0)
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await pool.call("eth_sendRawTransaction", ["0x00"])
+    finally:
+        await pool.close()
+    
+    assert healthy.requests == 0
+
+@pytest.mark.asyncio
+async def test_hedged_call_surfaces_the_primary_error(rpc_stub):
+    primary, backup = Provider("primary"), Provider("backup")
+    primary.down = True
+    pool = await _pool(rpc_stub, [primary, backup], hedge=True, hedge_min_delay=0.5)
+    pool.endpoints[1].allow_request = lambda: False
+    try:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await pool.call("eth_blockNumber")
+    finally:
+        await pool.close()
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+    
+    results = await asyncio.gather(*[flight.do("test", "key", fetch) for _ in range(10)])
+    
+    assert results == [1] * 10
+    assert calls == 1
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    
+    async def fetch():
+        await release.wait()
+        return "value"
+    
+    leader = asyncio.ensure_future(flight.do("test", "key", fetch))
+    follower = asyncio.ensure_future(flight.do("test", "key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    
+    assert await follower == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+@pytest.mark.asyncio
+async def test_waiter_timeout_leaves_work_running():
+    flight = SingleFlight()
+    
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 42
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("test", "key", fetch), timeout=0.01)
+    # The abandoned execution is still the one later callers join
+    assert flight.in_flight() == 1
+    assert await flight.do("test", "key", fetch) == 42
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_free_the_key():
+    flight = SingleFlight()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ConnectionError("boom")
+    
+    results = await asyncio.gather(*[flight.do("test", "key", fetch) for _ in range(3)], return_exceptions=True)
+    
+    assert calls == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    with pytest.raises(ConnectionError):
+        await flight.do("test", "key", fetch)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_keys_and_operations_are_independent():
+    flight = SingleFlight()
+    
+    async def fetch(value):
+        await asyncio.sleep(0.01)
+        return value
+    
+    results = await asyncio.gather(
+        flight.do("a", 1, lambda: fetch("a1")),
+        flight.do("a", 2, lambda: fetch("a2")),
+        flight.do("b", 1, lambda: fetch("b1")),
+    )
+    
+    assert results == ["a1", "a2", "b1"]
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.risk_engine import DEFAULT_STRESS_SHOCKS, risk_engine
+
+def _features(n: int = 40, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    protocol = {
+        "tvl": rng.random(n) * 1e7,
+        "daily_volume": rng.random(n) * 1e6,
+        "volatility": rng.random(n) * 0.6,
+        "audit_status": rng.random(n) > 0.3,
+        "code_quality_score": rng.random(n),
+        "days_since_deployment": rng.random(n) * 800,
+    }
+    portfolio = {"correlation_with_market": rng.random(n), "total_value": 1e5}
+    return protocol, portfolio
+
+SHOCKS = {
+    "tvl_drawdown": [0.0, 0.6],
+    "volume_drawdown": [0.0],
+    "volatility_spike": [1.0, 2.5],
+    "correlation_breakdown": [0.0, 1.0],
+    "audit_flip": [False, True],
+}
+
+def _shocked(protocol, portfolio, tvl, volatility, correlation, audit_flip):
+    corr = portfolio["correlation_with_market"]
+    return (
+        {**protocol, "tvl": protocol["tvl"] * (1 - tvl), "volatility": protocol["volatility"] * volatility,
+         "audit_status": protocol["audit_status"] & (not audit_flip)},
+        {**portfolio, "correlation_with_market": corr + correlation * (1 - corr)},
+    )
+
+@pytest.mark.asyncio
+async def test_default_grid_covers_every_combination():
+    protocol, portfolio = _features(5)
+    
+    result = await risk_engine.run_stress_test(protocol, portfolio)
+    
+    assert result["scenario_count"] == int(np.prod([len(v) for v in DEFAULT_STRESS_SHOCKS.values()]))
+    assert result["protocol_count"] == 5
+    assert int(np.sum(result["score_distribution"]["counts"])) == result["scenario_count"] * 5
+
+@pytest.mark.asyncio
+async def test_scenarios_match_batch_scoring_of_shocked_inputs():
+    protocol, portfolio = _features()
+    
+    result = await risk_engine.run_stress_test(protocol, portfolio, shocks=SHOCKS)
+    
+    assert result["scenario_count"] == 16
+    for scenario in result["scenarios"]:
+        s = scenario["shocks"]
+        shocked = _shocked(protocol, portfolio, s["tvl_drawdown"], s["volatility_spike"],
+                           s["correlation_breakdown"], s["audit_flip"])
+        scores = (await risk_engine.calculate_batch_risk(*shocked))["overall_risk_score"]
+        assert scenario["mean"] == pytest.approx(scores.mean())
+        assert scenario["max"] == pytest.approx(scores.max())
+        assert scenario["median"] == pytest.approx(np.median(scores))
+
+@pytest.mark.asyncio
+async def test_chunked_grid_gives_the_same_result(monkeypatch):
+    protocol, portfolio = _features()
+    whole = await risk_engine.run_stress_test(protocol, portfolio, shocks=SHOCKS)
+    
+    monkeypatch.setattr(settings, "STRESS_TEST_MAX_CELLS", 50)
+    chunked = await risk_engine.run_stress_test(protocol, portfolio, shocks=SHOCKS)
+    
+    assert chunked["scenarios"] == whole["scenarios"]
+    assert chunked["worst_case_protocols"] == whole["worst_case_protocols"]
+
+@pytest.mark.asyncio
+async def test_worst_case_protocols_are_ranked():
+    protocol, portfolio = _features()
+    ids = [f"protocol-{i}" for i in range(40)]
+    
+    result = await risk_engine.run_stress_test(protocol, portfolio, shocks=SHOCKS, protocol_ids=ids, top_k=5)
+    
+    worst = result["worst_case_protocols"]
+    assert len(worst) == 5
+    assert [w["worst_score"] for w in worst] == sorted((w["worst_score"] for w in worst), reverse=True)
+    assert all(w["protocol"] in ids for w in worst)
+    assert worst[0]["worst_score"] == pytest.approx(max(s["max"] for s in result["scenarios"]))
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs", [
+    {"shocks": {"meteor_strike": [1.0]}},
+    {"shocks": {"tvl_drawdown": []}},
+    {"protocol_ids": ["only-one"]},
+])
+async def test_invalid_requests_are_rejected(kwargs):
+    protocol, portfolio = _features(3)
+    
+    with pytest.raises(ValueError):
+        await risk_engine.run_stress_test(protocol, portfolio, **kwargs)
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from app.services.token_registry import TokenRegistry
+
+TOKEN = "0x" + "70" * 20
+
+@pytest.mark.asyncio
+async def test_tokens_are_known_after_a_restart(tmp_path):
+    path = str(tmp_path / "tokens.sqlite3")
+    registry = TokenRegistry(path)
+    assert await registry.get("ethereum", TOKEN) is None
+    await registry.put("ethereum", TOKEN, 6, symbol="USDC", name="USD Coin")
+    registry.close()
+    
+    restarted = TokenRegistry(path)
+    try:
+        assert await restarted.get("ethereum", TOKEN) == {
+            "decimals": 6, "symbol": "USDC", "name": "USD Coin", "is_proxy": False
+        }
+        assert await restarted.get("polygon", TOKEN) is None
+    finally:
+        restarted.close()
+
+@pytest.mark.asyncio
+async def test_rejected_tokens_expire():
+    registry = TokenRegistry(negative_ttl=0.05)
+    registry.reject("ethereum", TOKEN)
+    
+    assert registry.is_rejected("ethereum", TOKEN)
+    assert not registry.is_rejected("polygon", TOKEN)
+    await asyncio.sleep(0.06)
+    assert not registry.is_rejected("ethereum", TOKEN)
+
+@pytest.mark.asyncio
+async def test_registering_a_token_clears_its_rejection():
+    registry = TokenRegistry()
+    registry.reject("ethereum", TOKEN)
+    
+    await registry.put("ethereum", TOKEN, 18)
+    
+    assert not registry.is_rejected("ethereum", TOKEN)
+
+def test_rejections_are_bounded():
+    registry = TokenRegistry(max_rejected=2)
+    for address in ("0x1", "0x2", "0x3"):
+        registry.reject("ethereum", address)
+    
+    assert not registry.is_rejected("ethereum", "0x1")
+    assert registry.is_rejected("ethereum", "0x2") and registry.is_rejected("ethereum", "0x3")
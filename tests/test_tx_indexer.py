@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from app.services.tx_indexer import TRANSFER_TOPIC, TransactionIndexer
+
+ALICE = "0x" + "a1" * 20
+BOB = "0x" + "b0" * 20
+TOKEN = "0x" + "70" * 20
+
+def _word(address: str) -> str:
+    return "0x" + "0" * 24 + address[2:]
+
+class Chain:
+    """Fake client: every block has a payment and a self-call by Alice, plus one token transfer"""
+    
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def batch(self, calls):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.005)
+            numbers = [int(params[0], 16) for _, params in calls]
+            if self.fail_at in numbers:
+                raise ConnectionError("provider went away")
+            return [self._block(n) for n in numbers]
+        finally:
+            self.in_flight -= 1
+    
+    async def call(self, method, params):
+        first, last = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        logs = []
+        for n in range(first, last + 1):
+            logs.append({"address": TOKEN.upper().replace("0X", "0x"), "topics": [TRANSFER_TOPIC, _word(BOB), _word(ALICE)],
+                         "data": hex(n * 10), "blockNumber": hex(n), "transactionHash": "0x%064x" % (n * 10), "logIndex": "0x0"})
+            # ERC-721 transfers index the token id as well and are skipped
+            logs.append({"address": TOKEN, "topics": [TRANSFER_TOPIC, _word(BOB), _word(ALICE), "0x1"],
+                         "data": "0x", "blockNumber": hex(n), "transactionHash": "0x%064x" % (n * 10), "logIndex": "0x1"})
+        return logs
+    
+    @staticmethod
+    def _block(n):
+        return {
+            "number": hex(n),
+            "timestamp": hex(1_700_000_000 + n * 12),
+            "transactions": [
+                {"hash": "0x%064x" % (n * 10), "from": ALICE.upper().replace("0X", "0x"), "to": BOB, "value": hex(n),
+                 "gas": "0x5208", "input": "0xa9059cbb" + "00" * 64, "transactionIndex": "0x0"},
+                {"hash": "0x%064x" % (n * 10 + 1), "from": ALICE, "to": ALICE, "value": "0x0",
+                 "gas": "0x5208", "input": "0x", "transactionIndex": "0x1"},
+            ],
+        }
+
+@pytest.fixture
+def indexer(tmp_path):
+    indexer = TransactionIndexer(str(tmp_path / "tx_index.sqlite3"), blocks_per_chunk=5, max_concurrency=2)
+    yield indexer
+    indexer.close()
+
+@pytest.mark.asyncio
+async def test_history_is_newest_first_across_both_directions(indexer):
+    assert await indexer.index_range("ethereum", Chain(), 1, 12) == 12
+    
+    history = await indexer.get_history("ethereum", ALICE.upper().replace("0X", "0x"), limit=100)
+    
+    # Per block: the payment, the self-call (once, not once per direction) and the token transfer
+    assert len(history) == 36
+    order = [(entry["block_number"], entry.get("transaction_index", entry.get("log_index"))) for entry in history]
+    assert order == sorted(order, reverse=True)
+    transfer = next(entry for entry in history if entry["type"] == "erc20_transfer")
+    assert transfer == {
+        "type": "erc20_transfer", "hash": "0x%064x" % 120, "block_number": 12, "timestamp": 1_700_000_144,
+        "from": BOB, "to": ALICE, "log_index": 0, "token_address": TOKEN, "amount_raw": 120,
+    }
+    payment = next(entry for entry in history if entry["type"] == "transaction" and entry["to"] == BOB)
+    assert payment["method_selector"] == "0xa9059cbb"
+    assert payment["value_wei"] == 12
+    
+    latest = await indexer.get_history("ethereum", BOB, limit=4)
+    assert [entry["block_number"] for entry in latest] == [12, 12, 11, 11]
+    assert await indexer.get_history("polygon", BOB) == []
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(indexer):
+    client = Chain()
+    
+    await indexer.index_range("ethereum", client, 0, 49)
+    
+    assert client.max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_chunk_tasks_are_not_created_up_front(indexer):
+    class CountingChain(Chain):
+        max_tasks = 0
+        
+        async def batch(self, calls):
+            self.max_tasks = max(self.max_tasks, len(asyncio.all_tasks()))
+            return await super().batch(calls)
+    
+    client = CountingChain()
+    
+    assert await indexer.index_range("ethereum", client, 0, 499) == 500
+    
+    # The test, two workers and their block/log fetches; not one task per chunk (100 here)
+    assert client.max_tasks < 10
+
+@pytest.mark.asyncio
+async def test_interrupted_sync_resumes_from_the_checkpoint(indexer):
+    with pytest.raises(ConnectionError):
+        await indexer.sync("ethereum", Chain(fail_at=13), head=42, confirmations=12, initial_blocks=30)
+    
+    # Chunks after the failed one may have landed, but the checkpoint stops before the gap
+    assert indexer.get_checkpoint("ethereum") == 10
+    
+    assert await indexer.sync("ethereum", Chain(), head=42, confirmations=12) == 20
+    assert indexer.get_checkpoint("ethereum") == 30
+    assert await indexer.sync("ethereum", Chain(), head=42, confirmations=12) == 0
+    
+    history = await indexer.get_history("ethereum", BOB, limit=1000)
+    assert sorted({entry["block_number"] for entry in history}) == list(range(1, 31))
+
+@pytest.mark.asyncio
+async def test_backfill_leaves_the_checkpoint_alone(indexer):
+    await indexer.sync("ethereum", Chain(), head=112, confirmations=12, initial_blocks=10)
+    assert indexer.get_checkpoint("ethereum") == 100
+    
+    assert await indexer.backfill("ethereum", Chain(), 20, 29) == 10
+    
+    assert indexer.get_checkpoint("ethereum") == 100
+    history = await indexer.get_history("ethereum", BOB, limit=1000)
+    assert {entry["block_number"] for entry in history} == set(range(20, 30)) | set(range(91, 101))
@@ -0,0 +1,112 @@
+import pytest
+from app.services.risk_engine import COMPONENT_DEPENDENCIES, FIELD_DEPENDENCIES, risk_engine
+
+PROTOCOL = {
+    "tvl": 5_000_000,
+    "daily_volume": 400_000,
+    "volatility": 0.4,
+    "audit_status": True,
+    "code_quality_score": 0.8,
+    "days_since_deployment": 400,
+    "governance_score": 0.6,
+    "team_reputation": 0.7,
+    "decentralization_level": 0.5,
+}
+PORTFOLIO = {"total_value": 250_000, "correlation_with_market": 0.6}
+
+def _comparable(assessment):
+    return {k: v for k, v in assessment.items() if k != "timestamp"}
+
+def test_every_field_maps_to_the_parts_that_read_it():
+    assert FIELD_DEPENDENCIES["tvl"] == {"liquidity_risk"}
+    assert FIELD_DEPENDENCIES["correlation_with_market"] == {"market_risk", "var_metrics"}
+    assert FIELD_DEPENDENCIES["total_value"] == {"var_metrics"}
+    for component, fields in COMPONENT_DEPENDENCIES.items():
+        for field in fields:
+            assert component in FIELD_DEPENDENCIES[field]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("changed", [
+    {"tvl": 80_000},
+    {"daily_volume": 1_000_000, "audit_status": False},
+    {"volatility": 0.9},
+    {"correlation_with_market": 0.95},
+    {"total_value": 1_000_000},
+    {"governance_score": 0.1, "days_since_deployment": 10},
+    {"unrelated_field": "x"},
+])
+async def test_update_matches_full_recomputation(changed):
+    previous = await risk_engine.calculate_overall_risk(dict(PROTOCOL), dict(PORTFOLIO))
+    
+    updated = await risk_engine.update_assessment(previous, changed)
+    
+    protocol, portfolio = dict(PROTOCOL), dict(PORTFOLIO)
+    for field, value in changed.items():
+        (portfolio if field in PORTFOLIO else protocol)[field] = value
+    expected = await risk_engine.calculate_overall_risk(protocol, portfolio)
+    assert _comparable(updated) == _comparable(expected)
+
+@pytest.mark.asyncio
+async def test_only_affected_components_are_recalculated(monkeypatch):
+    previous = await risk_engine.calculate_overall_risk(dict(PROTOCOL), dict(PORTFOLIO))
+    calls = []
+    original = risk_engine._calculate_component
+    
+    async def tracking(component, protocol_data, portfolio_data):
+        calls.append(component)
+        return await original(component, protocol_data, portfolio_data)
+    
+    monkeypatch.setattr(risk_engine, "_calculate_component", tracking)
+    await risk_engine.update_assessment(previous, {"tvl": 10_000})
+    
+    assert calls == ["liquidity_risk"]
+
+@pytest.mark.asyncio
+async def test_updates_chain_without_touching_the_previous_assessment():
+    first = await risk_engine.calculate_overall_risk(dict(PROTOCOL), dict(PORTFOLIO))
+    snapshot = _comparable(first)
+    
+    second = await risk_engine.update_assessment(first, {"tvl": 80_000})
+    third = await risk_engine.update_assessment(second, {"volatility": 0.9})
+    
+    expected = await risk_engine.calculate_overall_risk({**PROTOCOL, "tvl": 80_000, "volatility": 0.9}, dict(PORTFOLIO))
+    assert _comparable(third) == _comparable(expected)
+    assert _comparable(first) == snapshot
+
+@pytest.mark.asyncio
+async def test_inputs_stay_out_of_the_payload():
+    protocol = dict(PROTOCOL)
+    previous = await risk_engine.calculate_overall_risk(protocol, dict(PORTFOLIO))
+    # Later changes to the caller's dict must not leak into the stored inputs
+    protocol["tvl"] = 1
+    
+    assert "inputs" not in previous
+    updated = await risk_engine.update_assessment(previous, {"volatility": 0.9})
+    expected = await risk_engine.calculate_overall_risk({**PROTOCOL, "volatility": 0.9}, dict(PORTFOLIO))
+    assert _comparable(updated) == _comparable(expected)
+
+@pytest.mark.asyncio
+async def test_update_needs_an_engine_assessment():
+    previous = await risk_engine.calculate_overall_risk(dict(PROTOCOL), dict(PORTFOLIO))
+    
+    with pytest.raises(ValueError):
+        await risk_engine.update_assessment(dict(previous), {"tvl": 1})
+
+@pytest.mark.asyncio
+async def test_assessment_from_another_model_version_is_recomputed(monkeypatch):
+    previous = await risk_engine.calculate_overall_risk(dict(PROTOCOL), dict(PORTFOLIO))
+    previous["model_version"] = "older"
+    previous["risk_components"] = {name: 1.0 for name in previous["risk_components"]}
+    full = []
+    original = risk_engine.calculate_overall_risk
+    
+    async def tracking(protocol_data, portfolio_data):
+        full.append(True)
+        return await original(protocol_data, portfolio_data)
+    
+    monkeypatch.setattr(risk_engine, "calculate_overall_risk", tracking)
+    updated = await risk_engine.update_assessment(previous, {"tvl": 80_000})
+    
+    assert full == [True]
+    assert updated["model_version"] == risk_engine.model.version
+    assert updated["risk_components"]["counterparty_risk"] < 1.0
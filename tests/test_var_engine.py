@@ -0,0 +1,69 @@
+from statistics import NormalDist
+import numpy as np
+import pytest
+from app.services.var_engine import VaREngine
+
+def _lognormal_var_es(value: float, mu: float, sigma: float, confidence: float):
+    """Exact VaR/ES of a position whose log return is N(mu, sigma^2)"""
+    z = NormalDist().inv_cdf(confidence)
+    var = -value * np.expm1(mu - z * sigma)
+    # E[e^r | r below its (1 - confidence) quantile]
+    tail_growth = np.exp(mu + sigma ** 2 / 2) * NormalDist().cdf(-z - sigma) / (1 - confidence)
+    return var, value * (1 - tail_growth)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("confidence", [0.95, 0.99])
+async def test_monte_carlo_matches_closed_form(confidence):
+    engine = VaREngine(chunk_size=8192)
+    value, daily_vol, daily_drift = 1_000_000.0, 0.04, 0.001
+    
+    metrics = await engine.monte_carlo_var(
+        [value], [[daily_vol ** 2]], expected_returns=[daily_drift],
+        confidence_level=confidence, n_paths=200_000, seed=7
+    )
+    
+    assert metrics['paths'] == 200_000
+    for horizon in engine.horizons:
+        var, es = _lognormal_var_es(value, daily_drift * horizon, daily_vol * np.sqrt(horizon), confidence)
+        assert metrics[f'var_{horizon}d'] == pytest.approx(var, rel=0.02)
+        assert metrics[f'cvar_{horizon}d'] == pytest.approx(es, rel=0.02)
+
+@pytest.mark.asyncio
+async def test_correlated_portfolio_matches_delta_normal():
+    engine = VaREngine()
+    values = np.array([400_000.0, 350_000.0, 250_000.0])
+    # Low volatilities: the exp() convexity of log-return losses stays well inside the tolerance
+    cov = engine.covariance_from_volatilities([0.01, 0.02, 0.03], pairwise_correlation=0.4)
+    
+    metrics = await engine.monte_carlo_var(values, cov, n_paths=200_000, seed=3)
+    
+    sigma = np.sqrt(values @ cov @ values)
+    z = NormalDist().inv_cdf(0.95)
+    for horizon in engine.horizons:
+        scale = sigma * np.sqrt(horizon)
+        assert metrics[f'var_{horizon}d'] == pytest.approx(z * scale, rel=0.02)
+        assert metrics[f'cvar_{horizon}d'] == pytest.approx(scale * NormalDist().pdf(z) / 0.05, rel=0.02)
+    assert engine.risk_attribution(values, cov)['portfolio_var'] == pytest.approx(z * sigma)
+
+@pytest.mark.asyncio
+async def test_odd_path_count_and_chunk_boundaries():
+    engine = VaREngine(chunk_size=1000)
+    
+    metrics = await engine.monte_carlo_var([100.0, 50.0], np.eye(2) * 1e-4, n_paths=2_501, seed=1)
+    
+    assert metrics['paths'] == 2_501
+    assert metrics['var_1d'] > 0
+    assert metrics['cvar_1d'] >= metrics['var_1d']
+
+@pytest.mark.asyncio
+async def test_path_count_is_capped():
+    engine = VaREngine(max_paths=10_000)
+    
+    with pytest.raises(ValueError):
+        await engine.monte_carlo_var([100.0], [[1e-4]], n_paths=10_001)
+
+@pytest.mark.asyncio
+async def test_a_million_paths_are_accepted_by_default():
+    result = await VaREngine().monte_carlo_var([100.0], [[1e-4]], n_paths=1_000_000, seed=3)
+    
+    assert result['paths'] == 1_000_000